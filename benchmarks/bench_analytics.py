@@ -0,0 +1,66 @@
+"""
+Ingest and query cost of the cohort analytics store at millions of actions.
+
+Session logs are synthesized straight into the event-log format with NumPy,
+so building the input takes a moment even at millions of records.
+
+Run from the repo root:
+    python -m benchmarks.bench_analytics
+    python -m benchmarks.bench_analytics --actions 5000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from logic.analytics import RECORD_DTYPE, CohortStore
+from logic.event_log import HEADER, MAGIC, RECORD, VERSION
+from logic.intervention_tree import COMPILED_TREE
+
+
+def write_logs(directory, n_actions, n_sessions, seed=0):
+    rng = np.random.default_rng(seed)
+    leaves = np.array(COMPILED_TREE.leaf_ids(), dtype=np.int32)
+    per_session = n_actions // n_sessions
+    paths = []
+    for s in range(n_sessions):
+        records = np.zeros(per_session, dtype=RECORD_DTYPE)
+        records["timestamp"] = np.sort(rng.uniform(0, 600, per_session))
+        records["time_taken"] = rng.lognormal(1.0, 0.6, per_session)
+        records["path_id"] = rng.choice(leaves, per_session)
+        records["result"] = rng.choice(3, per_session, p=[0.6, 0.01, 0.39])
+        path = os.path.join(directory, f"s{s}.events")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, f"scenario{s % 5}".encode(),
+                                bytes.fromhex(COMPILED_TREE.fingerprint)))
+            f.write(records.tobytes())
+        paths.append(path)
+    return paths
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--actions", type=int, default=2_000_000)
+    parser.add_argument("--sessions", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_logs(tmp, args.actions, args.sessions)
+        store = CohortStore(os.path.join(tmp, "store"))
+        timed(f"ingest {len(paths)} logs", lambda: store.ingest(paths))
+        store = CohortStore(store.directory)  # cold open: columns are mapped on first use
+        print(f"{len(store):,} actions")
+        timed("most_missed", lambda: store.most_missed(10))
+        timed("response_percentiles", lambda: store.response_percentiles())
+        timed("failure_rates", lambda: store.failure_rates())
+        timed("response_percentiles (1 scen)", lambda: store.response_percentiles(scenario="scenario3"))
+        timed("re-ingest (no new records)", lambda: store.ingest(paths))
@@ -0,0 +1,83 @@
+"""
+Seek cost of session replays against replaying from the start.
+
+Records a synthetic session of each requested length to a temporary event
+log (random actions over one Session.DURATION, about a third of them on
+required paths), loads it as a SessionReplay and seeks to random moments
+in both directions. Reports the load time, the memory the keyframes hold,
+and seek time against a replay that has only the keyframe at the start,
+i.e. one that plays every earlier event on each seek.
+
+Run from the repo root:
+    python -m benchmarks.bench_replay
+    python -m benchmarks.bench_replay --events 1000,100000 --keyframe-every 64
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_scenario, generate_tree
+from logic.clock import VirtualClock
+from logic.event_log import EventWriter
+from logic.intervention_tree import CompiledTree
+from logic.replay import SessionReplay
+from logic.scenario_engine import compile_scenario
+from logic.session import Session
+
+
+def record_session(path, scenario, index, tree, n_events, seed=0):
+    """Write ``n_events`` random actions spread over one session to ``path``."""
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    with EventWriter(path, scenario_id="synthetic", flush_every=4096) as log:
+        session = Session(scenario, index=index, tree=tree, clock=clock, event_log=log)
+        session.start()
+        required, leaves = list(index.required), tree.leaf_ids()
+        for i in range(n_events):
+            clock.set(Session.DURATION * i / n_events)
+            session.submit(rng.choice(required) if rng.random() < 0.3 else rng.choice(leaves))
+
+
+def seek_times(replay, targets, rewind=False):
+    """Mean and p99 microseconds per seek; ``rewind`` first returns to the start each time."""
+    out = []
+    for t in targets:
+        if rewind:
+            replay.seek(0.0)
+        start = time.perf_counter()
+        replay.seek(t)
+        out.append((time.perf_counter() - start) * 1e6)
+    out.sort()
+    return sum(out) / len(out), out[int(len(out) * 0.99)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", default="1000,10000,100000")
+    parser.add_argument("--keyframe-every", type=int, default=SessionReplay.KEYFRAME_EVERY)
+    parser.add_argument("--seeks", type=int, default=500)
+    args = parser.parse_args()
+
+    tree = CompiledTree(generate_tree(2000, seed=1))
+    scenario = generate_scenario(tree, n_required=40, seed=2)
+    index = compile_scenario(scenario, tree)
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in map(int, args.events.split(",")):
+            path = os.path.join(tmp, f"synthetic-{n}.events")
+            record_session(path, scenario, index, tree, n)
+
+            start = time.perf_counter()
+            replay = SessionReplay(path, scenario, index=index, tree=tree, keyframe_every=args.keyframe_every)
+            load_ms = (time.perf_counter() - start) * 1000
+            targets = [rng.uniform(0, replay.end) for _ in range(args.seeks)]
+            mean, p99 = seek_times(replay, targets)
+
+            linear = SessionReplay(path, scenario, index=index, tree=tree, keyframe_every=n + 1)
+            lin_mean, lin_p99 = seek_times(linear, targets[:50], rewind=True)
+            print(f"{n:>7} events: load {load_ms:7.1f} ms, "
+                  f"{len(replay.keyframes)} keyframes / {replay.keyframe_bytes() / 1024:.0f} KiB; "
+                  f"seek mean {mean:7.1f} us p99 {p99:7.1f} us; "
+                  f"from start mean {lin_mean:9.1f} us p99 {lin_p99:9.1f} us")
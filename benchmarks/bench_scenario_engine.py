@@ -0,0 +1,35 @@
+"""
+Per-action cost of ScenarioEngine.process_action as scenario size grows.
+
+Run from the repo root:
+    python -m benchmarks.bench_scenario_engine
+"""
+import timeit
+
+from benchmarks.synthetic import generate_scenario, generate_tree
+from logic.intervention_tree import CompiledTree
+from logic.scenario_engine import ScenarioEngine
+
+
+def bench(n_required, repeats=20000):
+    n_harmful = n_required // 4
+    tree = CompiledTree(generate_tree(n_required + n_harmful + 16, seed=n_required))
+    scenario = generate_scenario(tree, n_required, n_harmful, seed=n_required)
+    engine = ScenarioEngine(scenario, tree=tree)
+    index = engine.index
+    decoy = next(p for p in tree.leaf_ids() if p not in index.required and p not in index.harmful)
+    # worst case for the old linear scan: last required, unknown path
+    probes = [tree.path_id(scenario["required_paths"][-1]["path"]), decoy]
+
+    def run():
+        for p in probes:
+            engine.process_action(p)
+
+    t = timeit.timeit(run, number=repeats)
+    return t / (repeats * len(probes)) * 1e9
+
+
+if __name__ == "__main__":
+    print(f"{'required':>10} {'ns/action':>12}")
+    for n in (10, 100, 1_000, 10_000, 100_000):
+        print(f"{n:>10} {bench(n):>12.0f}")
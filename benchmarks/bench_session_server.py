@@ -0,0 +1,90 @@
+"""
+Load test for session_server: many concurrent sessions, per-action latency.
+
+Starts the server in a subprocess, opens SESSIONS sessions over CONNECTIONS
+keep-alive connections, then has every session submit ACTIONS actions with
+all connections in flight at once. Latency is measured client-side per
+request, so on a single core it includes the client's own overhead.
+
+Run from the repo root:
+    python -m benchmarks.bench_session_server --sessions 5000
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+from logic.intervention_tree import COMPILED_TREE
+
+
+async def request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return json.loads(await reader.readexactly(length))
+
+
+async def worker(port, session_ids, n_actions, leaves, latencies, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for _ in range(n_actions):
+        for sid in session_ids:
+            t = time.perf_counter()
+            await request(reader, writer, "POST", f"/sessions/{sid}/actions", {"path_id": rng.choice(leaves)})
+            latencies.append(time.perf_counter() - t)
+    writer.close()
+
+
+async def run(port, n_sessions, n_connections, n_actions):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    ids = [(await request(reader, writer, "POST", "/sessions", {"scenario": "medical_sample"}))["session_id"]
+           for _ in range(n_sessions)]
+    writer.close()
+
+    leaves = COMPILED_TREE.leaf_ids()
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(port, ids[i::n_connections], n_actions, leaves, latencies, i)
+        for i in range(n_connections)
+    ))
+    wall = time.perf_counter() - start
+    return sorted(latencies), wall
+
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--actions", type=int, default=10, help="actions per session")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "session_server.py", "--port", str(args.port)],
+                              stdout=subprocess.PIPE)
+    try:
+        server.stdout.readline()  # "Serving ..." once listening
+        latencies, wall = asyncio.run(run(args.port, args.sessions, args.connections, args.actions))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"sessions={args.sessions} connections={args.connections} actions={len(latencies)}")
+    print(f"throughput {len(latencies) / wall:,.0f} actions/s")
+    print(f"latency ms  p50 {pct(latencies, 50):.2f}  p90 {pct(latencies, 90):.2f}  "
+          f"p99 {pct(latencies, 99):.2f}  max {latencies[-1] * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Scenario solver cost on large synthetic scenarios.
+
+Required paths are grouped into small prerequisite components (chains,
+diamonds and fans) so state counting runs its search as well as its
+shortcuts. Large scenarios usually cannot be finished inside the session
+limit even at expert pace; the solver reports that, which is expected here.
+
+Run from the repo root:
+    python -m benchmarks.bench_solver
+    python -m benchmarks.bench_solver --required 1000,5000,20000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.synthetic import generate_scenario, generate_tree
+from logic.intervention_tree import CompiledTree
+from logic.scenario_engine import compile_scenario
+from logic.scenario_solver import _solve_row, solve_scenario
+
+
+def add_prerequisites(scenario, seed=0):
+    """Link required entries into groups of 2-6: chains, diamonds and fans."""
+    rng = random.Random(seed)
+    entries = scenario["required_paths"]
+    i = 0
+    while i < len(entries):
+        group = entries[i:i + rng.randint(2, 6)]
+        i += len(group)
+        shape = rng.choice(("chain", "diamond", "fan"))
+        for k, entry in enumerate(group[1:], 1):
+            if shape == "chain":
+                before = [group[k - 1]]
+            elif shape == "diamond":
+                before = [group[0]] if k < len(group) - 1 else group[1:-1] or [group[0]]
+            else:
+                before = [group[0]]
+            entry["after"] = [e["path"] for e in before]
+    return scenario
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--required", default="1000,5000")
+    parser.add_argument("--leaves", type=int, default=50_000)
+    args = parser.parse_args()
+
+    tree = CompiledTree(generate_tree(args.leaves, seed=1))
+    for n in map(int, args.required.split(",")):
+        scenario = add_prerequisites(generate_scenario(tree, n_required=n, seed=n), seed=n)
+        index = compile_scenario(scenario, tree)
+        _solve_row.cache_clear()
+        start = time.perf_counter()
+        result = solve_scenario(scenario, index=index, tree=tree)
+        ms = (time.perf_counter() - start) * 1000
+        states = result["states"]
+        print(f"{n:>6} required: {ms:8.1f} ms  {result['clicks']} clicks, "
+              f"~1e{len(str(states)) - 1} states (exact={result['states_exact']}), "
+              f"solvable={result['solvable']}")
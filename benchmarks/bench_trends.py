@@ -0,0 +1,73 @@
+"""
+Frame cost of the dashboard's trend panel over a full scenario.
+
+Drives TrendPlot on an offscreen Agg canvas at 10 Hz for a whole
+Session.DURATION, with an action every few seconds, and reports per-frame
+time by minute, the points each series holds, memory blocks allocated
+after the first minute, and how many full canvas redraws happened. A
+frame that redraws the whole figure is timed alongside for comparison.
+
+Run from the repo root:
+    python -m benchmarks.bench_trends
+    python -m benchmarks.bench_trends --minutes 60
+"""
+from array import array
+import argparse
+import random
+import sys
+import time
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from logic.session import Session
+from logic.vitals import VitalsSimulator
+from trend_panel import TrendPanel, TrendPlot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=Session.DURATION / 60)
+    parser.add_argument("--hz", type=float, default=10.0)
+    args = parser.parse_args()
+
+    duration = args.minutes * 60
+    figure = Figure(figsize=(4, 3), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    plot = TrendPlot(figure, canvas, duration=duration)
+    plot.reset(total_required=30, duration=duration)
+
+    vitals = VitalsSimulator()
+    rng = random.Random(0)
+    next_action, score = rng.expovariate(1 / 5.0), 0
+    frames = int(duration * args.hz)
+    frame_ms = array("d", bytes(8 * frames))  # preallocated so timing adds no blocks
+    points = {}
+    blocks = None
+    for i in range(frames):
+        t = i / args.hz
+        if i == int(60 * args.hz):
+            blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        plot.add_vitals(t, vitals.step(t)[0])
+        if t >= next_action:
+            score += rng.random() < 0.6
+            plot.add_action(t, score, rng.lognormvariate(1.0, 0.6))
+            next_action = t + rng.expovariate(1 / 5.0)
+        plot.blit()
+        frame_ms[i] = (time.perf_counter() - start) * 1000.0
+        points[int(t // 60)] = len(plot.vitals)
+    grown = sys.getallocatedblocks() - blocks if blocks is not None else 0
+
+    per_minute = int(60 * args.hz)
+    for minute in range(0, (frames + per_minute - 1) // per_minute):
+        times = sorted(frame_ms[minute * per_minute:(minute + 1) * per_minute])
+        print(f"minute {minute:>3}: mean {sum(times) / len(times):6.2f} ms  "
+              f"p99 {times[int(len(times) * 0.99)]:6.2f} ms  points {points[minute]}")
+    start = time.perf_counter()
+    for _ in range(20):
+        canvas.draw()
+    full_ms = (time.perf_counter() - start) * 1000.0 / 20
+    print(f"full redraw: {full_ms:.2f} ms/frame for comparison; budget {TrendPanel.FRAME_BUDGET_MS:.0f} ms")
+    print(f"{frames} frames, {plot.full_draws - 20} full redraws, "
+          f"{grown:+d} memory blocks after minute 1, "
+          f"{len(plot.vitals)} vitals points kept (stride {plot.vitals.stride})")
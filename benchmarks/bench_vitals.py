@@ -0,0 +1,28 @@
+"""
+Cost of one VitalsSimulator.step() as the patient count grows.
+
+Run from the repo root:
+    python -m benchmarks.bench_vitals
+"""
+import random
+import timeit
+
+from logic.intervention_tree import COMPILED_TREE
+from logic.vitals import INTERVENTION_EFFECTS, VitalsSimulator
+
+
+def bench(n_patients, effects_per_patient=3, repeats=200):
+    rng = random.Random(0)
+    sim = VitalsSimulator(n_patients, trend={"spo2": -0.01})
+    paths = [COMPILED_TREE.path_id(p) for p in INTERVENTION_EFFECTS]
+    for _ in range(effects_per_patient):
+        sim.apply_many(range(n_patients), [rng.choice(paths) for _ in range(n_patients)],
+                       now=rng.uniform(0, 300))
+    t = timeit.timeit(lambda: sim.step(300.0), number=repeats)
+    return t / repeats * 1000
+
+
+if __name__ == "__main__":
+    print(f"{'patients':>10} {'ms/tick':>10}")
+    for n in (1, 100, 1_000, 10_000, 100_000):
+        print(f"{n:>10} {bench(n):>10.3f}")
@@ -0,0 +1,107 @@
+"""
+Cold-start import budget for the headless core.
+
+Imports the modules grading workers and tooling use, each time in a fresh
+interpreter, and checks two things:
+  - the best-of-N import time, timed inside the fresh interpreter so its
+    own startup is excluded, stays under BUDGET_MS
+  - no GUI or heavy optional module (Tk, numpy, multiprocessing, asyncio)
+    gets pulled in
+
+It also imports the dashboard module (when customtkinter is installed) and
+checks that numpy, matplotlib, asyncio and multiprocessing wait for first
+use there too; Tk itself is not timed.
+
+When the check fails, the slowest modules from ``python -X importtime`` are
+listed. Exits 1 on failure.
+
+Run from the repo root:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget 40 --runs 9
+"""
+from typing import List, Tuple
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEADLESS = ("logic.session", "logic.scenario_library", "logic.batch_grader", "logic.scenario_lint")
+FORBIDDEN = ("tkinter", "customtkinter", "numpy", "matplotlib", "asyncio", "multiprocessing")
+GUI = ("dashboard",)
+GUI_FORBIDDEN = ("numpy", "matplotlib", "asyncio", "multiprocessing")
+BUDGET_MS = 50.0
+
+_PROBE = """
+import sys, time
+t = time.perf_counter()
+{imports}
+ms = (time.perf_counter() - t) * 1000.0
+import json
+print(json.dumps([ms, [m for m in {forbidden!r} if m in sys.modules]]))
+"""
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=root,
+                          capture_output=True, text=True, check=True)
+
+
+def measure(modules: Tuple[str, ...], runs: int,
+            forbidden: Tuple[str, ...] = FORBIDDEN) -> Tuple[float, List[str]]:
+    """Best-of-``runs`` import time in ms, and any ``forbidden`` modules that were loaded."""
+    code = _PROBE.format(imports="\n".join(f"import {m}" for m in modules), forbidden=forbidden)
+    best, loaded = float("inf"), []
+    for _ in range(runs):
+        ms, loaded = json.loads(_run(code).stdout)
+        best = min(best, ms)
+    return best, loaded
+
+
+def slowest(modules: Tuple[str, ...], top: int = 10) -> List[Tuple[int, str]]:
+    """(cumulative µs, module) of the slowest imports, from -X importtime."""
+    stderr = _run("\n".join(f"import {m}" for m in modules), "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Check cold-start import time of the headless core.")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="milliseconds (default %(default)s)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to take the best of")
+    args = parser.parse_args(argv)
+
+    ms, loaded = measure(HEADLESS, args.runs)
+    print(f"headless core import: {ms:.1f} ms (budget {args.budget:.0f} ms)")
+    failed = False
+    if loaded:
+        print(f"FAIL: imports {', '.join(loaded)}; keep these behind first use")
+        failed = True
+    if ms > args.budget:
+        print("FAIL: over budget; slowest imports (cumulative):")
+        failed = True
+    if failed:
+        for us, name in slowest(HEADLESS):
+            print(f"  {us / 1000.0:8.1f} ms  {name}")
+
+    try:
+        _, loaded = measure(GUI, 1, GUI_FORBIDDEN)
+    except subprocess.CalledProcessError:
+        print("dashboard import: skipped (customtkinter or Tk unavailable)")
+    else:
+        if loaded:
+            print(f"FAIL: dashboard import loads {', '.join(loaded)}; import them on first use")
+            failed = True
+        else:
+            print("dashboard import: no deferred modules loaded")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Headless micro-benchmark suite for the scenario core.
+
+Every case runs against seeded synthetic trees and scenarios (see
+benchmarks.synthetic) at each requested size, and reports ops/sec plus the
+memory each call allocates:
+
+    alloc B/call   peak bytes allocated during one call (tracemalloc), i.e.
+                   transient garbage the call creates
+    blocks/call    net allocated blocks left behind per call; anything above
+                   zero is state that grows with every action
+
+Results can be saved as a JSON baseline and later runs compared against it;
+--compare exits non-zero if any case slowed down by more than --threshold.
+
+Run from the repo root:
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 10,1000 --cases engine,scoring
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json --threshold 0.15
+"""
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from benchmarks.synthetic import generate_scenario, generate_tree
+from logic.action_handler import ActionHandler
+from logic.clock import VirtualClock
+from logic.intervention_tree import CompiledTree
+from logic.path_search import PathSearchIndex
+from logic.scenario_engine import ScenarioEngine, compile_scenario
+from logic.scenario_library import ScenarioLibrary
+from logic.scoring import Scoring
+
+SIZES = (10, 100, 1_000, 10_000, 100_000)
+ALLOC_SAMPLES = 200
+
+
+class Fixture:
+    """Synthetic tree and scenario of one size, shared by every case."""
+
+    def __init__(self, size: int, workdir: str):
+        self.size = size
+        self.raw_tree = generate_tree(size, seed=size)
+        self.tree = CompiledTree(self.raw_tree)
+        self.scenario = generate_scenario(self.tree, n_required=max(1, size // 2),
+                                          seed=size, steps=min(size, 1000))
+        self.index = compile_scenario(self.scenario, self.tree)
+        self.leaves = self.tree.leaf_ids()
+
+        # probes cycle through required, harmful and unknown leaves
+        required = list(self.index.required)
+        harmful = list(self.index.harmful)
+        rest = sorted(set(self.leaves) - set(required) - self.index.harmful)
+        self.probes = [p for group in itertools.zip_longest(required, harmful, rest)
+                       for p in group if p is not None]
+
+        self.json_text = json.dumps(self.scenario)
+        self.library_dir = os.path.join(workdir, str(size))
+        os.makedirs(self.library_dir)
+        with open(os.path.join(self.library_dir, "synthetic.json"), "w") as f:
+            f.write(self.json_text)
+
+
+# ---------- cases ----------
+# each case takes a Fixture and returns the zero-argument callable to time
+
+def case_engine_process_action(fx: Fixture) -> Callable[[], Any]:
+    engine = ScenarioEngine(fx.scenario, index=fx.index, tree=fx.tree, clock=VirtualClock())
+    engine.start()
+    probes = itertools.cycle(fx.probes)
+    return lambda: engine.process_action(next(probes))
+
+
+def case_scoring_record_action(fx: Fixture) -> Callable[[], Any]:
+    scoring = Scoring(fx.index.total_required, clock=VirtualClock(), tree=fx.tree)
+    results = itertools.cycle(zip(fx.probes, itertools.cycle(("required", "harmful", "unknown"))))
+
+    def run():
+        path, result = next(results)
+        scoring.prompt_shown()
+        scoring.record_action(path, result)
+    return run
+
+
+def case_action_handler_validate(fx: Fixture) -> Callable[[], Any]:
+    handler = ActionHandler(fx.scenario, tree=fx.tree)
+    probes = itertools.cycle(fx.probes)
+
+    def run():
+        if not handler.has_more_steps():
+            handler.reset()
+        handler.validate(next(probes))
+    return run
+
+
+def case_load_json_compile(fx: Fixture) -> Callable[[], Any]:
+    return lambda: compile_scenario(json.loads(fx.json_text), fx.tree)
+
+
+def case_load_library_cached(fx: Fixture) -> Callable[[], Any]:
+    ScenarioLibrary(fx.library_dir, tree=fx.tree).load("synthetic")  # warm the pickle cache
+    return lambda: ScenarioLibrary(fx.library_dir, tree=fx.tree).load("synthetic")
+
+
+def case_tree_compile(fx: Fixture) -> Callable[[], Any]:
+    return lambda: CompiledTree(fx.raw_tree)
+
+
+def case_tree_path_id(fx: Fixture) -> Callable[[], Any]:
+    paths = itertools.cycle([fx.tree.path_of(p) for p in fx.leaves[:4096]])
+    return lambda: fx.tree.path_id(next(paths))
+
+
+def case_tree_path_of(fx: Fixture) -> Callable[[], Any]:
+    leaves = itertools.cycle(fx.leaves)
+    return lambda: fx.tree.path_of(next(leaves))
+
+
+def case_tree_children(fx: Fixture) -> Callable[[], Any]:
+    nodes = itertools.cycle(range(len(fx.tree)))
+    return lambda: fx.tree.children(next(nodes))
+
+
+def case_search_query(fx: Fixture) -> Callable[[], Any]:
+    index = PathSearchIndex(fx.tree)
+    queries = itertools.cycle(["detail 1", "act", "categry 2 dtl", "action 3 detail"])
+    return lambda: index.search(next(queries))
+
+
+CASES: Dict[str, Callable[[Fixture], Callable[[], Any]]] = {
+    "engine.process_action": case_engine_process_action,
+    "scoring.record_action": case_scoring_record_action,
+    "action_handler.validate": case_action_handler_validate,
+    "load.json_compile": case_load_json_compile,
+    "load.library_cached": case_load_library_cached,
+    "tree.compile": case_tree_compile,
+    "tree.path_id": case_tree_path_id,
+    "tree.path_of": case_tree_path_of,
+    "tree.children": case_tree_children,
+    "search.query": case_search_query,
+}
+
+
+# ---------- measurement ----------
+def measure(fn: Callable[[], Any]) -> Dict[str, float]:
+    number, seconds = timeit.Timer(fn).autorange()
+    ops = number / seconds
+
+    # a few calls are enough for slow cases; fast ones get ALLOC_SAMPLES
+    samples = max(1, min(ALLOC_SAMPLES, number))
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        for _ in range(samples):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            peak_total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(samples):
+        fn()
+    net_blocks = (sys.getallocatedblocks() - blocks_before) / samples
+
+    return {"ops_per_sec": ops, "alloc_bytes": peak_total / samples, "net_blocks": net_blocks}
+
+
+def run(sizes: List[int], case_names: List[str]) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<26} {'size':>7} {'ops/sec':>13} {'alloc B/call':>13} {'blocks/call':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            fx = Fixture(size, workdir)
+            for name in case_names:
+                stats = measure(CASES[name](fx))
+                results[f"{name}@{size}"] = stats
+                print(f"{name:<26} {size:>7} {stats['ops_per_sec']:>13,.0f} "
+                      f"{stats['alloc_bytes']:>13,.0f} {stats['net_blocks']:>12.2f}", flush=True)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[Tuple[str, float]]:
+    """Print ops/sec ratios against a baseline; returns the cases slower than the threshold."""
+    regressions = []
+    print(f"\n{'case':<34} {'baseline':>13} {'now':>13} {'ratio':>7}")
+    for key, stats in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        ratio = stats["ops_per_sec"] / old["ops_per_sec"]
+        flag = ""
+        if ratio < 1.0 - threshold:
+            regressions.append((key, ratio))
+            flag = "  REGRESSION"
+        print(f"{key:<34} {old['ops_per_sec']:>13,.0f} {stats['ops_per_sec']:>13,.0f} "
+              f"{ratio:>7.2f}{flag}")
+    if not results.keys() & baseline.keys():
+        print("(no cases in common with the baseline)")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the scenario core.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma-separated tree sizes in leaf paths")
+    parser.add_argument("--cases", default="",
+                        help="comma-separated case name prefixes (default: all)")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed ops/sec drop before --compare fails (default 0.10)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    prefixes = [c for c in args.cases.split(",") if c]
+    case_names = [n for n in CASES if not prefixes or any(n.startswith(p) for p in prefixes)]
+    if not case_names:
+        parser.error(f"no cases match {args.cases!r}; choose from {', '.join(CASES)}")
+
+    results = run(sizes, case_names)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than "
+                  f"{args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
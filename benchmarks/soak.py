@@ -0,0 +1,472 @@
+"""
+Soak test: simulated trainees driving the app for hours of simulated time.
+
+A seeded agent clicks through the real Dashboard (category button, then each
+modal level, or the type-ahead search; patient switches; ending and
+reloading scenarios) on a VirtualClock, so hours of session time pass in
+minutes. Without a display the headless controller runs the same per-action
+work minus Tk: session, event log, snapshot, vitals and search.
+
+Every ``--sample-every`` actions it records:
+    rss         resident set size (/proc/self/statm; skipped where unavailable)
+    traced      tracemalloc's current total, with --tracemalloc
+    widgets     Tk widgets under the root, Toplevels among them, named fonts
+                and images, and pending ``after`` callbacks (GUI only)
+    log lines   lines in the action log's textbox (GUI only)
+    latency     p50/p99 of the UI thread's wall time per action since the last
+                sample (the harness then waits for the worker's result)
+
+After the warm-up samples, sustained growth in any of these fails the run:
+the least-squares trend over the remaining samples must stay within
+tolerance (see CHECKS), widget counts may not grow at all, and the latency
+p50 may not drift above 1.5x its first value. With --tracemalloc the lines
+that grew most are listed. Exits 1 on failure.
+
+Agents:
+    random  uniformly random leaves, mostly through the modal
+    markov  a trainee moving between focused (does an available required
+            step), browsing (wanders one category) and searching
+
+Run from the repo root:
+    python -m benchmarks.soak --hours 4 --agent markov
+    python -m benchmarks.soak --headless --hours 24 --tracemalloc
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from logic import snapshot
+from logic.clock import VirtualClock
+from logic.event_log import EventWriter
+from logic.intervention_tree import COMPILED_TREE, ROOT
+from logic.path_search import PathSearchIndex, tokenize
+from logic.scenario_engine import scenario_digest
+from logic.scenario_library import ScenarioLibrary
+from logic.session import Session
+from logic.vitals import VitalsSimulator
+
+MB = 1024 * 1024
+
+# series -> (allowed absolute growth, allowed growth relative to the first post-warm-up sample)
+CHECKS = {
+    "rss_mb": (4.0, 0.05),
+    "traced_mb": (1.0, 0.05),
+    "widgets": (0.0, 0.0),
+    "toplevels": (0.0, 0.0),
+    "tk_fonts": (0.0, 0.0),
+    "tk_images": (0.0, 0.0),
+    "after_callbacks": (2.0, 0.0),
+}
+LATENCY_DRIFT = 1.5
+
+
+# ---------- agents ----------
+class RandomAgent:
+    """Uniformly random leaves: 70% through the modal, 25% by search, 5% patient switches."""
+
+    def __init__(self, seed: int = 0, think: float = 1.0):
+        self.rng = random.Random(seed)
+        self.think = think
+        self.leaves = COMPILED_TREE.leaf_ids()
+
+    def next(self, session: Session) -> Tuple[str, int, float]:
+        """(kind, path id or patient, seconds of thought before it)"""
+        r = self.rng.random()
+        wait = self.rng.expovariate(1.0 / self.think)
+        if r < 0.05 and session.n_patients > 1:
+            return "patient", self.rng.randrange(session.n_patients), wait
+        kind = "search" if r < 0.30 else "modal"
+        return kind, self.rng.choice(self.leaves), wait
+
+
+class MarkovAgent:
+    """
+    Trainee with three states. Focused picks a required step that is
+    available now, browsing picks leaves in the category it is looking at,
+    and searching types part of a leaf's label.
+    """
+    TRANSITIONS = {
+        "focused": (("focused", 0.6), ("browsing", 0.3), ("searching", 0.1)),
+        "browsing": (("focused", 0.3), ("browsing", 0.6), ("searching", 0.1)),
+        "searching": (("focused", 0.5), ("browsing", 0.4), ("searching", 0.1)),
+    }
+    THINK = {"focused": 3.0, "browsing": 1.0, "searching": 2.0}  # relative mean thinking time
+
+    def __init__(self, seed: int = 0, think: float = 1.0):
+        self.rng = random.Random(seed)
+        self.think = think
+        self.state = "focused"
+        self.categories = list(COMPILED_TREE.children(ROOT))
+        self.category = self.categories[0]
+        self.by_category: Dict[int, List[int]] = {}
+        for leaf in COMPILED_TREE.leaf_ids():
+            self.by_category.setdefault(COMPILED_TREE.category[leaf], []).append(leaf)
+
+    def next(self, session: Session) -> Tuple[str, int, float]:
+        r, acc = self.rng.random(), 0.0
+        for state, p in self.TRANSITIONS[self.state]:
+            acc += p
+            if r < acc:
+                self.state = state
+                break
+        wait = self.rng.expovariate(1.0 / (self.think * self.THINK[self.state]))
+        if session.n_patients > 1 and self.rng.random() < 0.05:
+            return "patient", self.rng.randrange(session.n_patients), wait
+
+        if self.state == "focused":
+            available = session.engine.available()
+            if available:
+                return "modal", self.rng.choice(available), wait
+            self.state = "browsing"
+        if self.state == "browsing":
+            if self.rng.random() < 0.2:
+                self.category = self.rng.choice(self.categories)
+            leaves = self.by_category.get(self.category) or COMPILED_TREE.leaf_ids()
+            return "modal", self.rng.choice(leaves), wait
+        leaves = self.by_category[self.rng.choice(list(self.by_category))]
+        return "search", self.rng.choice(leaves), wait
+
+
+AGENTS = {"random": RandomAgent, "markov": MarkovAgent}
+
+
+def _query_for(path_id: int) -> str:
+    """What a trainee might type for a leaf: the first tokens of its label."""
+    tokens = tokenize(COMPILED_TREE.labels[path_id])
+    return " ".join(tokens[:2]) or COMPILED_TREE.labels[path_id]
+
+
+# ---------- controllers ----------
+class GuiController:
+    """Drives a real Dashboard through the callbacks its widgets invoke."""
+
+    def __init__(self, library: ScenarioLibrary, log_dir: str, clock: VirtualClock):
+        import customtkinter as ctk  # only the GUI soak needs Tk
+        from dashboard import Dashboard
+        self.library = library
+        self.app = ctk.CTk()
+        self.dash = Dashboard(self.app, library, log_dir=log_dir, resume=False, clock=clock)
+        self.dash.run()
+        self.pump()
+
+    @property
+    def session(self) -> Session:
+        return self.dash.session
+
+    def pump(self):
+        self.app.update()
+
+    def settle(self):
+        """Wait until the worker's results have reached the UI, as a trainee would."""
+        while self.dash.worker.pending:
+            time.sleep(0.001)
+            self.app.update()
+
+    def modal(self, path_id: int):
+        chain = []
+        node = path_id
+        while node != ROOT:
+            chain.append(node)
+            node = COMPILED_TREE.parent[node]
+        chain.reverse()
+        self.dash._open_modal_for_category(chain[0])
+        self.pump()
+        for node in chain[1:]:
+            self.dash.modal._on_select(node)
+            self.pump()
+
+    def search(self, path_id: int):
+        entry = self.dash.search_entry
+        entry.delete(0, "end")
+        entry.insert(0, _query_for(path_id))
+        self.dash._on_search_key()
+        self.pump()
+        if path_id in self.dash.search_results:
+            self.dash._submit_search_result(self.dash.search_results.index(path_id))
+        else:
+            self.modal(path_id)  # the query didn't surface it; the trainee browses instead
+
+    def patient(self, patient: int):
+        name = self.dash._patient_names()[patient]
+        self.dash.patient_bar.set(name)
+        self.dash._select_patient(name)
+
+    def next_session(self, name: str, end_first: bool):
+        if end_first:
+            self.dash._end_scenario()
+        self.dash._load_scenario(self.library.info(name).title)
+
+    def counts(self) -> Dict[str, float]:
+        import tkinter
+        widgets = toplevels = 0
+        stack = [self.app]
+        while stack:
+            w = stack.pop()
+            widgets += 1
+            toplevels += isinstance(w, tkinter.Toplevel)
+            stack.extend(w.winfo_children())
+        tk = self.app.tk
+        return {
+            "widgets": widgets,
+            "toplevels": toplevels,
+            "tk_fonts": len(tk.splitlist(tk.call("font", "names"))),
+            "tk_images": len(tk.splitlist(tk.call("image", "names"))),
+            "after_callbacks": len(tk.splitlist(tk.call("after", "info"))),
+            "log_lines": int(self.dash.logger.textbox.index("end-1c").split(".")[0]),
+        }
+
+    def close(self):
+        self.dash._end_scenario()
+        self.dash.close()
+        self.app.destroy()
+
+
+class HeadlessController:
+    """The dashboard's per-action work without Tk: session, event log, snapshot, vitals, search."""
+
+    def __init__(self, library: ScenarioLibrary, log_dir: str, clock: VirtualClock):
+        self.library = library
+        self.log_dir = log_dir
+        self.clock = clock
+        self.search_index = PathSearchIndex()
+        self.session: Session | None = None
+        self.snapshots = None
+        self.vitals = None
+        self.active = 0
+        self.count = 0
+        self.next_session(library.names()[0], end_first=False)
+
+    def pump(self):
+        pass
+
+    def settle(self):
+        pass
+
+    def _submit(self, path_id: int):
+        if self.session.is_over():
+            return
+        self.session.submit(path_id)
+        self.snapshots.write(*self.session.snapshot())
+        now = self.session.elapsed()
+        self.vitals.apply(self.active, path_id, now)
+        self.vitals.step(now)
+        self.vitals.vitals(self.active)
+
+    def modal(self, path_id: int):
+        self._submit(path_id)
+
+    def search(self, path_id: int):
+        self.search_index.search(_query_for(path_id), limit=5)
+        self._submit(path_id)
+
+    def patient(self, patient: int):
+        self.active = patient
+        self.session.select_patient(patient)
+        self.snapshots.write(*self.session.snapshot())
+
+    def next_session(self, name: str, end_first: bool):
+        if self.session is not None:
+            self.session.end()
+            self.snapshots.write(*self.session.snapshot())
+            self.snapshots.close()
+            self.session.close()
+        scenario, index = self.library.load(name)
+        base = os.path.join(self.log_dir, f"{name}-{self.count:06d}")
+        self.count += 1
+        self.session = Session(scenario, index=index, clock=self.clock,
+                               event_log=EventWriter(base + ".events", scenario_id=name))
+        self.session.start()
+        self.snapshots = snapshot.SnapshotWriter(base + snapshot.SUFFIX, self.session.max_snapshot_ints(),
+                                                 scenario_id=name, scenario_digest=scenario_digest(index))
+        self.vitals = VitalsSimulator.from_scenario(scenario)
+        self.active = 0
+
+    def counts(self) -> Dict[str, float]:
+        return {}
+
+    def close(self):
+        self.session.end()
+        self.snapshots.close()
+        self.session.close()
+
+
+# ---------- measurement ----------
+def rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def trend(values: List[float]) -> float:
+    """Growth from first to last sample along the least-squares line."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2.0
+    mean_y = sum(values) / n
+    sxx = sum((x - mean_x) ** 2 for x in range(n))
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    return sxy / sxx * (n - 1)
+
+
+def evaluate(samples: List[Dict[str, float]], warmup: int, max_log_lines: int | None) -> List[str]:
+    """Failure messages for the samples after ``warmup``."""
+    failures = []
+    steady = samples[warmup:]
+    if len(steady) < 3:
+        return ["too few samples after warm-up; run longer or sample more often"]
+    for key, (absolute, relative) in CHECKS.items():
+        values = [s[key] for s in steady if s.get(key) is not None]
+        if len(values) < 3:
+            continue
+        growth = trend(values)
+        allowed = max(absolute, relative * values[0])
+        if growth > allowed + 1e-9:
+            failures.append(f"{key} grows: {values[0]:g} -> {values[-1]:g} "
+                            f"(trend +{growth:.2f}, allowed +{allowed:.2f})")
+    first, last = steady[0]["p50_ms"], steady[-1]["p50_ms"]
+    if last > first * LATENCY_DRIFT and last - first > 0.2:
+        failures.append(f"latency p50 drifts: {first:.2f} ms -> {last:.2f} ms")
+    if max_log_lines is not None:
+        most = max(s.get("log_lines", 0) for s in samples)
+        if most > max_log_lines + 1:
+            failures.append(f"action log holds {most} lines, above its cap of {max_log_lines}")
+    return failures
+
+
+def soak(controller, agent, clock: VirtualClock, hours: float, sample_every: int,
+         use_tracemalloc: bool, warmup: int, seed: int = 0) -> Tuple[List[Dict[str, Any]], Any, Any]:
+    """Run until ``hours`` of simulated time pass; returns (samples, first and last tracemalloc snapshots)."""
+    rng = random.Random(seed)
+    names = controller.library.names()
+    end = clock.now() + hours * 3600.0
+    samples: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+    baseline = last = None
+    actions = sessions = 0
+    perf_counter = time.perf_counter
+
+    while clock.now() < end:
+        session = controller.session
+        if session.is_over() or session.is_completed():
+            sessions += 1
+            controller.next_session(names[sessions % len(names)], end_first=rng.random() < 0.3)
+            continue
+
+        kind, target, wait = agent.next(session)
+        clock.advance(wait)
+        start = perf_counter()
+        getattr(controller, kind)(target)
+        controller.pump()
+        latencies.append((perf_counter() - start) * 1000.0)
+        controller.settle()
+        actions += 1
+
+        if actions % sample_every == 0:
+            latencies.sort()
+            rss = rss_bytes()
+            sample = {
+                "sim_hours": clock.now() / 3600.0,
+                "actions": actions,
+                "sessions": sessions,
+                "rss_mb": rss / MB if rss is not None else None,
+                "p50_ms": _percentile(latencies, 0.50),
+                "p99_ms": _percentile(latencies, 0.99),
+                **controller.counts(),
+            }
+            latencies.clear()
+            if use_tracemalloc:
+                sample["traced_mb"] = tracemalloc.get_traced_memory()[0] / MB
+                if len(samples) == warmup:
+                    baseline = tracemalloc.take_snapshot()
+            samples.append(sample)
+            _print_sample(sample)
+    if use_tracemalloc:
+        last = tracemalloc.take_snapshot()
+    return samples, baseline, last
+
+
+def _print_sample(s: Dict[str, Any]):
+    line = (f"{s['sim_hours']:6.2f} h  {s['actions']:>8} actions  {s['sessions']:>5} sessions  "
+            f"p50 {s['p50_ms']:6.2f} ms  p99 {s['p99_ms']:7.2f} ms")
+    if s.get("rss_mb"):
+        line += f"  rss {s['rss_mb']:7.1f} MB"
+    if "traced_mb" in s:
+        line += f"  traced {s['traced_mb']:6.2f} MB"
+    if "widgets" in s:
+        line += (f"  widgets {s['widgets']} (top {s['toplevels']})  after {s['after_callbacks']}"
+                 f"  log {s['log_lines']}")
+    print(line, flush=True)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Soak the app with simulated trainees and check for leaks.")
+    parser.add_argument("--hours", type=float, default=1.0, help="simulated hours (default %(default)s)")
+    parser.add_argument("--agent", choices=AGENTS, default="markov")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between clicks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-every", type=int, default=250, help="actions between samples")
+    parser.add_argument("--warmup", type=int, default=2, help="samples ignored before checking growth")
+    parser.add_argument("--tracemalloc", action="store_true", help="track Python allocations (slower)")
+    parser.add_argument("--headless", action="store_true", help="skip Tk even if a display is available")
+    parser.add_argument("--scenarios", default="scenarios", help="scenario directory")
+    parser.add_argument("--json", help="write samples and the verdict to this file")
+    args = parser.parse_args(argv)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    library = ScenarioLibrary(args.scenarios)
+    clock = VirtualClock()
+    log_dir = tempfile.mkdtemp(prefix="simucare-soak-")
+    controller = None
+    if not args.headless:
+        try:
+            controller = GuiController(library, log_dir, clock)
+        except Exception as e:  # TclError without a display, ImportError without customtkinter
+            print(f"no GUI ({type(e).__name__}: {e}); running headless", file=sys.stderr)
+    if controller is None:
+        controller = HeadlessController(library, log_dir, clock)
+    agent = AGENTS[args.agent](seed=args.seed, think=args.think)
+
+    started = time.perf_counter()
+    try:
+        samples, baseline, last = soak(controller, agent, clock, args.hours, args.sample_every,
+                                       args.tracemalloc, args.warmup, seed=args.seed)
+    finally:
+        controller.close()
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+    max_lines = controller.dash.logger.max_lines if isinstance(controller, GuiController) else None
+    failures = evaluate(samples, args.warmup, max_lines)
+    print(f"{args.hours:g} simulated hours in {time.perf_counter() - started:.1f} s")
+    if baseline is not None and last is not None:
+        print("largest allocation growth since warm-up:")
+        for stat in last.compare_to(baseline, "lineno")[:10]:
+            if stat.size_diff > 0:
+                print(f"  {stat.size_diff / 1024:+9.1f} KiB  {stat.traceback}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("PASS: no sustained growth")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"samples": samples, "failures": failures}, f, indent=1)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
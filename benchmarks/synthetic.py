@@ -0,0 +1,55 @@
+"""
+Seeded generators for synthetic intervention trees and scenarios.
+
+Trees mimic the shape of TREE (a handful of categories, then actions and
+details with mixed depth) but scale to any number of leaf paths, so the
+benchmarks can exercise the same code at 10 or 100k paths.
+"""
+import random
+from typing import Any, Dict, List
+
+from logic.intervention_tree import CompiledTree
+
+
+def generate_tree(n_leaves: int, seed: int = 0, categories: int = 4,
+                  max_fanout: int = 12) -> Dict[str, Any]:
+    """Nested dict with exactly ``n_leaves`` leaves at depth 3 or 4."""
+    rng = random.Random(seed)
+    tree = {f"Category {c}": {} for c in range(categories)}
+    made = actions = 0
+    while made < n_leaves:
+        node = tree[f"Category {rng.randrange(categories)}"]
+        # category > action > detail, sometimes with a sub-action level
+        for _ in range(rng.randint(1, 2)):
+            node = node.setdefault(f"Action {actions}", {})
+            actions += 1
+        for _ in range(min(rng.randint(1, max_fanout), n_leaves - made)):
+            node[f"Detail {made}"] = {}
+            made += 1
+    return tree
+
+
+def generate_scenario(tree: CompiledTree, n_required: int, n_harmful: int | None = None,
+                      seed: int = 0, steps: int = 0) -> Dict[str, Any]:
+    """
+    Scenario over a compiled synthetic tree. Required and harmful paths are
+    disjoint leaves; ``steps`` adds an ActionHandler step list of that length.
+    """
+    rng = random.Random(seed)
+    leaves = tree.leaf_ids()
+    if n_harmful is None:
+        n_harmful = max(1, n_required // 10)
+    chosen = rng.sample(leaves, min(len(leaves), n_required + n_harmful))
+    required, harmful = chosen[:n_required], chosen[n_required:]
+
+    def labels(pid) -> List[str]:
+        return list(tree.path_of(pid))
+
+    return {
+        "title": f"Synthetic {n_required}",
+        "description": "Generated scenario",
+        "required_paths": [{"path": labels(p), "prompt": f"prompt {i}"} for i, p in enumerate(required)],
+        "harmful_paths": [labels(p) for p in harmful],
+        "steps": [{"expected_path": labels(rng.choice(required)), "on_correct": {"log": "ok"},
+                   "on_wrong": {"log": "no"}} for _ in range(steps)],
+    }
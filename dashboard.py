@@ -1,13 +1,19 @@
 import customtkinter as ctk
-import json, time
+import argparse, datetime, math, os, time
 
 from dashboard_palette import PALETTE
 from logger import ActionLogger
 from modal import SelectionModal
-from logic.intervention_tree import TREE
-from logic.action_handler import ActionHandler
-from logic.scoring import Scoring
-from logic.scenario_engine import ScenarioEngine
+from replay_bar import ReplayBar
+from logic import metrics
+from logic import snapshot
+from logic.event_log import RECORD, RESULTS, EventWriter, map_events, read_header
+from logic.intervention_tree import COMPILED_TREE, ROOT
+from logic.path_search import PathSearchIndex
+from logic.scenario_library import ScenarioLibrary
+from logic.scenario_engine import scenario_digest
+from logic.session import Session
+from logic.worker import Worker
 
 
 ctk.set_appearance_mode("dark")
@@ -17,28 +23,289 @@ ctk.set_default_color_theme("dark-blue")
 class Dashboard(ctk.CTkFrame):
     MIN_WIDTH = 800
     MIN_HEIGHT = 600
-
-    def __init__(self, master, scenario_file, update_interval=1000):
+    SEARCH_RESULTS = 5
+    POLL_INTERVAL = 15  # ms between checks for finished background work
+    REPLAY_FRAME = 33   # ms between replay frames
+
+    def __init__(self, master, library, scenario_name=None, update_interval=1000, log_dir="sessions",
+                 server=None, resume=True, clock=None, replay=None):
+        """
+        :param server: optional (host, port) of a session_server; sessions then run
+                       there and this window is a thin client
+        :param resume: pick up the latest unfinished local session from its snapshot
+        :param clock: clock every local session runs on (default: wall time); the
+                      soak harness passes a VirtualClock
+        :param replay: event log of a recorded session to play back instead of
+                       running a live one
+        """
         super().__init__(master)
         self.master = master
+        self.library = library
+        self.log_dir = log_dir
+        self.server = server
+        self.clock = clock
+        self.session = None
+        # Session work (engine, scoring, event log, snapshots, server requests) runs
+        # in order on this thread; results come back through _poll_worker
+        self.worker = Worker()
+        self._poll_job = None
+        self.snapshots = None  # SnapshotWriter of the local session; worker thread only
+        self.modal = None  # one SelectionModal, reused for every category
+        self.search_index = PathSearchIndex()
+        self.search_results = []
+        self.active_patient = 0
         self.update_interval = update_interval
-        self.time_remaining = 600  # seconds
+        self.time_remaining = Session.DURATION  # seconds, as last shown on the timer
+        self.replay = None
 
         # ----- Load Scenario -----
-        with open(scenario_file) as f:
-            self.scenario = json.load(f)
-
-        # Engine + scoring
-        self.engine = ScenarioEngine(self.scenario)
-        self.engine.start()
-        self.scoring = Scoring(total_required=len(self.scenario.get("required_paths", [])))
-        self.action_handler = ActionHandler(self.scenario)
+        self.scenario_name = scenario_name or library.names()[0]
+        resumable = None
+        if replay is not None:
+            self._new_replay(replay)
+        else:
+            if resume and server is None:
+                resumable = snapshot.find_resumable(log_dir, Session.DURATION, digest_of=self._library_digest)
+            resumable = self._new_session(resumable)
+        self.time_remaining = math.ceil(self.session.time_remaining())
 
         self.start_time = time.time()
 
         self._configure_master()
         self._build_ui()
-        self._start_timer()
+        if self.replay is not None:
+            self._replay_seek(0.0)
+            self._replay_tick()
+        else:
+            self._start_timer()
+        if resumable is not None:
+            self._background(self._read_log_tail, self.event_log_path, self.logger.max_lines,
+                             on_done=lambda records: self._restore_log(resumable[1], records))
+
+        # Main-loop lag probe, only when SIMUCARE_METRICS is set
+        self.lag_probe = None
+        if metrics.RING is not None:
+            self.lag_probe = metrics.LagProbe(self, metrics.RING)
+            self.lag_probe.start()
+
+    def _new_session(self, resumable=None):
+        """
+        :param resumable: (snapshot path, read_snapshot() result) of a session to
+                          resume instead of starting a fresh one
+        :return: ``resumable`` if the session was resumed from it, else None
+        """
+        if resumable is not None:
+            self.scenario_name = resumable[1][0]
+        self.scenario, index = self.library.load(self.scenario_name)
+        self.total_required = index.total_required
+        if self.session is not None:
+            self._background(self._close_session, self.session)
+        self.worker.new_generation()  # results still queued for the old session are dropped
+
+        # Vitals are simulated locally, driven by the session's elapsed time
+        from logic.vitals import VitalsSimulator  # numpy loads with the first session, not at import
+        self.vitals = VitalsSimulator.from_scenario(self.scenario)
+        self.active_patient = 0
+
+        self.points = 0  # required actions so far, for the score trend
+        if self.server is not None:
+            from session_server import RemoteSession  # asyncio stays off local startup
+            # created on the server by start(), on the worker; actions queue up behind it
+            self.session = RemoteSession(*self.server, self.scenario_name)
+            self._background(self.session.start)
+            self.engine = self.scoring = self.action_handler = None
+            self._prompt_at = self.session.elapsed()
+            return None
+
+        # Engine + scoring
+        self.session = Session(self.scenario, index=index, clock=self.clock)
+        self.session.start()
+        if resumable is not None:
+            _, _, _, _, ints, floats = resumable[1]
+            try:
+                self.session.restore(ints, floats)
+                self.active_patient = getattr(self.session.engine, "active", 0)
+                self.points = len(self.session.scoring.completed)
+            except ValueError:
+                # the snapshot does not fit the scenario as it is now; start over
+                resumable = None
+                self.session = Session(self.scenario, index=index, clock=self.clock)
+                self.session.start()
+
+        # Every action is appended to a per-session event log on disk, next to
+        # a snapshot of the session's progress for crash recovery; both files
+        # are opened and written on the worker
+        if resumable is not None:
+            base = resumable[0][:-len(snapshot.SUFFIX)]
+        else:
+            base = os.path.join(self.log_dir, f"{self.scenario_name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        self.event_log_path = base + ".events"
+        self._prompt_at = self.session.elapsed()  # when the current prompt was shown
+        self._background(self._open_session, self.session, base, self.scenario_name)
+        self.engine = self.session.engine
+        self.scoring = self.session.scoring
+        self.action_handler = self.session.action_handler
+        return resumable
+
+    def _library_digest(self, name):
+        """scenario_digest() of a library scenario as it is now, or None if it is gone or invalid."""
+        if name not in self.library.entries:
+            return None
+        try:
+            return scenario_digest(self.library.load(name)[1])
+        except (OSError, ValueError):
+            return None
+
+    def _new_replay(self, path):
+        """Play back the session recorded in event log ``path``; it stays read-only."""
+        _, self.scenario_name, _ = read_header(path)
+        if self.scenario_name not in self.library.entries:
+            raise ValueError(f"{path} was recorded on scenario {self.scenario_name!r}, "
+                             f"which is not in the library")
+        self.scenario, index = self.library.load(self.scenario_name)
+        self.total_required = index.total_required
+        from logic.replay import SessionReplay  # numpy, like the vitals
+        self.replay = SessionReplay(path, self.scenario, index=index)
+        self.replay_speed = 1.0
+        self.replay_playing = False
+        self._replay_wall = time.monotonic()
+        self._replay_seek_to = None  # slider position waiting for the next frame
+        self.event_log_path = path
+
+        # the replay drives its own session and vitals; the timer, vitals label
+        # and trend panel read them exactly as they read a live session
+        self.session = self.replay.session
+        self.vitals = self.replay.vitals
+        self.engine = self.session.engine
+        self.scoring = self.session.scoring
+        self.action_handler = self.session.action_handler
+        self.active_patient = 0
+        self.points = 0
+        self._prompt_at = 0.0
+
+    # ---------- background work ----------
+    def _background(self, fn, *args, on_done=None):
+        """Run ``fn(*args)`` on the worker; ``on_done(result)`` later runs on this thread."""
+        self.worker.submit(fn, *args, on_done=on_done)
+        if self._poll_job is None:
+            self._poll_job = self.after(self.POLL_INTERVAL, self._poll_worker)
+
+    def _poll_worker(self):
+        self._poll_job = None
+        for on_done, value, error in self.worker.poll():
+            if error is not None:
+                self.logger.log([], f"⚠️ Background task failed: {error}")
+            elif on_done is not None:
+                on_done(value)
+        if self.worker.pending:
+            self._poll_job = self.after(self.POLL_INTERVAL, self._poll_worker)
+
+    def _now(self):
+        """Clock time to stamp an action with when it is taken; the server times its own."""
+        return self.session.clock.now() if self.server is None else None
+
+    # The methods below run on the worker thread. They receive the session they
+    # act on, so work queued before a scenario switch still goes to its own session.
+    def _open_session(self, session, base, scenario_name):
+        os.makedirs(self.log_dir, exist_ok=True)
+        session.scoring.event_log = EventWriter(base + ".events", scenario_id=scenario_name)
+        self.snapshots = snapshot.SnapshotWriter(
+            base + snapshot.SUFFIX, session.max_snapshot_ints(), scenario_id=scenario_name,
+            scenario_digest=scenario_digest(session.engine.index)
+        )
+        self._checkpoint(session)
+
+    def _close_session(self, session):
+        if self.snapshots is not None:
+            # the abandoned session is marked ended so it is never offered for resume
+            session.end()
+            self._checkpoint(session)
+            self.snapshots.close()
+            self.snapshots = None
+        session.close()
+
+    def _checkpoint(self, session):
+        if self.snapshots is not None:
+            self.snapshots.write(*session.snapshot())
+            session.scoring.event_log.flush_if_due()
+
+    def _apply_action(self, session, path_id, now):
+        result = session.submit(path_id, now)
+        self._checkpoint(session)
+        return result, session.summary() if session.is_completed() else None
+
+    def _switch_patient(self, session, patient, now):
+        session.select_patient(patient, now)
+        self._checkpoint(session)
+
+    def _finish_session(self, session):
+        # Scenario failed if engine or scoring says harmful selected
+        failed, summary = session.scenario_failed(), session.summary()
+        session.end()
+        self._checkpoint(session)  # an ended session is never resumed
+        session.close()
+        return failed, summary
+
+    def _flush_session(self, session):
+        if self.snapshots is not None and not session.ended:
+            session.scoring.event_log.flush()
+
+    def _flush_due(self, session):
+        # once a second from the timer, so events buffered while idle reach the disk
+        if self.snapshots is not None and not session.ended:
+            session.scoring.event_log.flush_if_due()
+
+    @staticmethod
+    def _read_log_tail(path, n):
+        buffer, count = map_events(path)
+        return [RECORD.unpack_from(buffer, i * RECORD.size) for i in range(max(0, count - n), count)]
+
+    def _restore_log(self, snap, records):
+        """Refill the action log and vitals from the tail of the resumed session's event log."""
+        _, _, _, wall_time, _, floats = snap
+        index = self.session.engine.index
+        rows = index.rows if self.session.n_patients > 1 else [index]
+        required = RESULTS.index("required")
+        points = self.points - sum(1 for r in records if r[3] == required)
+        for timestamp, time_taken, path_id, code, row in records:
+            points += code == required
+            self.trends.add_action(timestamp, points, time_taken)
+            when = datetime.datetime.fromtimestamp(wall_time - (floats[0] - timestamp))
+            if COMPILED_TREE.contains(path_id):
+                patient = max(row - 1, 0) if self.session.n_patients > 1 else 0
+                self.vitals.apply(patient, path_id, timestamp)
+                entry = rows[row].required.get(path_id) or rows[0].required.get(path_id)
+                self.logger.log(list(COMPILED_TREE.path_of(path_id)),
+                                self._result_message(RESULTS[code], entry and entry[1]), when=when)
+        m, s = divmod(self.time_remaining, 60)
+        self.logger.log([], f"Resumed {self.scenario.get('title', 'scenario')} with {m:02d}:{s:02d} left")
+        self._refresh_vitals()
+
+    def _result_message(self, result, prompt):
+        if result == "required":
+            return f"✅ {prompt or 'Action acknowledged.'}"
+        if result == "harmful":
+            return "⚠️ Harmful action selected!"
+        if result == "out_of_order":
+            return "Not yet: complete the earlier steps first."
+        return "No effect."
+
+    def _load_scenario(self, title):
+        """Switch to another scenario from the library and restart the clock."""
+        self.scenario_name = self._scenario_titles[title]
+        self._new_session()
+        self.trends.reset(self.total_required)
+        self.title_label.configure(text=self.scenario.get("title", "Scenario"))
+        self.step_prompt_label.configure(text=self.scenario.get("description", ""))
+        self.logger.log([], f"Loaded scenario: {title}")
+        self._refresh_patient_bar()
+
+        timer_stopped = self.time_remaining == 0
+        self.time_remaining = Session.DURATION
+        self.timer_label.configure(text=self._format_time(self.time_remaining))
+        self._refresh_vitals()
+        if timer_stopped:
+            self._start_timer()
 
     def _configure_master(self):
         self.master.title("SimuCare")
@@ -77,7 +344,17 @@ class Dashboard(ctk.CTkFrame):
             text=self._format_time(self.time_remaining),
             font=ctk.CTkFont(size=22, weight="bold")
         )
-        self.timer_label.grid(row=1, column=0, columnspan=2, pady=(0, 5), sticky="n")
+        self.timer_label.grid(row=1, column=0, padx=(0, 20), pady=(0, 5), sticky="ne")
+
+        # Patient vitals
+        self.vitals_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=ctk.CTkFont(size=18),
+            text_color=PALETTE["fg"]
+        )
+        self.vitals_label.grid(row=1, column=1, padx=(20, 0), pady=(0, 5), sticky="nw")
+        self._refresh_vitals()
 
         # Prompt + categories container
         cat_frame = ctk.CTkFrame(self, fg_color=PALETTE["bg"])
@@ -95,20 +372,54 @@ class Dashboard(ctk.CTkFrame):
         self.step_prompt_label.grid(row=0, column=0, columnspan=4, pady=(0, 8), sticky="n")
 
         # Category buttons
-        categories = list(TREE.keys())
+        categories = COMPILED_TREE.children(ROOT)
         num_cols = 4
-        for i, name in enumerate(categories):
+        for i, node in enumerate(categories):
             r, c = divmod(i, num_cols)
             btn = ctk.CTkButton(
                 cat_frame,
-                text=name,
-                command=lambda n=name: self._open_modal_for_category(n)
+                text=COMPILED_TREE.labels[node],
+                command=lambda n=node: self._open_modal_for_category(n)
             )
             btn.grid(row=r + 1, column=c, padx=4, pady=4, sticky="ew")
             cat_frame.grid_columnconfigure(c, weight=1)
 
+        # Type-ahead search over every intervention path
+        search_row = (len(categories) - 1) // num_cols + 2
+        self.search_entry = ctk.CTkEntry(
+            cat_frame,
+            placeholder_text="Search interventions (e.g. nrb o2)"
+        )
+        self.search_entry.grid(row=search_row, column=0, columnspan=num_cols, padx=4, pady=(8, 4), sticky="ew")
+        self.search_entry.bind("<KeyRelease>", self._on_search_key)
+        self.search_entry.bind("<Return>", lambda e: self._submit_search_result(0))
+
+        # Fixed pool of result buttons, relabelled on each keystroke
+        self.search_buttons = []
+        for i in range(self.SEARCH_RESULTS):
+            btn = ctk.CTkButton(
+                cat_frame,
+                text="",
+                anchor="w",
+                fg_color=PALETTE["highlight"],
+                command=lambda i=i: self._submit_search_result(i)
+            )
+            btn.grid(row=search_row + 1 + i, column=0, columnspan=num_cols, padx=4, pady=1, sticky="ew")
+            btn.grid_remove()
+            self.search_buttons.append(btn)
+
         # Ensure cat_frame rows don't stretch
-        for r in range(len(categories) // num_cols + 2):
+        # Patient switcher, only shown for multi-patient scenarios
+        self.patient_bar = ctk.CTkSegmentedButton(
+            cat_frame,
+            values=[""],
+            command=self._select_patient
+        )
+        self.patient_bar.grid(row=search_row + self.SEARCH_RESULTS + 1, column=0, columnspan=num_cols,
+                              padx=4, pady=(8, 4), sticky="ew")
+        self._refresh_patient_bar()
+
+        for r in range(search_row + self.SEARCH_RESULTS + 2):
             cat_frame.grid_rowconfigure(r, weight=0)
 
         # Action log
@@ -117,28 +428,81 @@ class Dashboard(ctk.CTkFrame):
         log_frame.grid_rowconfigure(0, weight=1)
         log_frame.grid_columnconfigure(0, weight=1)
 
-        self.logger = ActionLogger(log_frame)
+        # Entries that scroll out of the capped textbox are kept in a text log,
+        # written on the worker; a replay's entries are already on disk
+        self.logger = ActionLogger(
+            log_frame,
+            spill_path=None if self.replay is not None else
+            os.path.join(self.log_dir, f"dashboard-{time.strftime('%Y%m%d-%H%M%S')}.log"),
+            background=self._background
+        )
         self.logger.grid(row=0, column=0, sticky="nsew")
 
-        # End Scenario button under the logger, same width
+        # Live vitals, score and response-time trends beside the log; matplotlib
+        # is imported here, when the window is built, not when dashboard is imported
+        from trend_panel import TrendPanel
+        self.trends = TrendPanel(log_frame, sample=self._trend_sample)
+        self.trends.grid(row=0, column=1, padx=(10, 0), sticky="nsew")
+        log_frame.grid_columnconfigure(1, weight=1)
+        self.trends.reset(self.total_required)
+
+        # Adjust main grid row weights so log_frame expands and button stays below
+        self.grid_rowconfigure(3, weight=1)  # log_frame expands
+        self.grid_rowconfigure(4, weight=0)  # button stays fixed
+
+        if self.replay is not None:
+            # Playback controls take the place of the scenario picker and End button
+            self.replay_bar = ReplayBar(self, self.replay.end, on_play=self._replay_play,
+                                        on_speed=self._replay_set_speed, on_seek=self._replay_seek,
+                                        on_jump=self._replay_jump)
+            self.replay_bar.grid(row=4, column=0, columnspan=2, padx=20, pady=(5, 10), sticky="ew")
+            return
+
+        # Scenario picker, titles come from the library index only
+        self._scenario_titles = {
+            self.library.info(name).title: name for name in self.library.names()
+        }
+        self.scenario_menu = ctk.CTkOptionMenu(
+            self,
+            values=list(self._scenario_titles),
+            command=self._load_scenario
+        )
+        self.scenario_menu.set(self.library.info(self.scenario_name).title)
+        self.scenario_menu.grid(row=4, column=0, padx=(20, 5), pady=(5, 10), sticky="ew")
+
+        # End Scenario button under the logger
         self.end_button = ctk.CTkButton(
             self,
             text="End Scenario",
             fg_color=None,  # same color as the other CTkButtons
             command=self._end_scenario
         )
-        self.end_button.grid(row=4, column=0, columnspan=2, padx=20, pady=(5, 10), sticky="ew")
-
-        # Adjust main grid row weights so log_frame expands and button stays below
-        self.grid_rowconfigure(3, weight=1)  # log_frame expands
-        self.grid_rowconfigure(4, weight=0)  # button stays fixed
+        self.end_button.grid(row=4, column=1, padx=(5, 20), pady=(5, 10), sticky="ew")
 
     def _open_modal_for_category(self, category):
-        subtree = TREE.get(category, {})
-        if subtree:
-            SelectionModal(self, tree={category: subtree}, callback=self._on_intervention)
+        if not COMPILED_TREE.is_leaf(category):
+            if self.modal is None:
+                self.modal = SelectionModal(self, callback=self._on_intervention)
+            self.modal.open(category)
         else:
-            self.logger.log([], f"No interventions for {category}")
+            self.logger.log([], f"No interventions for {COMPILED_TREE.labels[category]}")
+
+    def _on_search_key(self, event=None):
+        self.search_results = self.search_index.search(self.search_entry.get(), limit=self.SEARCH_RESULTS)
+        for i, btn in enumerate(self.search_buttons):
+            if i < len(self.search_results):
+                btn.configure(text=" > ".join(COMPILED_TREE.path_of(self.search_results[i])))
+                btn.grid()
+            else:
+                btn.grid_remove()
+
+    def _submit_search_result(self, i):
+        if i >= len(self.search_results):
+            return
+        path_id = self.search_results[i]
+        self.search_entry.delete(0, "end")
+        self._on_search_key()
+        self._on_intervention(path_id)
 
     def _format_time(self, sec):
         m, s = divmod(sec, 60)
@@ -149,33 +513,94 @@ class Dashboard(ctk.CTkFrame):
 
     def _update_timer(self):
         if self.time_remaining > 0:
-            self.time_remaining -= 1
+            # Read the session clock instead of counting ticks, so a stalled
+            # main loop delays the redraw but never skews the time shown
+            remaining = self.session.time_remaining()
+            self.time_remaining = math.ceil(remaining)
             self.timer_label.configure(text=self._format_time(self.time_remaining))
-            self.after(self.update_interval, self._update_timer)
+            self._refresh_vitals()
+            if self.time_remaining == 0:
+                # timed out: the snapshot must not offer a resume
+                self._background(self._checkpoint, self.session)
+            else:
+                self._background(self._flush_due, self.session)
+                # wake just after the displayed second rolls over
+                delay = int((remaining - (self.time_remaining - 1)) * 1000) + 1
+                self.after(min(delay, self.update_interval), self._update_timer)
+
+    def _trend_sample(self):
+        """Latest vitals of the active patient for the trend panel, while the session runs."""
+        if self.replay is not None and not self.replay_playing:
+            return None
+        if self.time_remaining == 0 or self.session.is_over():
+            return None
+        elapsed = self.session.elapsed()
+        return elapsed, self.vitals.step(elapsed)[self.active_patient]
+
+    def _patient_names(self):
+        return [p.get("name", f"Patient {i + 1}") for i, p in enumerate(self.scenario.get("patients", []))]
+
+    def _refresh_patient_bar(self):
+        names = self._patient_names()
+        if len(names) > 1:
+            self.patient_bar.configure(values=names)
+            self.patient_bar.set(names[self.active_patient])
+            self.patient_bar.grid()
+        else:
+            self.patient_bar.grid_remove()
+
+    def _select_patient(self, name):
+        if self.replay is not None:
+            # the replay shows whoever the trainee was treating
+            self.patient_bar.set(self._patient_names()[self.active_patient])
+            return
+        patients = self.scenario.get("patients", [])
+        self.active_patient = self._patient_names().index(name)
+        self._prompt_at = self.session.elapsed()
+        self._background(self._switch_patient, self.session, self.active_patient, self._now())
+        self.step_prompt_label.configure(text=patients[self.active_patient].get("description", ""))
+        self._refresh_vitals()
+
+    @metrics.timed("dashboard.vitals")
+    def _refresh_vitals(self):
+        self.vitals.step(self.session.elapsed())
+        v = self.vitals.vitals(self.active_patient)
+        self.vitals_label.configure(
+            text=f"HR {v['hr']:.0f}   RR {v['rr']:.0f}   BP {v['sbp']:.0f}/{v['dbp']:.0f}   SpO2 {v['spo2']:.0f}%"
+        )
 
     # ---------- New intervention handler ----------
-    def _on_intervention(self, path):
-        if self.time_remaining == 0:
+    @metrics.timed("dashboard.on_intervention")
+    def _on_intervention(self, path_id):
+        if self.replay is not None:
+            self.logger.log([], "Replay: interventions are disabled.")
+            return
+        if self.time_remaining == 0 or self.session.is_over():
             self.logger.log([], "Scenario has ended. No further actions allowed.")
             return
 
-        self.scoring.start_action(path)
-        result = self.engine.process_action(path)
-        self.scoring.record_action(path, result["result"])
+        # Stamp the action now; the worker applies it and _show_result reports back
+        elapsed = self.session.elapsed()
+        response, self._prompt_at = elapsed - self._prompt_at, elapsed
+        self._background(self._apply_action, self.session, path_id, self._now(),
+                         on_done=lambda outcome: self._show_result(path_id, outcome, elapsed, response))
+        if self.vitals.apply(self.active_patient, path_id, elapsed):
+            self._refresh_vitals()
+
+    def _show_result(self, path_id, outcome, elapsed, response):
+        result, summary = outcome
+        path = list(COMPILED_TREE.path_of(path_id))
+        if result["result"] != "expired":
+            self.points += result["result"] == "required"
+            self.trends.add_action(elapsed, self.points, response)
 
         # Update prompt with any follow-up info
         if result["result"] == "required":
-            prompt = result.get("prompt") or "Action acknowledged."
-            self.step_prompt_label.configure(text=prompt)
-            self.logger.log(path, f"✅ {prompt}")
-        elif result["result"] == "harmful":
-            self.logger.log(path, "⚠️ Harmful action selected!")
-        else:
-            self.logger.log(path, "No effect.")
+            self.step_prompt_label.configure(text=result.get("prompt") or "Action acknowledged.")
+        self.logger.log(path, self._result_message(result["result"], result.get("prompt")))
 
         # Scenario end check
-        if self.engine.is_completed():
-            summary = self.scoring.summary()
+        if summary is not None:
             if summary["scenario_failed"]:
                 self.logger.log([], "⚠️ Scenario failed due to harmful actions.")
             else:
@@ -183,17 +608,110 @@ class Dashboard(ctk.CTkFrame):
             self.logger.log([], f"Points: {summary['total_points']}")
 
     def _end_scenario(self):
-        # Scenario failed if engine or scoring says harmful selected
-        if self.engine.scenario_failed() or self.scoring.harmful:
+        # Stop the timer
+        self.time_remaining = 0
+        self._background(self._finish_session, self.session, on_done=self._show_final)
+
+    def _show_final(self, outcome):
+        failed, summary = outcome
+        if failed:
             self.logger.log([], "⚠️ Scenario ended: harmful actions were selected.")
         else:
             self.logger.log([], "✅ Scenario ended by user.")
-
-        summary = self.scoring.summary()
         self.logger.log([], f"Points: {summary['total_points']} / {summary['total_possible']}")
 
-        # Stop the timer
-        self.time_remaining = 0
+    # ---------- replay ----------
+    @metrics.timed("replay.frame")
+    def _replay_tick(self):
+        """
+        One replay frame. However fast playback runs, the labels, vitals and
+        timer are redrawn once per frame and the log gets one batched insert;
+        a step spanning more events than the log shows becomes a seek.
+        """
+        now = time.monotonic()
+        dt, self._replay_wall = now - self._replay_wall, now
+        replay = self.replay
+        if self._replay_seek_to is not None:
+            t, self._replay_seek_to = self._replay_seek_to, None
+            self._replay_show_at(t)
+        elif self.replay_playing:
+            t = min(replay.time + dt * self.replay_speed, replay.end)
+            if replay.position_at(t) - replay.pos > self.logger.max_lines:
+                self._replay_show_at(t)
+            else:
+                for i in replay.advance(t):
+                    self._replay_log(i)
+                    self.trends.add_action(replay.times[i], replay.points[i + 1], replay.taken[i])
+                self._replay_refresh()
+            if t >= replay.end:
+                self.replay_playing = False
+        self.replay_bar.show(replay.time, self.replay_playing)
+        self.after(self.REPLAY_FRAME, self._replay_tick)
+
+    def _replay_show_at(self, t):
+        """Seek the replay and redraw everything it drives from the new position."""
+        replay = self.replay
+        pos = replay.seek(t)
+        self.logger.clear()
+        for i in range(max(0, pos - self.logger.max_lines), pos):
+            self._replay_log(i)
+
+        # refill the trends: every action, and vitals at up to 300 points so far
+        self.trends.clear()
+        for i in range(pos):
+            self.trends.add_action(replay.times[i], replay.points[i + 1], replay.taken[i])
+        import numpy as np  # already loaded by the replay's vitals
+        times = np.arange(0.0, replay.time, max(1.0, replay.time / 300))
+        for s, values in zip(times, self.vitals.trace(times)):
+            before = replay.position_at(s)
+            self.trends.add_vitals(s, values[replay.patient_of(before - 1) if before else 0])
+        self._replay_refresh()
+
+    def _replay_log(self, i):
+        timestamp, _, path_id, code, _ = self.replay.event(i)
+        when = datetime.datetime.fromtimestamp(self.replay.wall_start + timestamp)
+        path = list(COMPILED_TREE.path_of(path_id)) if COMPILED_TREE.contains(path_id) else []
+        self.logger.log(path, self._result_message(RESULTS[code], self.replay.prompt_of(i)), when=when)
+
+    def _replay_refresh(self):
+        replay = self.replay
+        patient = replay.patient_of(replay.pos - 1) if replay.pos else 0
+        if patient != self.active_patient:
+            self.active_patient = patient
+            self._refresh_patient_bar()
+        self.step_prompt_label.configure(text=replay.prompt())
+        self.time_remaining = math.ceil(self.session.time_remaining())
+        self.timer_label.configure(text=self._format_time(self.time_remaining))
+        self._refresh_vitals()
+
+    def _replay_play(self, playing):
+        if playing and self.replay.time >= self.replay.end:
+            self._replay_seek(0.0)
+        self.replay_playing = playing
+        self._replay_wall = time.monotonic()
+
+    def _replay_set_speed(self, speed):
+        self.replay_speed = speed
+
+    def _replay_seek(self, t):
+        # slider drags arrive faster than frames; only the latest is shown
+        self._replay_seek_to = t
+
+    def _replay_jump(self, where):
+        if where == "start":
+            self._replay_seek(0.0)
+            return
+        t = self.replay.find(where, self.replay.time)
+        if t is None:
+            self.logger.log([], f"No {where} actions after this point.")
+            return
+        self.replay_playing = False  # stop on it for review
+        self._replay_seek(t)
+
+    def close(self):
+        """Write out buffered session data and wait for queued work; call before exiting."""
+        self.worker.submit(self._flush_session, self.session)
+        self.worker.close()
 
     def run(self):
         self.start_time = time.time()
@@ -205,6 +723,26 @@ if __name__ == "__main__":
     app.grid_rowconfigure(0, weight=1)
     app.grid_columnconfigure(0, weight=1)
 
-    dash = Dashboard(app, scenario_file="scenarios/medical_sample.json")
+    parser = argparse.ArgumentParser(description="SimuCare EMT training simulator")
+    parser.add_argument("scenario", nargs="?", default="medical_sample")
+    parser.add_argument("--server", help="host:port of a session_server to run sessions on")
+    parser.add_argument("--fresh", action="store_true", help="don't resume an unfinished session")
+    parser.add_argument("--replay", metavar="EVENTS", help="play back a recorded session's .events log")
+    args = parser.parse_args()
+    server = None
+    if args.server:
+        host, port = args.server.rsplit(":", 1)
+        server = (host, int(port))
+
+    library = ScenarioLibrary("scenarios")
+    dash = Dashboard(app, library, scenario_name=args.scenario, server=server, resume=not args.fresh,
+                     replay=args.replay)
     dash.run()
     app.mainloop()
+    dash.close()
+
+    if metrics.RING is not None:
+        os.makedirs(dash.log_dir, exist_ok=True)
+        path = metrics.export_path(dash.log_dir)
+        metrics.RING.export(path)
+        print(f"Wrote metrics to {path}")
@@ -1,9 +1,20 @@
+import collections
 import datetime
+import os
 import customtkinter as ctk
 from dashboard_palette import PALETTE
+from logic import metrics
 
 class ActionLogger(ctk.CTkFrame):
-    def __init__(self, master, width=400, height=200):
+    def __init__(self, master, width=400, height=200, max_lines=500, spill_path=None, background=None):
+        """
+        :param max_lines: most entries kept in the textbox; older ones are dropped from view
+        :param spill_path: optional text file that receives every entry once it leaves
+                           the visible buffer (and the rest on destroy)
+        :param background: runs ``fn(*args)`` off the UI thread in submission order,
+                           e.g. Worker.submit; the spill file is opened and written
+                           through it (default: inline)
+        """
         super().__init__(master, fg_color=PALETTE['bg'], corner_radius=8,
                          border_width=1, border_color=PALETTE['accent'])
         # Configure sizing
@@ -27,20 +38,86 @@ class ActionLogger(ctk.CTkFrame):
         self.textbox.grid(row=0, column=0, padx=8, pady=8, sticky='nsew')
         self.textbox.configure(state='disabled')
 
-    def log(self, path, result):
+        # Ring buffer mirroring the textbox contents, plus entries waiting for the next frame
+        self.max_lines = max_lines
+        self.lines = collections.deque()
+        self._pending = []
+        self._flush_scheduled = False
+        self.spill_path = spill_path
+        self._spill = None  # opened on the first spill, by whoever runs the writes
+        self._background = background or (lambda fn, *args: fn(*args))
+
+    def log(self, path, result, when=None):
         """
-        Append a timestamped entry to the read-only textbox.
+        Queue a timestamped entry; queued entries are drawn together on the next idle frame.
         :param path: list of strings, the chosen intervention path
         :param result: string, e.g. 'Correct' or 'Wrong'
+        :param when: datetime to stamp the entry with, for restored entries (default now)
         """
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        entry = f"[{timestamp}] {path} → {result}\n"
-        # Enable, insert, then disable again
+        timestamp = (when or datetime.datetime.now()).strftime("%H:%M:%S")
+        self._pending.append(f"[{timestamp}] {path} → {result}\n")
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.after_idle(self._flush)
+
+    @metrics.timed("logger.render")
+    def _flush(self):
+        self._flush_scheduled = False
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Entries that won't fit go straight to the spill file
+        if len(batch) > self.max_lines:
+            self._spill_lines(batch[:-self.max_lines])
+            batch = batch[-self.max_lines:]
+
+        evicted = [self.lines.popleft() for _ in range(len(self.lines) + len(batch) - self.max_lines)]
+        self._spill_lines(evicted)
+        self.lines.extend(batch)
+
+        # One enable/insert/trim/disable per frame instead of per entry
         self.textbox.configure(state='normal')
-        self.textbox.insert('end', entry)
+        self.textbox.insert('end', ''.join(batch))
+        if evicted:
+            # entries with newlines in their text span several textbox lines
+            rows = sum(entry.count('\n') for entry in evicted)
+            self.textbox.delete('1.0', f'{rows + 1}.0')
         self.textbox.see('end')
         self.textbox.configure(state='disabled')
 
+    def clear(self):
+        """Empty the log without spilling, e.g. when a replay seeks to another moment."""
+        self._pending = []
+        self.lines.clear()
+        self.textbox.configure(state='normal')
+        self.textbox.delete('1.0', 'end')
+        self.textbox.configure(state='disabled')
+
+    def _spill_lines(self, lines):
+        if self.spill_path is not None and lines:
+            self._background(self._write_spill, self.spill_path, list(lines))
+
+    def _write_spill(self, path, lines):
+        # runs through ``background``
+        if self._spill is None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._spill = open(path, 'a', encoding='utf-8')
+        self._spill.writelines(lines)
+
+    def _close_spill(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def destroy(self):
+        if self.spill_path is not None:
+            self._spill_lines(self.lines)
+            self._spill_lines(self._pending)
+            self._background(self._close_spill)
+            self.spill_path = None
+        super().destroy()
+
 
 if __name__ == '__main__':
     ctk.set_appearance_mode("dark")
@@ -0,0 +1,45 @@
+"""
+GUI-free core of SimuCare: intervention tree, scenario engine, scoring,
+sessions and the headless tools built on them.
+
+Nothing in this package imports Tk, so grading workers and tooling run
+without a display. The names below are imported from their submodules on
+first access, so ``from logic import Session`` loads only what a session
+needs; numpy is only loaded by logic.vitals and logic.analytics.
+"""
+import importlib
+
+_EXPORTS = {
+    "COMPILED_TREE": "logic.intervention_tree",
+    "CompiledTree": "logic.intervention_tree",
+    "Clock": "logic.clock",
+    "VirtualClock": "logic.clock",
+    "ScenarioIndex": "logic.scenario_engine",
+    "compile_scenario": "logic.scenario_engine",
+    "create_engine": "logic.scenario_engine",
+    "Scoring": "logic.scoring",
+    "ActionHandler": "logic.action_handler",
+    "Session": "logic.session",
+    "EventWriter": "logic.event_log",
+    "SessionReplay": "logic.replay",
+    "iter_events": "logic.event_log",
+    "ScenarioLibrary": "logic.scenario_library",
+    "PathSearchIndex": "logic.path_search",
+    "VitalsSimulator": "logic.vitals",
+    "CohortStore": "logic.analytics",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'logic' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
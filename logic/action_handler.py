@@ -1,29 +1,33 @@
 from typing import List, Tuple, Dict, Any
 
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
 class ActionHandler:
     """
     Validates user-selected intervention paths against the current scenario steps.
     Uses expected_path from scenario JSON to determine correctness.
     """
+    __slots__ = ("steps", "current_step", "_expected")
 
-    def __init__(self, scenario: Dict[str, Any]):
+    def __init__(self, scenario: Dict[str, Any], tree: CompiledTree = COMPILED_TREE):
         self.steps = scenario.get("steps", [])
         self.current_step = 0
+        # expected_path resolved to path ids once; None if it is not in the tree
+        self._expected: List[int | None] = [tree.get_id(step["expected_path"]) for step in self.steps]
 
-    def validate(self, selected_path: List[str]) -> Tuple[str, str, Dict[str, int]]:
+    def validate(self, selected_path: int) -> Tuple[str, str]:
         """
         Validate the user's choice for the current step.
 
-        :param selected_path: full path list from TREE, e.g. ["Meds","Epinephrine","0.3mg_IM"]
+        :param selected_path: path id from COMPILED_TREE
         :returns: (result, feedback_log)
         """
         if self.current_step >= len(self.steps):
             raise IndexError("No more steps in scenario.")
 
         step = self.steps[self.current_step]
-        expected = step["expected_path"]
 
-        if selected_path == expected:
+        if selected_path == self._expected[self.current_step]:
             outcome = step.get("on_correct", {})
             result = "correct"
         else:
@@ -0,0 +1,265 @@
+"""
+Columnar cohort analytics over session event logs.
+
+Event logs (logic.event_log) from many sessions are ingested into a store
+directory holding one raw little-endian file per column plus meta.json:
+
+    timestamp   f8   seconds since the session started
+    time_taken  f8   response time of the action
+    path_id     i4   -1 for paths no longer in the tree
+    result      u1   code into event_log.RESULTS
+    patient     u2   patient row
+    session     u4   index into meta["sessions"]
+    scenario    u2   index into meta["scenarios"]
+
+Columns are opened with np.memmap, so queries over millions of actions touch
+only the columns they need and never parse anything. Ingest appends to the
+column files and then rewrites meta.json; the row count in meta.json is
+authoritative, so rows past it from an interrupted ingest are dropped on the
+next one. A log that has grown since it was last ingested contributes only
+its new records.
+
+Path ids only mean something against the tree a log was written with. Logs
+whose header carries another tree's fingerprint are skipped (listed in
+``skipped``); version 1 logs carry none, so their ids are kept where they
+exist in the current tree and stored as -1 otherwise.
+
+Usage:
+    python -m logic.analytics ingest sessions/*.events --store analytics
+    python -m logic.analytics report --store analytics
+"""
+from typing import Any, Dict, Iterable, List, Sequence
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from logic.event_log import RESULT_CODES, RESULTS, map_events, read_header
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
+META_FILE = "meta.json"
+STORE_VERSION = 1
+
+# matches event_log.RECORD ("<ddiBxH"), so a mapped log is viewed without copying
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("time_taken", "<f8"), ("path_id", "<i4"),
+                         ("result", "u1"), ("pad", "u1"), ("patient", "<u2")])
+COLUMNS = {
+    "timestamp": np.dtype("<f8"),
+    "time_taken": np.dtype("<f8"),
+    "path_id": np.dtype("<i4"),
+    "result": np.dtype("u1"),
+    "patient": np.dtype("<u2"),
+    "session": np.dtype("<u4"),
+    "scenario": np.dtype("<u2"),
+}
+REQUIRED = RESULT_CODES["required"]
+HARMFUL = RESULT_CODES["harmful"]
+
+
+class CohortStore:
+    def __init__(self, directory: str, tree: CompiledTree = COMPILED_TREE):
+        self.directory = directory
+        self.tree = tree
+        self.meta = self._read_meta()
+        self._columns: Dict[str, np.ndarray] = {}
+        self.skipped: List[str] = []  # logs the last ingest left out, written against another tree
+
+    # ---------- storage ----------
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.directory, META_FILE)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return {"version": STORE_VERSION, "rows": 0, "scenarios": [], "sessions": []}
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported analytics store version in {self.directory}")
+        return meta
+
+    def _write_meta(self):
+        path = os.path.join(self.directory, META_FILE)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, path)
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.directory, name + ".col")
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memory map of one column (empty array for an empty store)."""
+        col = self._columns.get(name)
+        if col is None:
+            rows = self.meta["rows"]
+            if rows == 0:
+                col = np.empty(0, dtype=COLUMNS[name])
+            else:
+                col = np.memmap(self._column_path(name), dtype=COLUMNS[name], mode="r", shape=(rows,))
+            self._columns[name] = col
+        return col
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    # ---------- ingest ----------
+    def ingest(self, paths: Iterable[str]) -> int:
+        """Append new records from event logs; returns the number of rows added."""
+        os.makedirs(self.directory, exist_ok=True)
+        sessions = {s["path"]: i for i, s in enumerate(self.meta["sessions"])}
+        scenarios = {name: i for i, name in enumerate(self.meta["scenarios"])}
+
+        batches: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+        added = 0
+        self.skipped = []
+        for path in paths:
+            key = os.path.abspath(path)
+            _, scenario_id, fingerprint = read_header(path)
+            if fingerprint is not None and fingerprint != self.tree.fingerprint:
+                self.skipped.append(path)
+                continue
+            buffer, count = map_events(path)
+            index = sessions.get(key)
+            if index is None:
+                index = sessions[key] = len(self.meta["sessions"])
+                if scenario_id not in scenarios:
+                    scenarios[scenario_id] = len(self.meta["scenarios"])
+                    self.meta["scenarios"].append(scenario_id)
+                self.meta["sessions"].append({"path": key, "scenario": scenarios[scenario_id],
+                                              "records": 0})
+            entry = self.meta["sessions"][index]
+            if count <= entry["records"]:
+                continue
+
+            records = np.frombuffer(buffer, dtype=RECORD_DTYPE, count=count)[entry["records"]:]
+            n = len(records)
+            for name in ("timestamp", "time_taken", "path_id", "result", "patient"):
+                batches[name].append(np.ascontiguousarray(records[name], dtype=COLUMNS[name]))
+            if fingerprint is None:
+                ids = batches["path_id"][-1]
+                ids[(ids < 0) | (ids >= len(self.tree))] = -1
+            batches["session"].append(np.full(n, index, dtype=COLUMNS["session"]))
+            batches["scenario"].append(np.full(n, entry["scenario"], dtype=COLUMNS["scenario"]))
+            entry["records"] = count
+            added += n
+
+        if added:
+            rows = self.meta["rows"]
+            for name, dtype in COLUMNS.items():
+                with open(self._column_path(name), "ab") as f:
+                    f.truncate(rows * dtype.itemsize)  # drop rows from an interrupted ingest
+                    f.seek(rows * dtype.itemsize)
+                    for chunk in batches[name]:
+                        f.write(chunk.tobytes())
+            self.meta["rows"] = rows + added
+        self._write_meta()
+        self._columns.clear()
+        return added
+
+    # ---------- queries ----------
+    def _mask(self, scenario: str | None) -> np.ndarray | slice:
+        if scenario is None:
+            return slice(None)
+        if scenario not in self.meta["scenarios"]:
+            raise KeyError(scenario)
+        return self.column("scenario") == self.meta["scenarios"].index(scenario)
+
+    def most_missed(self, top: int = 10, scenario: str | None = None) -> List[Dict[str, Any]]:
+        """
+        Interventions most often chosen harmfully, as dicts with path, harmful,
+        out_of_order, unknown, total and rate (harmful / total), worst first.
+        "unknown" is kept apart because re-clicking a completed step also
+        returns it, so it says little about a wrong choice on its own.
+        """
+        mask = self._mask(scenario)
+        path_id = self.column("path_id")[mask]
+        known = path_id >= 0
+        path_id = path_id[known]
+        result = self.column("result")[mask][known]
+
+        size = len(self.tree)
+        totals = np.bincount(path_id, minlength=size)
+        counts = {name: np.bincount(path_id, weights=result == RESULT_CODES[name],
+                                    minlength=size).astype(np.int64)
+                  for name in ("harmful", "out_of_order", "unknown")}
+        harmful = counts["harmful"]
+        order = np.argsort(harmful, kind="stable")[::-1][:top]
+        return [{"path": list(self.tree.path_of(int(p))),
+                 **{name: int(c[p]) for name, c in counts.items()},
+                 "total": int(totals[p]), "rate": float(harmful[p] / totals[p])}
+                for p in order if harmful[p]]
+
+    def response_percentiles(self, percentiles: Sequence[float] = (50, 90, 99),
+                             scenario: str | None = None) -> Dict[str, Dict[str, float]]:
+        """Response-time percentiles per TREE category, e.g. {"Scene": {"count": 812, "p50": 3.1, ...}}."""
+        mask = self._mask(scenario)
+        path_id = self.column("path_id")[mask]
+        known = path_id >= 0
+        categories = np.asarray(self.tree.category, dtype=np.int64)[path_id[known]]
+        times = self.column("time_taken")[mask][known]
+
+        # a handful of categories: one boolean pass and one O(n) selection each, no full sort
+        counts = np.bincount(categories, minlength=len(self.tree))
+        out = {}
+        for g in np.flatnonzero(counts):
+            values = np.percentile(times[categories == g], percentiles, method="inverted_cdf")
+            stats = {"count": int(counts[g])}
+            stats.update({f"p{p:g}": float(v) for p, v in zip(percentiles, values)})
+            out[self.tree.labels[g]] = stats
+        return out
+
+    def failure_rates(self) -> Dict[str, Dict[str, float]]:
+        """Per scenario: sessions, sessions failed by a harmful action, and the failure rate."""
+        n_sessions = len(self.meta["sessions"])
+        session_scenario = np.array([s["scenario"] for s in self.meta["sessions"]], dtype=np.int64)
+        harmful = np.bincount(self.column("session"), weights=self.column("result") == HARMFUL,
+                              minlength=n_sessions) > 0
+        n_scenarios = len(self.meta["scenarios"])
+        total = np.bincount(session_scenario, minlength=n_scenarios)
+        failed = np.bincount(session_scenario, weights=harmful, minlength=n_scenarios)
+        return {name: {"sessions": int(total[i]), "failed": int(failed[i]),
+                       "rate": float(failed[i] / total[i]) if total[i] else 0.0}
+                for i, name in enumerate(self.meta["scenarios"])}
+
+    def result_counts(self, scenario: str | None = None) -> Dict[str, int]:
+        counts = np.bincount(self.column("result")[self._mask(scenario)], minlength=len(RESULTS))
+        return {name: int(counts[code]) for code, name in enumerate(RESULTS)}
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description="Cohort analytics over SimuCare session logs.")
+    parser.add_argument("--store", default="analytics", help="store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="add event logs to the store")
+    ingest.add_argument("logs", nargs="+", help=".events files or directories of them")
+    report = sub.add_parser("report", help="print the standard instructor report")
+    report.add_argument("--scenario", help="limit to one scenario id")
+    report.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    store = CohortStore(args.store)
+    if args.command == "ingest":
+        paths = []
+        for p in args.logs:
+            if os.path.isdir(p):
+                paths += sorted(os.path.join(p, f) for f in os.listdir(p) if f.endswith(".events"))
+            else:
+                paths.append(p)
+        added = store.ingest(paths)
+        print(f"Ingested {added} actions; store has {len(store)} from "
+              f"{len(store.meta['sessions'])} sessions.")
+        for path in store.skipped:
+            print(f"Skipped {path}: recorded against a different intervention tree", file=sys.stderr)
+        return
+
+    print(json.dumps({
+        "actions": len(store),
+        "results": store.result_counts(args.scenario),
+        "most_missed": store.most_missed(args.top, args.scenario),
+        "response_time_by_category": store.response_percentiles(scenario=args.scenario),
+        "failure_rates": store.failure_rates(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
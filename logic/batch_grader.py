@@ -0,0 +1,179 @@
+"""
+Headless re-grading of recorded sessions.
+
+Input is JSONL, one recorded session per line:
+    {"session_id": "...", "actions": [{"path": [...], "t": 12.5}, ...]}
+
+Each action's ``path`` is either a label list from TREE or a path id; ``t`` is
+the optional recorded time in seconds since the session started, replayed on a
+VirtualClock (actions past the scenario duration are rejected just as the
+dashboard rejects them). In multi-patient scenarios an action may carry
+``"patient": n`` to switch the active patient before it is applied. Label paths that no longer exist in
+the tree replay as "unknown" actions. Output is JSONL, one
+``{"session_id": ..., **Session.summary()}`` per input line, in input order;
+a line that cannot be replayed (malformed JSON or actions, a patient the
+scenario does not have) gives ``{"session_id": ..., "error": "..."}`` instead.
+
+Usage:
+    python -m logic.batch_grader scenarios/medical_sample.json sessions.jsonl -o results.jsonl -j 8
+"""
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+import argparse
+import collections
+import json
+import os
+import sys
+
+from logic.clock import VirtualClock
+from logic.intervention_tree import COMPILED_TREE
+from logic.scenario_engine import compile_scenario
+from logic.session import Session
+
+UNKNOWN_PATH = -1
+
+# per-worker state, set once by _init_worker so chunks only carry session lines
+_scenario: Dict[str, Any] | None = None
+_index = None
+
+
+def replay_session(scenario: Dict[str, Any], actions: Iterable[Dict[str, Any]],
+                   index=None) -> Dict[str, Any]:
+    """
+    Replay one recorded action stream and return its summary().
+    Raises ValueError on an action it cannot replay.
+    """
+    clock = VirtualClock()
+    session = Session(scenario, index=index, clock=clock)
+    session.start()
+    for k, action in enumerate(actions):
+        path, t, patient = _parse_action(k, action, session.n_patients)
+        if t is not None:
+            clock.set(t)
+        if patient is not None:
+            session.select_patient(patient)
+        session.submit(path)
+    return session.summary()
+
+
+def _parse_action(k: int, action: Any, n_patients: int):
+    """(path id, time or None, patient or None) of action ``k``; ValueError if malformed."""
+    if not isinstance(action, dict) or "path" not in action:
+        raise ValueError(f"action {k}: must be an object with a \"path\"")
+    path = action["path"]
+    if isinstance(path, list) and all(isinstance(label, str) for label in path):
+        path = COMPILED_TREE.get_id(path, UNKNOWN_PATH)
+    elif not isinstance(path, int) or isinstance(path, bool):
+        raise ValueError(f"action {k}: path must be a label list or a path id")
+    t = action.get("t")
+    if t is not None and (not isinstance(t, (int, float)) or isinstance(t, bool)):
+        raise ValueError(f"action {k}: t must be a number")
+    patient = action.get("patient")
+    if patient is not None:
+        if n_patients == 1:
+            raise ValueError(f"action {k}: patient given for a single-patient scenario")
+        if not isinstance(patient, int) or isinstance(patient, bool) or not 0 <= patient < n_patients:
+            raise ValueError(f"action {k}: no patient {patient!r} (scenario has {n_patients})")
+    return path, t, patient
+
+
+def _init_worker(scenario: Dict[str, Any]):
+    global _scenario, _index
+    _scenario = scenario
+    _index = compile_scenario(scenario)
+
+
+def _grade_chunk(lines: List[str]) -> List[str]:
+    out = []
+    for line in lines:
+        # a bad line is reported in its own record instead of failing the chunk
+        session_id = None
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("session must be a JSON object")
+            session_id = record.get("session_id")
+            actions = record.get("actions", [])
+            if not isinstance(actions, list):
+                raise ValueError("actions must be a list")
+            summary = replay_session(_scenario, actions, _index)
+        except ValueError as e:
+            out.append(json.dumps({"session_id": session_id, "error": str(e)}))
+            continue
+        out.append(json.dumps({"session_id": session_id, **summary}))
+    return out
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = (line for line in lines if line.strip())
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def grade_sessions(scenario: Dict[str, Any], sessions: Iterable[str], out,
+                   workers: int | None = None, chunk_size: int = 256) -> int:
+    """
+    Grade JSONL session lines across a process pool and stream results to ``out``.
+
+    At most ``2 * workers`` chunks are in flight, so memory stays bounded no
+    matter how many sessions are read. Returns the number of sessions graded.
+
+    :param workers: pool size; defaults to os.cpu_count(). 1 grades in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    graded = 0
+    if workers == 1:
+        _init_worker(scenario)
+        for chunk in _chunks(sessions, chunk_size):
+            for line in _grade_chunk(chunk):
+                out.write(line + "\n")
+                graded += 1
+        return graded
+
+    from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing; pool runs only
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(scenario,)) as pool:
+        pending = collections.deque()
+        for chunk in _chunks(sessions, chunk_size):
+            pending.append(pool.submit(_grade_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                graded += _drain(pending.popleft(), out)
+        while pending:
+            graded += _drain(pending.popleft(), out)
+    return graded
+
+
+def _drain(future, out) -> int:
+    lines = future.result()
+    out.writelines(line + "\n" for line in lines)
+    return len(lines)
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description="Re-grade recorded SimuCare sessions.")
+    parser.add_argument("scenario", help="scenario JSON file")
+    parser.add_argument("sessions", help="recorded sessions, JSONL")
+    parser.add_argument("-o", "--output", default="-", help="results JSONL (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    with open(args.scenario) as f:
+        scenario = json.load(f)
+
+    out = open(args.output, "w") if args.output != "-" else None
+    try:
+        with open(args.sessions) as sessions:
+            graded = grade_sessions(scenario, sessions, out or sys.stdout,
+                                    workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        if out:
+            out.close()
+    print(f"Graded {graded} sessions.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
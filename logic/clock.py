@@ -0,0 +1,51 @@
+"""
+Session clocks.
+
+One Clock is shared by a session's engine, scoring and timer display so they
+all agree. Clock reads time.monotonic(), which NTP adjustments don't move;
+VirtualClock only moves when told to, so headless runs can play a whole
+10-minute scenario instantly.
+"""
+import time
+
+
+class Clock:
+    """Monotonic clock measuring elapsed time since start()."""
+    __slots__ = ("origin",)
+
+    def __init__(self):
+        self.origin: float | None = None
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def start(self):
+        self.origin = self.now()
+
+    def elapsed(self) -> float:
+        """Seconds since start(), or 0.0 if not started."""
+        return self.now() - self.origin if self.origin is not None else 0.0
+
+    def resume(self, elapsed: float):
+        """Start as if ``elapsed`` seconds had already passed, e.g. after restoring a snapshot."""
+        self.origin = self.now() - elapsed
+
+
+class VirtualClock(Clock):
+    """Clock whose time only changes through advance() or set()."""
+    __slots__ = ("_now",)
+
+    def __init__(self, start: float = 0.0):
+        super().__init__()
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float):
+        self._now += seconds
+
+    def set(self, now: float):
+        """Jump to an absolute time; going backwards is ignored."""
+        if now > self._now:
+            self._now = now
@@ -0,0 +1,145 @@
+"""
+Append-only binary log of session action events.
+
+Layout: a 64-byte header followed by fixed-size 24-byte records, so record
+``i`` lives at ``HEADER.size + i * RECORD.size`` and a reader can stream the
+file in chunks or memory-map it and index records directly.
+
+    header: magic b"SCEV", u16 version, u16 record size, 36-byte scenario id (utf-8, NUL padded),
+            20-byte sha1 of the intervention tree (CompiledTree.fingerprint)
+    record: f64 timestamp, f64 time_taken, i32 path id, u8 result code, 1 pad byte,
+            u16 patient row (0 for single-patient scenarios)
+
+Path ids are positions in the compiled tree, so they only mean something
+against the tree the log was written with; readers compare the fingerprint
+before trusting them. Version 1 logs used all 56 bytes for the scenario id
+and carry no fingerprint.
+"""
+from typing import Iterator, Tuple
+import mmap
+import os
+import struct
+import time
+
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
+MAGIC = b"SCEV"
+VERSION = 2
+HEADER = struct.Struct("<4sHH36s20s")
+HEADER_V1 = struct.Struct("<4sHH56s")
+RECORD = struct.Struct("<ddiBxH")
+
+RESULTS = ("required", "harmful", "unknown", "out_of_order")
+RESULT_CODES = {name: code for code, name in enumerate(RESULTS)}
+
+
+class EventWriter:
+    """
+    Buffered writer for one session's event log.
+
+    Records accumulate in memory and are flushed every ``flush_every`` events
+    or ``flush_interval`` seconds, whichever comes first, so at most that many
+    events are lost on a crash and memory use stays constant. The interval is
+    checked on each append and on flush_if_due(), which the owner calls
+    periodically so an idle session's buffer is written out too.
+    """
+
+    def __init__(self, path: str, scenario_id: str = "", flush_every: int = 64,
+                 flush_interval: float = 1.0, tree: CompiledTree = COMPILED_TREE):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new_file:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, scenario_id.encode()[:36],
+                                         bytes.fromhex(tree.fingerprint)))
+            self._file.flush()
+
+    def append(self, timestamp: float, path_id: int, result: str, time_taken: float,
+               patient: int = 0):
+        self._buffer += RECORD.pack(timestamp, time_taken, path_id, RESULT_CODES[result], patient)
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flush buffered records if ``flush_interval`` has passed since the last flush."""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+            self._pending = 0
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(path: str) -> Tuple[int, str, str | None]:
+    """
+    Return (version, scenario_id, tree fingerprint) of an event log; the
+    fingerprint is None for version 1 logs. Raises ValueError if it is not one.
+    """
+    with open(path, "rb") as f:
+        raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"Truncated event log header: {path}")
+    magic, version, record_size, scenario_id, digest = HEADER.unpack(raw)
+    if magic != MAGIC or record_size != RECORD.size or version not in (1, VERSION):
+        raise ValueError(f"Not a SimuCare event log: {path}")
+    if version == 1:
+        _, _, _, scenario_id = HEADER_V1.unpack(raw)
+        return version, scenario_id.rstrip(b"\0").decode(), None
+    return version, scenario_id.rstrip(b"\0").decode(), digest.hex()
+
+
+def iter_events(path: str, chunk_records: int = 4096) -> Iterator[Tuple[float, float, int, int, int]]:
+    """
+    Stream (timestamp, time_taken, path_id, result_code, patient) tuples from a log.
+    A trailing partial record from an interrupted write is ignored.
+    """
+    read_header(path)
+    chunk = chunk_records * RECORD.size
+    with open(path, "rb") as f:
+        f.seek(HEADER.size)
+        while True:
+            data = f.read(chunk)
+            usable = len(data) - len(data) % RECORD.size
+            if usable:
+                yield from RECORD.iter_unpack(data[:usable])
+            if len(data) < chunk:
+                return
+
+
+def map_events(path: str) -> Tuple[memoryview, int]:
+    """
+    Memory-map the record section of a log; returns (buffer, record count).
+    Record ``i`` is ``RECORD.unpack_from(buffer, i * RECORD.size)``.
+    """
+    read_header(path)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        count = (size - HEADER.size) // RECORD.size
+        if count == 0:
+            return memoryview(b""), 0
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm)[HEADER.size:HEADER.size + count * RECORD.size], count
@@ -1,7 +1,14 @@
 """
 Global intervention tree defining category → action → detail structure.
 Aligned with NREMT patient assessment model.
+
+TREE is compiled at import time into COMPILED_TREE, a flat node table in which
+every path has a stable integer id. The rest of the app passes those ids around
+instead of lists of labels.
 """
+from array import array
+from collections import deque
+from typing import Dict, Any, List, Tuple
 
 TREE = {
     "Scene": {
@@ -93,7 +100,7 @@ TREE = {
             "MDI": {}
         },
         "Aspirin": {
-            "160-325 mg"
+            "160-325 mg": {}
         },
         "Nitroglycerin": {
             "0.4 mg pill/spray": {},
@@ -114,3 +121,91 @@ TREE = {
         }
     },
 }
+
+
+ROOT = 0
+
+
+class CompiledTree:
+    """
+    Flat, array-backed node table built from a nested tree dict.
+
+    Nodes are numbered breadth-first from the root (id 0), so the children of
+    node ``i`` occupy the contiguous id range ``[child_start[i], child_end[i])``.
+    A node's id doubles as the stable id of the path leading to it.
+    """
+
+    def __init__(self, tree: Dict[str, Any]):
+        self.labels: List[str] = [""]
+        self.parent = array("i", [-1])
+        self.depth = array("i", [0])
+        self.category = array("i", [ROOT])  # top-level ancestor of each node
+        self.child_start = array("i")
+        self.child_end = array("i")
+        self.paths: List[Tuple[str, ...]] = [()]
+        self._index: Dict[Tuple[str, ...], int] = {}
+
+        queue = deque([(ROOT, tree)])
+        while queue:
+            node, subtree = queue.popleft()
+            if not isinstance(subtree, dict):
+                raise TypeError(
+                    f"Malformed tree node {list(self.paths[node])}: "
+                    f"expected dict, got {type(subtree).__name__}"
+                )
+            self.child_start.append(len(self.labels))
+            for label, child in subtree.items():
+                if not isinstance(label, str):
+                    raise TypeError(
+                        f"Malformed tree node {list(self.paths[node])}: "
+                        f"label {label!r} is not a string"
+                    )
+                child_id = len(self.labels)
+                path = self.paths[node] + (label,)
+                self.labels.append(label)
+                self.parent.append(node)
+                self.depth.append(self.depth[node] + 1)
+                self.category.append(child_id if node == ROOT else self.category[node])
+                self.paths.append(path)
+                self._index[path] = child_id
+                queue.append((child_id, child))
+            self.child_end.append(len(self.labels))
+        self._fingerprint: str | None = None
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of every path; changes whenever any path (and therefore any id) changes."""
+        if self._fingerprint is None:
+            import hashlib  # only cache users need it; keeps the import off startup
+            self._fingerprint = hashlib.sha1(
+                "\n".join("\x1f".join(p) for p in self.paths).encode()
+            ).hexdigest()
+        return self._fingerprint
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def children(self, node: int) -> range:
+        return range(self.child_start[node], self.child_end[node])
+
+    def is_leaf(self, node: int) -> bool:
+        return self.child_start[node] == self.child_end[node]
+
+    def path_id(self, path) -> int:
+        """Return the id of a label path; raises KeyError if it is not in the tree."""
+        return self._index[tuple(path)]
+
+    def get_id(self, path, default=None):
+        return self._index.get(tuple(path), default)
+
+    def path_of(self, node: int) -> Tuple[str, ...]:
+        return self.paths[node]
+
+    def contains(self, node: int) -> bool:
+        return 0 <= node < len(self.labels)
+
+    def leaf_ids(self) -> List[int]:
+        return [n for n in range(1, len(self.labels)) if self.is_leaf(n)]
+
+
+COMPILED_TREE = CompiledTree(TREE)
@@ -0,0 +1,176 @@
+"""
+Opt-in hot-path instrumentation.
+
+Set SIMUCARE_METRICS before starting the app to enable it:
+
+    SIMUCARE_METRICS=1 python dashboard.py               # export to sessions/metrics-<stamp>.json
+    SIMUCARE_METRICS=/tmp/run.json python dashboard.py   # export to that file
+
+The variable is read once at import. When it is unset or off ("", 0, false,
+no, off), RING is None and timed() returns functions undecorated, so
+disabled builds run exactly the code they ran before. When enabled, each
+timed call costs two perf_counter() reads and three array stores into a
+fixed-size ring under an uncontended lock; nothing allocates per sample and
+old samples are overwritten.
+
+LagProbe measures Tk main-loop lag: it schedules an ``after`` callback every
+``interval`` ms and records how late each one actually ran.
+"""
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
+import functools
+import os
+import time
+
+ENV_VAR = "SIMUCARE_METRICS"
+OFF = ("", "0", "false", "no", "off")
+ON = ("1", "true", "yes", "on")
+
+
+def _setting() -> str:
+    return os.environ.get(ENV_VAR, "").strip()
+
+
+def enabled() -> bool:
+    """Whether the variable asks for metrics; "", 0, false, no and off leave them off."""
+    return _setting().lower() not in OFF
+
+
+class MetricsRing:
+    """
+    Fixed-capacity ring of (stage, start, milliseconds) samples. Timed stages
+    run on both the Tk thread and the worker, so writes and reads take a lock.
+    """
+    __slots__ = ("capacity", "names", "_codes", "_stage", "_start", "_ms", "_next", "count", "_lock")
+
+    def __init__(self, capacity: int = 8192):
+        self.capacity = capacity
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._stage = array("H", bytes(2 * capacity))
+        self._start = array("d", bytes(8 * capacity))
+        self._ms = array("d", bytes(8 * capacity))
+        self._next = 0
+        self.count = 0  # samples ever recorded; min(count, capacity) are kept
+        import threading  # only when metrics are on; keeps the import off startup
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> int:
+        """Code for a stage name, registering it on first use."""
+        with self._lock:
+            code = self._codes.get(name)
+            if code is None:
+                code = self._codes[name] = len(self.names)
+                self.names.append(name)
+            return code
+
+    def record(self, code: int, start: float, end: float):
+        """Store one sample; ``start`` and ``end`` are perf_counter() seconds."""
+        with self._lock:
+            i = self._next
+            self._stage[i] = code
+            self._start[i] = start
+            self._ms[i] = (end - start) * 1000.0
+            self._next = i + 1 if i + 1 < self.capacity else 0
+            self.count += 1
+
+    def samples(self) -> List[Tuple[str, float, float]]:
+        """Kept samples, oldest first, as (stage name, start, ms)."""
+        with self._lock:
+            n = min(self.count, self.capacity)
+            first = self._next - n if self.count <= self.capacity else self._next
+            order = [(first + k) % self.capacity for k in range(n)]
+            return [(self.names[self._stage[i]], self._start[i], self._ms[i]) for i in order]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, mean, p50, p99 and max in ms over the kept samples."""
+        by_stage: Dict[str, List[float]] = {}
+        for name, _, ms in self.samples():
+            by_stage.setdefault(name, []).append(ms)
+        stats = {}
+        for name, times in by_stage.items():
+            times.sort()
+            stats[name] = {
+                "count": len(times),
+                "mean_ms": sum(times) / len(times),
+                "p50_ms": times[(len(times) - 1) // 2],
+                "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))],
+                "max_ms": times[-1],
+            }
+        return stats
+
+    def export(self, path: str):
+        """Write the summary and raw samples as JSON."""
+        import json
+        with open(path, "w") as f:
+            json.dump({
+                "recorded": self.count,
+                "kept": min(self.count, self.capacity),
+                "summary": self.summary(),
+                "samples": [{"stage": n, "t": t, "ms": ms} for n, t, ms in self.samples()],
+            }, f, indent=1)
+
+
+RING: MetricsRing | None = MetricsRing() if enabled() else None
+
+
+def export_path(directory: str = "sessions") -> str:
+    """Where to export: the variable's value if it names a file, else a stamped file in ``directory``."""
+    value = _setting()
+    if value.lower() not in OFF + ON:
+        return value
+    return os.path.join(directory, f"metrics-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator recording each call's duration under ``name``.
+    Returns the function itself when metrics are disabled.
+    """
+    ring = RING
+    if ring is None:
+        return lambda fn: fn
+    code = ring.stage(name)
+    perf_counter = time.perf_counter
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                ring.record(code, start, perf_counter())
+        return wrapper
+    return decorate
+
+
+class LagProbe:
+    """
+    Records Tk main-loop lag under "tk.lag": how many ms after its due time
+    each periodic ``after`` callback actually ran.
+    """
+
+    def __init__(self, widget: Any, ring: MetricsRing, interval: int = 100):
+        self.widget = widget
+        self.ring = ring
+        self.interval = interval
+        self._code = ring.stage("tk.lag")
+        self._due = 0.0
+        self._job = None
+
+    def start(self):
+        self._due = time.perf_counter() + self.interval / 1000.0
+        self._job = self.widget.after(self.interval, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.ring.record(self._code, self._due, now)
+        # schedule from now so one stall is not counted again on every later tick
+        self._due = now + self.interval / 1000.0
+        self._job = self.widget.after(self.interval, self._tick)
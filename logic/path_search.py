@@ -0,0 +1,84 @@
+"""
+Type-ahead search over every leaf path in the intervention tree.
+
+Labels are split into lowercase alphanumeric tokens and indexed once. A query
+is split the same way; every query token must match some token of a path,
+trying exact, then prefix, then fuzzy (in-order subsequence) matches.
+"nrb o2" therefore finds Primary Assessment > Breathing > Administer O2 > NRB.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Set
+import re
+
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _is_subsequence(needle: str, haystack: str) -> bool:
+    it = iter(haystack)
+    return all(ch in it for ch in needle)
+
+
+class PathSearchIndex:
+    def __init__(self, tree: CompiledTree = COMPILED_TREE):
+        self.tree = tree
+        self.leaves = tree.leaf_ids()
+        self._postings: Dict[str, Set[int]] = {}
+        # tokens of each leaf's own label score a little higher than ancestor tokens
+        self._leaf_tokens: Dict[int, Set[str]] = {}
+        for leaf in self.leaves:
+            for label in tree.path_of(leaf):
+                for token in tokenize(label):
+                    self._postings.setdefault(token, set()).add(leaf)
+            self._leaf_tokens[leaf] = set(tokenize(tree.labels[leaf]))
+        self._vocab = sorted(self._postings)
+
+    def _match_token(self, qtok: str) -> Dict[int, int]:
+        """leaf id -> best match strength for one query token."""
+        hits: Dict[int, int] = {}
+
+        i = bisect_left(self._vocab, qtok)
+        while i < len(self._vocab) and self._vocab[i].startswith(qtok):
+            token = self._vocab[i]
+            strength = EXACT if token == qtok else PREFIX
+            for leaf in self._postings[token]:
+                if hits.get(leaf, 0) < strength:
+                    hits[leaf] = strength
+            i += 1
+
+        if not hits and len(qtok) > 1:
+            for token in self._vocab:
+                if token[0] == qtok[0] and _is_subsequence(qtok, token):
+                    for leaf in self._postings[token]:
+                        hits.setdefault(leaf, FUZZY)
+        return hits
+
+    def search(self, query: str, limit: int = 8) -> List[int]:
+        """Return up to ``limit`` leaf path ids, best match first."""
+        qtokens = tokenize(query)
+        if not qtokens:
+            return []
+
+        scores: Dict[int, int] | None = None
+        for qtok in qtokens:
+            hits = self._match_token(qtok)
+            if scores is None:
+                scores = hits
+            else:
+                scores = {leaf: s + hits[leaf] for leaf, s in scores.items() if leaf in hits}
+            if not scores:
+                return []
+
+        def rank(leaf):
+            own = sum(1 for q in qtokens
+                      if any(t.startswith(q) for t in self._leaf_tokens[leaf]))
+            return (-scores[leaf], -own, self.tree.depth[leaf], leaf)
+
+        return sorted(scores, key=rank)[:limit]
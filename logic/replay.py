@@ -0,0 +1,216 @@
+"""
+Seekable replays of recorded sessions.
+
+A SessionReplay reads one session's event log (logic.event_log) and plays it
+back through a real Session on a VirtualClock, so engine and scoring state
+at any moment is exactly what the trainee had. Loading replays the log once
+and keeps a keyframe, Session.snapshot(), every ``keyframe_every`` events.
+
+Seeking to time t bisects the event timestamps for the number of events
+before t, restores the keyframe at or below that count, and applies at most
+``keyframe_every - 1`` events on top: O(log n) plus a short forward replay,
+for any log length and in either direction. Playing forward applies events
+directly without touching the keyframes.
+
+Vitals are a pure function of the effects started before t, so they are not
+keyframed: the effect-bearing events are kept as arrays and a seek rebuilds
+the simulator from one slice of them.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Tuple
+import os
+
+import numpy as np
+
+from logic.clock import VirtualClock
+from logic.event_log import RESULT_CODES, iter_events, read_header
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+from logic.session import Session
+from logic.snapshot import SUFFIX, read_snapshot
+from logic.vitals import VitalsSimulator
+
+REQUIRED = RESULT_CODES["required"]
+
+
+class SessionReplay:
+    KEYFRAME_EVERY = 32  # events between keyframes
+
+    def __init__(self, path: str, scenario: Dict[str, Any], index=None,
+                 tree: CompiledTree = COMPILED_TREE, keyframe_every: int = KEYFRAME_EVERY):
+        """
+        :param path: the session's ``.events`` log; a ``.snap`` next to it, if any,
+                     supplies when the session ended and its wall-clock start. Logs
+                     written against another tree raise ValueError.
+        :param index: compile_scenario() result for ``scenario``
+        """
+        self.path = path
+        _, self.scenario_id, fingerprint = read_header(path)
+        if fingerprint is not None and fingerprint != tree.fingerprint:
+            raise ValueError(f"{path} was recorded against a different intervention tree; "
+                             "its path ids cannot be replayed")
+        self.scenario = scenario
+        self.keyframe_every = keyframe_every
+
+        # events as parallel arrays; times never decrease in a log
+        self.times = array("d")
+        self.taken = array("d")
+        self.paths = array("i")
+        self.codes = array("B")
+        self.rows = array("H")
+        for timestamp, time_taken, path_id, code, row in iter_events(path):
+            self.times.append(timestamp)
+            self.taken.append(time_taken)
+            self.paths.append(path_id)
+            self.codes.append(code)
+            self.rows.append(row)
+        n = len(self.times)
+
+        self.clock = VirtualClock()
+        self.session = Session(scenario, index=index, tree=tree, clock=self.clock)
+        self.session.start()
+        self.multi = self.session.n_patients > 1
+        self.vitals = VitalsSimulator.from_scenario(scenario, tree=tree)
+        self.duration = self.session.duration
+
+        # how long the session ran, and when it started by the wall clock
+        self.end = min(self.times[-1] if n else 0.0, self.duration)
+        snap = read_snapshot(path[:-len(".events")] + SUFFIX) if path.endswith(".events") else None
+        if snap is not None:
+            self.end = min(max(self.end, snap[5][0]), self.duration)
+            self.wall_start = snap[3] - snap[5][0]
+        else:
+            self.wall_start = os.path.getmtime(path) - self.end
+
+        # one pass over the log: keyframes, running score, prompt text and vitals effects
+        self.points = array("I", bytes(4 * (n + 1)))  # required actions among the first i events
+        self.prompts: List[str] = [""] * n            # prompt label text after event i
+        self._by_result: Dict[int, array] = {code: array("I") for code in RESULT_CODES.values()}
+        self.keyframes: List[Tuple[array, array]] = []  # snapshot before every keyframe_every-th event
+        patients, kinds, starts = array("i"), array("h"), array("d")
+        self._eff_count = array("I", bytes(4 * (n + 1)))  # vitals effects among the first i events
+        label = scenario.get("description", "")
+        self.pos = 0
+        self.time = 0.0
+        for i in range(n):
+            if i % keyframe_every == 0:
+                self.keyframes.append(self._snapshot())
+            if self.multi and self.rows[i] != (self.rows[i - 1] if i else 1):
+                label = scenario["patients"][self.patient_of(i)].get("description", "")
+            self._apply(i)
+            code = self.codes[i]
+            self.points[i + 1] = self.points[i] + (code == REQUIRED)
+            self._by_result[code].append(i)
+            if code == REQUIRED:
+                label = self.prompt_of(i) or "Action acknowledged."
+            self.prompts[i] = label
+            kind = self.vitals.effect_of.get(self.paths[i])
+            if kind is not None:
+                patients.append(self.patient_of(i))
+                kinds.append(kind)
+                starts.append(self.times[i])
+            self._eff_count[i + 1] = len(kinds)
+        if n % keyframe_every == 0:
+            self.keyframes.append(self._snapshot())
+        self._eff_patient = np.array(patients, dtype=np.int32)
+        self._eff_kind = np.array(kinds, dtype=np.int16)
+        self._eff_start = np.array(starts, dtype=np.float64)
+        self.seek(0.0)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def event(self, i: int) -> Tuple[float, float, int, int, int]:
+        """(timestamp, time_taken, path_id, result_code, patient row) of event ``i``."""
+        return self.times[i], self.taken[i], self.paths[i], self.codes[i], self.rows[i]
+
+    def patient_of(self, i: int) -> int:
+        """Patient the trainee was on for event ``i`` (0 for single-patient scenarios)."""
+        return max(self.rows[i] - 1, 0) if self.multi else 0
+
+    def prompt_of(self, i: int) -> str | None:
+        """Follow-up prompt of event ``i``, if it completed a required path."""
+        index = self.session.engine.index
+        rows = index.rows if self.multi else [index]
+        entry = rows[self.rows[i]].required.get(self.paths[i]) or rows[0].required.get(self.paths[i])
+        return entry and entry[1]
+
+    def prompt(self) -> str:
+        """Prompt label text at the current position."""
+        return self.prompts[self.pos - 1] if self.pos else self.scenario.get("description", "")
+
+    def position_at(self, t: float) -> int:
+        """Number of events at or before ``t``."""
+        return bisect_right(self.times, t)
+
+    def find(self, result: str, after: float) -> float | None:
+        """Time of the first ``result`` event strictly after ``after``, or None."""
+        events = self._by_result[RESULT_CODES[result]]
+        k = bisect_left(events, self.position_at(after))
+        return self.times[events[k]] if k < len(events) else None
+
+    # ---------- playback ----------
+    def advance(self, t: float) -> range:
+        """Play forward to ``t``; returns the indices of the events applied."""
+        t = min(t, self.duration)
+        if t < self.time:
+            raise ValueError(f"Cannot advance backwards from {self.time} to {t}; use seek()")
+        start, end = self.pos, self.position_at(t)
+        for i in range(start, end):
+            self._apply(i)
+        self.pos = end
+        self._move_clock(t)
+        self._apply_vitals(start, end)
+        return range(start, end)
+
+    def seek(self, t: float) -> int:
+        """Jump to ``t`` in either direction; returns the number of events before it."""
+        t = min(max(t, 0.0), self.duration)
+        target = self.position_at(t)
+        k = target // self.keyframe_every
+        if not (t >= self.time and k * self.keyframe_every <= self.pos):
+            # restore the keyframe at or below the target instead of replaying from the start
+            self.session.restore(*self.keyframes[k])
+            self.pos = k * self.keyframe_every
+            self.vitals.reset()
+            self._apply_vitals(0, self.pos)
+        start = self.pos
+        for i in range(start, target):
+            self._apply(i)
+        self.pos = target
+        self._apply_vitals(start, target)
+        self._move_clock(t)
+        return target
+
+    def _apply(self, i: int):
+        """Apply event ``i`` with its recorded timing; the clock ends at its timestamp."""
+        origin = self.clock.origin
+        timestamp = self.times[i]
+        self.clock.set(origin + timestamp)
+        shown = origin + timestamp - self.taken[i]
+        if self.multi and self.rows[i]:
+            patient = self.rows[i] - 1
+            if patient != self.session.engine.active:
+                self.session.select_patient(patient, shown)
+        self.session.scoring.prompt_shown(shown)
+        self.session.submit(self.paths[i], origin + timestamp)
+        self.time = timestamp
+
+    def _apply_vitals(self, start: int, end: int):
+        lo, hi = self._eff_count[start], self._eff_count[end]
+        if hi > lo:
+            self.vitals.add_effects(self._eff_patient[lo:hi], self._eff_kind[lo:hi], self._eff_start[lo:hi])
+
+    def _move_clock(self, t: float):
+        # restore() moves the clock origin instead of the time, so the clock never goes back
+        self.clock.set(self.clock.origin + t)
+        self.time = t
+
+    def _snapshot(self) -> Tuple[array, array]:
+        ints, floats = self.session.snapshot()
+        return array("q", ints), array("d", floats)
+
+    def keyframe_bytes(self) -> int:
+        """Memory held by the keyframes."""
+        return sum(ints.itemsize * len(ints) + floats.itemsize * len(floats)
+                   for ints, floats in self.keyframes)
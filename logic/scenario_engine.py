@@ -1,5 +1,91 @@
-from typing import Dict, Any, List
-import time
+from array import array
+from typing import Dict, Any, List, Tuple
+
+from logic import metrics
+from logic.clock import Clock
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
+
+class ScenarioIndex:
+    """
+    Scenario compiled once at load time into hash lookups keyed by path id.
+
+    Duplicate required entries collapse onto a single slot (first prompt wins),
+    so ``total_required`` counts distinct paths only. Paths missing from the
+    intervention tree raise ValueError.
+
+    Required entries may list prerequisites, forming a DAG over slots:
+        {"path": [...], "prompt": "...", "after": [[...], ...]}
+    Each prerequisite must itself be a required path. Cycles, and steps that
+    can never unlock because they sit behind a cycle, raise ValueError.
+    """
+    __slots__ = ("required", "harmful", "total_required", "paths", "successors", "prerequisites")
+
+    def __init__(self, scenario: Dict[str, Any], tree: CompiledTree = COMPILED_TREE):
+        # path id -> (slot, prompt)
+        self.required: Dict[int, Tuple[int, str]] = {}
+        ordered = []  # (path id, entry) for entries declaring prerequisites
+        for rp in scenario.get("required_paths", []):
+            pid = _resolve(tree, rp["path"])
+            if pid not in self.required:
+                self.required[pid] = (len(self.required), rp.get("prompt", ""))
+            if rp.get("after"):
+                ordered.append((pid, rp))
+        self.harmful = frozenset(_resolve(tree, p) for p in scenario.get("harmful_paths", []))
+        self.total_required = len(self.required)
+        self.paths: Tuple[int, ...] = tuple(self.required)  # slot -> path id
+
+        # slot -> slots it unlocks, and slot -> number of prerequisites
+        successors: List[List[int]] = [[] for _ in range(self.total_required)]
+        self.prerequisites = array("H", bytes(2 * self.total_required))
+        for pid, rp in ordered:
+            slot = self.required[pid][0]
+            for before in rp["after"]:
+                entry = self.required.get(_resolve(tree, before))
+                if entry is None:
+                    raise ValueError(f"Prerequisite {before} of {rp['path']} is not a required path")
+                if slot not in successors[entry[0]]:
+                    successors[entry[0]].append(slot)
+                    self.prerequisites[slot] += 1
+        self.successors: Tuple[Tuple[int, ...], ...] = tuple(map(tuple, successors))
+        if ordered:
+            self._check_order(tree)
+
+    def _check_order(self, tree: CompiledTree):
+        """Kahn's algorithm; every slot must be reachable from the initial frontier."""
+        waiting = array("H", self.prerequisites)
+        ready = [s for s in range(self.total_required) if not waiting[s]]
+        reached = 0
+        while ready:
+            slot = ready.pop()
+            reached += 1
+            for nxt in self.successors[slot]:
+                waiting[nxt] -= 1
+                if not waiting[nxt]:
+                    ready.append(nxt)
+        if reached == self.total_required:
+            return
+
+        # every blocked slot has a blocked prerequisite, so walking back finds a cycle
+        blocked = [s for s in range(self.total_required) if waiting[s]]
+        before = {nxt: s for s in blocked for nxt in self.successors[s] if waiting[nxt]}
+        seen: Dict[int, int] = {}
+        slot = blocked[0]
+        while slot not in seen:
+            seen[slot] = len(seen)
+            slot = before[slot]
+        cycle = [s for s, _ in sorted(seen.items(), key=lambda kv: kv[1])][seen[slot]:]
+        order = cycle[::-1] + cycle[-1:]
+        names = " -> ".join(" > ".join(tree.path_of(self.paths[s])) for s in order)
+        raise ValueError(f"Prerequisite cycle: {names}; {len(blocked)} step(s) can never be reached")
+
+
+def _resolve(tree: CompiledTree, path: List[str]) -> int:
+    pid = tree.get_id(path)
+    if pid is None:
+        raise ValueError(f"Scenario path not in intervention tree: {path}")
+    return pid
+
 
 class ScenarioEngine:
     """
@@ -8,50 +94,87 @@ class ScenarioEngine:
         "title": "...",
         "description": "...",      # first prompt text
         "required_paths": [        # list of dicts
-            {"path": [...], "prompt": "..."},
+            {"path": [...], "prompt": "...", "after": [[...], ...]},
             ...
         ],
         "harmful_paths": [ [...], ... ]
       }
+
+    Required paths whose prerequisites ("after") are not all done yet are
+    rejected as "out_of_order". The slots currently allowed form the
+    frontier, kept up to date as each completion unlocks its successors.
     """
-    def __init__(self, scenario: Dict[str, Any]):
+    __slots__ = ("title", "description", "required_paths", "harmful_paths", "index", "clock",
+                 "start_time", "completed", "harmful_selected", "frontier",
+                 "_completed_keys", "_harmful_keys", "_waiting")
+
+    # single patient; mirrors MultiPatientEngine so callers can treat both alike
+    n_patients = 1
+    active_row = 0
+
+    def harmful_row(self, path_id: int) -> int:
+        return 0
+
+    def __init__(self, scenario: Dict[str, Any], index: ScenarioIndex | None = None,
+                 tree: CompiledTree = COMPILED_TREE, clock: Clock | None = None):
         self.title = scenario.get("title", "")
         self.description = scenario.get("description", "")
         self.required_paths: List[Dict[str, Any]] = scenario.get("required_paths", [])
         self.harmful_paths: List[List[str]] = scenario.get("harmful_paths", [])
+        self.index = index if index is not None else ScenarioIndex(scenario, tree)
+        self.clock = clock or Clock()
 
         self.start_time: float | None = None
-        self.completed: List[List[str]] = []          # paths the user successfully chose
-        self.harmful_selected: List[List[str]] = []   # harmful paths the user clicked
+        self.completed: List[int] = []          # path ids the user successfully chose
+        self.harmful_selected: List[int] = []   # harmful path ids the user clicked
+        self._completed_keys: set = set()
+        self._harmful_keys: set = set()
+        self._reset_order()
+
+    def _reset_order(self):
+        self._waiting = array("H", self.index.prerequisites)  # unmet prerequisites per slot
+        self.frontier = {s for s in range(self.index.total_required) if not self._waiting[s]}
 
     def start(self):
-        self.start_time = time.time()
+        self.clock.start()
+        self.start_time = self.clock.origin
 
     def elapsed(self) -> float:
-        return time.time() - self.start_time if self.start_time else 0.0
+        return self.clock.elapsed() if self.start_time is not None else 0.0
 
-    def process_action(self, path: List[str]) -> Dict[str, Any]:
+    @metrics.timed("engine.process_action")
+    def process_action(self, path_id: int) -> Dict[str, Any]:
         """
         Called whenever the user clicks an intervention path.
         Returns a dict with the outcome and any follow-up prompt.
         """
         # harmful check first
-        if path in self.harmful_paths:
-            if path not in self.harmful_selected:
-                self.harmful_selected.append(path)
+        if path_id in self.index.harmful:
+            if path_id not in self._harmful_keys:
+                self._harmful_keys.add(path_id)
+                self.harmful_selected.append(path_id)
             return {"result": "harmful", "prompt": None}
 
         # required check
-        for rp in self.required_paths:
-            if path == rp["path"] and path not in self.completed:
-                self.completed.append(path)
-                return {"result": "required", "prompt": rp.get("prompt", "")}
+        entry = self.index.required.get(path_id)
+        if entry is not None and path_id not in self._completed_keys:
+            slot = entry[0]
+            if self._waiting[slot]:
+                return {"result": "out_of_order", "prompt": None}
+            self._completed_keys.add(path_id)
+            self.completed.append(path_id)
+            _unlock(self.index, slot, self._waiting, self.frontier)
+            return {"result": "required", "prompt": entry[1]}
 
         return {"result": "unknown", "prompt": None}
 
+    def available(self) -> List[int]:
+        """Path ids of required steps that can be done now."""
+        return [self.index.paths[s] for s in self.frontier]
+
     def is_completed(self) -> bool:
-        """True if all required paths have been selected (order doesn’t matter)."""
-        return len(self.completed) == len(self.required_paths)
+        """True once every required path has been accepted, each after its prerequisites."""
+        return len(self._completed_keys) == self.index.total_required
 
     def scenario_failed(self) -> bool:
         """True if any harmful path has been selected."""
@@ -61,3 +184,276 @@ class ScenarioEngine:
         self.start_time = None
         self.completed.clear()
         self.harmful_selected.clear()
+        self._completed_keys.clear()
+        self._harmful_keys.clear()
+        self._reset_order()
+
+    # ---------- snapshots ----------
+    def snapshot(self) -> List[int]:
+        """Progress as flat ints for logic.snapshot: completed, then harmful path ids."""
+        return [len(self.completed), *self.completed, len(self.harmful_selected), *self.harmful_selected]
+
+    def max_snapshot_ints(self) -> int:
+        return 2 + self.index.total_required + len(self.index.harmful)
+
+    def restore(self, ints, pos: int = 0) -> int:
+        """Rebuild progress from snapshot() output starting at ``pos``; returns the next position."""
+        self.completed.clear()
+        self._completed_keys.clear()
+        self._reset_order()
+        n = ints[pos]
+        for path_id in ints[pos + 1:pos + 1 + n]:
+            entry = self.index.required.get(path_id)
+            if entry is None:
+                raise ValueError(f"Snapshot completes path {path_id}, which is not required in this scenario")
+            self._completed_keys.add(path_id)
+            self.completed.append(path_id)
+            _unlock(self.index, entry[0], self._waiting, self.frontier)
+        pos += 1 + n
+        n = ints[pos]
+        harmful = ints[pos + 1:pos + 1 + n]
+        unknown = [p for p in harmful if p not in self.index.harmful]
+        if unknown:
+            raise ValueError(f"Snapshot selects paths {unknown}, which are not harmful in this scenario")
+        self.harmful_selected[:] = harmful
+        self._harmful_keys = set(self.harmful_selected)
+        return pos + 1 + n
+
+
+def _unlock(index: ScenarioIndex, slot: int, waiting: array, frontier: set):
+    """Mark ``slot`` done; successors whose last prerequisite it was join the frontier."""
+    frontier.discard(slot)
+    for nxt in index.successors[slot]:
+        waiting[nxt] -= 1
+        if not waiting[nxt]:
+            frontier.add(nxt)
+
+
+class MultiPatientIndex:
+    """
+    Compiled mass-casualty scenario: one ScenarioIndex per row, where row 0 is
+    the scene (top-level required/harmful paths, done once) and rows 1..N are
+    the declared patients.
+    """
+    __slots__ = ("rows", "names", "descriptions", "total_required")
+
+    def __init__(self, scenario: Dict[str, Any], tree: CompiledTree = COMPILED_TREE):
+        patients = scenario.get("patients", [])
+        if not patients:
+            raise ValueError("Multi-patient scenario declares no patients")
+        self.rows: List[ScenarioIndex] = [ScenarioIndex(scenario, tree)]
+        self.rows += [ScenarioIndex(p, tree) for p in patients]
+        self.names = [p.get("name", f"Patient {i + 1}") for i, p in enumerate(patients)]
+        self.descriptions = [p.get("description", "") for p in patients]
+        self.total_required = sum(ix.total_required for ix in self.rows)
+
+
+class MultiPatientEngine:
+    """
+    Scenario logic for mass-casualty scenarios:
+      {
+        "title": "...",
+        "description": "...",
+        "required_paths": [...],   # scene-level, done once (e.g. number of patients)
+        "harmful_paths": [...],
+        "patients": [
+            {"name": "...", "description": "...", "required_paths": [...], "harmful_paths": [...]},
+            ...
+        ]
+      }
+
+    The trainee works on one patient at a time (select_patient). Progress is
+    columnar: one completion bitset and one remaining-count per row, plus a
+    count of unfinished rows, so is_completed() is O(1) for any patient count.
+    Prerequisites ("after") apply within a row, each with its own frontier.
+    """
+    __slots__ = ("title", "description", "index", "clock", "start_time", "completed",
+                 "harmful_selected", "active", "completed_bits", "remaining",
+                 "incomplete_rows", "frontiers", "_harmful_keys", "_stride", "_waiting")
+
+    def __init__(self, scenario: Dict[str, Any], index: MultiPatientIndex | None = None,
+                 tree: CompiledTree = COMPILED_TREE, clock: Clock | None = None):
+        self.title = scenario.get("title", "")
+        self.description = scenario.get("description", "")
+        self.index = index if index is not None else MultiPatientIndex(scenario, tree)
+        self.clock = clock or Clock()
+        self._stride = len(tree)
+
+        self.start_time: float | None = None
+        self.active = 0                          # index into the patient list
+        self.completed: List[int] = []           # path ids completed, any row
+        self.harmful_selected: List[int] = []
+        self._harmful_keys: set = set()          # row * stride + path id
+        self.completed_bits: List[int] = []
+        self.remaining = array("i")
+        self.incomplete_rows = 0
+        self.reset()
+
+    @property
+    def n_patients(self) -> int:
+        return len(self.index.names)
+
+    @property
+    def active_row(self) -> int:
+        return self.active + 1
+
+    def start(self):
+        self.clock.start()
+        self.start_time = self.clock.origin
+
+    def elapsed(self) -> float:
+        return self.clock.elapsed() if self.start_time is not None else 0.0
+
+    def select_patient(self, patient: int):
+        if not 0 <= patient < self.n_patients:
+            raise IndexError(f"No patient {patient}")
+        self.active = patient
+
+    def harmful_row(self, path_id: int) -> int:
+        """Row a harmful action is charged to: the active patient's if harmful there, else the scene's."""
+        row = self.active_row
+        return row if path_id in self.index.rows[row].harmful else 0
+
+    @metrics.timed("engine.process_action")
+    def process_action(self, path_id: int) -> Dict[str, Any]:
+        """Apply an action to the active patient (or the scene, for scene-level paths)."""
+        row = self.active_row
+        rows = self.index.rows
+
+        # harmful check first
+        r = self.harmful_row(path_id)
+        if path_id in rows[r].harmful:
+            key = r * self._stride + path_id
+            if key not in self._harmful_keys:
+                self._harmful_keys.add(key)
+                self.harmful_selected.append(path_id)
+            return {"result": "harmful", "prompt": None}
+
+        # required check: scene-level first, then the active patient
+        for r in (0, row):
+            entry = rows[r].required.get(path_id)
+            if entry is None:
+                continue
+            bit = 1 << entry[0]
+            if not self.completed_bits[r] & bit:
+                if self._waiting[r][entry[0]]:
+                    return {"result": "out_of_order", "prompt": None}
+                _unlock(rows[r], entry[0], self._waiting[r], self.frontiers[r])
+                self.completed_bits[r] |= bit
+                self.remaining[r] -= 1
+                if self.remaining[r] == 0:
+                    self.incomplete_rows -= 1
+                self.completed.append(path_id)
+                return {"result": "required", "prompt": entry[1]}
+
+        return {"result": "unknown", "prompt": None}
+
+    def available(self) -> List[int]:
+        """Path ids that can be done now for the scene and the active patient."""
+        rows = self.index.rows
+        return [rows[r].paths[s] for r in (0, self.active_row) for s in self.frontiers[r]]
+
+    def patient_completed(self, patient: int) -> bool:
+        return self.remaining[patient + 1] == 0
+
+    def patient_progress(self, patient: int) -> Tuple[int, int]:
+        """(completed, total) required paths for one patient."""
+        total = self.index.rows[patient + 1].total_required
+        return total - self.remaining[patient + 1], total
+
+    def is_completed(self) -> bool:
+        """True once the scene and every patient have all required paths done."""
+        return self.incomplete_rows == 0
+
+    def scenario_failed(self) -> bool:
+        return len(self.harmful_selected) > 0
+
+    def reset(self):
+        self.start_time = None
+        self.active = 0
+        self.completed.clear()
+        self.harmful_selected.clear()
+        self._harmful_keys.clear()
+        self.completed_bits = [0] * len(self.index.rows)
+        self.remaining = array("i", (ix.total_required for ix in self.index.rows))
+        self.incomplete_rows = sum(1 for n in self.remaining if n)
+        self._waiting = [array("H", ix.prerequisites) for ix in self.index.rows]
+        self.frontiers = [{s for s in range(ix.total_required) if not ix.prerequisites[s]}
+                          for ix in self.index.rows]
+
+    # ---------- snapshots ----------
+    def snapshot(self) -> List[int]:
+        """
+        Progress as flat ints for logic.snapshot: active patient, completed
+        (row, path id) pairs, then harmful keys. Bounded by the scenario size,
+        not the number of actions taken.
+        """
+        pairs = [x for r, ix in enumerate(self.index.rows)
+                 for s in range(ix.total_required) if self.completed_bits[r] >> s & 1
+                 for x in (r, ix.paths[s])]
+        keys = list(self._harmful_keys)  # row * stride + path id
+        return [self.active, len(pairs) // 2, *pairs, len(keys), *keys]
+
+    def max_snapshot_ints(self) -> int:
+        rows = self.index.rows
+        return 3 + 2 * self.index.total_required + sum(len(ix.harmful) for ix in rows)
+
+    def restore(self, ints, pos: int = 0) -> int:
+        """Rebuild progress from snapshot() output starting at ``pos``; returns the next position."""
+        start_time = self.start_time
+        self.reset()
+        self.start_time = start_time
+        rows = self.index.rows
+        if not 0 <= ints[pos] < self.n_patients:
+            raise ValueError(f"Snapshot selects patient {ints[pos]}; the scenario has {self.n_patients}")
+        self.active = ints[pos]
+        n = ints[pos + 1]
+        pos += 2
+        for k in range(n):
+            r, path_id = ints[pos + 2 * k], ints[pos + 2 * k + 1]
+            entry = rows[r].required.get(path_id) if 0 <= r < len(rows) else None
+            if entry is None:
+                raise ValueError(f"Snapshot completes path {path_id} in row {r}, which does not require it")
+            slot = entry[0]
+            self.completed_bits[r] |= 1 << slot
+            self.remaining[r] -= 1
+            if self.remaining[r] == 0:
+                self.incomplete_rows -= 1
+            _unlock(rows[r], slot, self._waiting[r], self.frontiers[r])
+            self.completed.append(path_id)
+        pos += 2 * n
+        n = ints[pos]
+        for key in ints[pos + 1:pos + 1 + n]:
+            r, path_id = divmod(key, self._stride)
+            if not (0 <= r < len(rows) and path_id in rows[r].harmful):
+                raise ValueError(f"Snapshot selects path {path_id} in row {r}, which is not harmful there")
+            self._harmful_keys.add(key)
+            self.harmful_selected.append(key % self._stride)
+        return pos + 1 + n
+
+
+def compile_scenario(scenario: Dict[str, Any], tree: CompiledTree = COMPILED_TREE):
+    """Compile a scenario into a ScenarioIndex, or a MultiPatientIndex if it declares patients."""
+    if "patients" in scenario:
+        return MultiPatientIndex(scenario, tree)
+    return ScenarioIndex(scenario, tree)
+
+
+def scenario_digest(index) -> str:
+    """
+    sha1 hex of what snapshots of a compiled scenario refer to: each row's
+    slot order, prerequisites and harmful path ids. Prompt and description
+    edits leave it unchanged.
+    """
+    import hashlib  # only snapshot writes and resume checks need it
+    rows = index.rows if isinstance(index, MultiPatientIndex) else [index]
+    spec = [(ix.paths, ix.successors, sorted(ix.harmful)) for ix in rows]
+    return hashlib.sha1(repr(spec).encode()).hexdigest()
+
+
+def create_engine(scenario: Dict[str, Any], index=None, tree: CompiledTree = COMPILED_TREE,
+                  clock: Clock | None = None):
+    """Build the engine matching the scenario's format."""
+    if "patients" in scenario:
+        return MultiPatientEngine(scenario, index=index, tree=tree, clock=clock)
+    return ScenarioEngine(scenario, index=index, tree=tree, clock=clock)
@@ -0,0 +1,132 @@
+"""
+Scenario library: a directory of scenario JSON files behind a cached index.
+
+Startup only reads the index (name, title, description) and stats each file.
+Full scenario bodies are parsed, validated against the intervention tree and
+compiled on first use; the compiled form is pickled under the cache directory
+so later runs skip JSON parsing and path resolution entirely.
+
+Cache entries are keyed by (mtime_ns, size). When those change the file's
+content hash is checked, so a touched-but-unchanged file is not recompiled.
+Any change to the intervention tree invalidates every entry.
+"""
+from typing import Any, Dict, List, Tuple
+import hashlib
+import json
+import os
+import pickle
+
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+from logic.scenario_engine import compile_scenario
+
+CACHE_VERSION = 2
+INDEX_FILE = "index.pickle"
+
+
+class ScenarioInfo:
+    """Index entry for one scenario file."""
+    __slots__ = ("name", "title", "description", "stat", "digest")
+
+    def __init__(self, name: str, title: str, description: str,
+                 stat: Tuple[int, int], digest: str):
+        self.name = name
+        self.title = title
+        self.description = description
+        self.stat = stat        # (mtime_ns, size)
+        self.digest = digest    # sha1 of the file content
+
+
+class ScenarioLibrary:
+    def __init__(self, directory: str, cache_dir: str | None = None,
+                 tree: CompiledTree = COMPILED_TREE):
+        self.directory = directory
+        self.cache_dir = cache_dir or os.path.join(directory, ".cache")
+        self.tree = tree
+        self._loaded: Dict[str, Tuple[Dict[str, Any], Any]] = {}
+        self.entries: Dict[str, ScenarioInfo] = self._load_index()
+
+    # ---------- index ----------
+    def _load_index(self) -> Dict[str, ScenarioInfo]:
+        cached = self._read_pickle(os.path.join(self.cache_dir, INDEX_FILE))
+        old: Dict[str, ScenarioInfo] = cached or {}
+
+        entries: Dict[str, ScenarioInfo] = {}
+        dirty = cached is None
+        with os.scandir(self.directory) as it:
+            for de in sorted(it, key=lambda d: d.name):
+                if not de.name.endswith(".json") or not de.is_file():
+                    continue
+                name = de.name[:-5]
+                st = de.stat()
+                stat = (st.st_mtime_ns, st.st_size)
+                info = old.get(name)
+                if info is None or info.stat != stat:
+                    info = self._index_file(name, stat, info)
+                    dirty = True
+                entries[name] = info
+        if dirty or entries.keys() != old.keys():
+            self._write_pickle(os.path.join(self.cache_dir, INDEX_FILE), entries)
+        return entries
+
+    def _index_file(self, name: str, stat: Tuple[int, int],
+                    previous: ScenarioInfo | None) -> ScenarioInfo:
+        raw = self._read_source(name)
+        digest = hashlib.sha1(raw).hexdigest()
+        if previous is not None and previous.digest == digest:
+            previous.stat = stat
+            return previous
+        scenario = json.loads(raw)
+        return ScenarioInfo(name, scenario.get("title", name),
+                            scenario.get("description", ""), stat, digest)
+
+    def names(self) -> List[str]:
+        return list(self.entries)
+
+    def info(self, name: str) -> ScenarioInfo:
+        return self.entries[name]
+
+    # ---------- bodies ----------
+    def load(self, name: str) -> Tuple[Dict[str, Any], Any]:
+        """
+        Return (scenario, compiled index) for a scenario, compiling on first use.
+        Raises KeyError for unknown names and ValueError for invalid scenarios.
+        """
+        if name in self._loaded:
+            return self._loaded[name]
+
+        info = self.entries[name]
+        key = (CACHE_VERSION, self.tree.fingerprint, info.digest)
+        cache_path = os.path.join(self.cache_dir, name + ".pickle")
+        cached = self._read_pickle(cache_path)
+        if cached is not None and cached[0] == key:
+            result = cached[1]
+        else:
+            scenario = json.loads(self._read_source(name))
+            result = (scenario, compile_scenario(scenario, self.tree))
+            self._write_pickle(cache_path, (key, result))
+
+        self._loaded[name] = result
+        return result
+
+    # ---------- file helpers ----------
+    def _read_source(self, name: str) -> bytes:
+        with open(os.path.join(self.directory, name + ".json"), "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _read_pickle(path: str):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def _write_pickle(self, path: str, obj):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # read-only deployments just run uncached
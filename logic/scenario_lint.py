@@ -0,0 +1,235 @@
+"""
+Scenario linter and solvability checker.
+
+Checks every scenario JSON file in a directory against the intervention tree
+and reports problems before a trainee runs into them:
+
+  errors    the scenario cannot be completed, or contradicts itself
+            (required or harmful path missing from the tree, a required
+            path stopping at a menu, a path both required and harmful, a
+            required patient path shadowed by the scene, prerequisite
+            cycles, malformed patients, invalid JSON)
+  warnings  likely mistakes that still load (duplicate entries, step paths
+            missing from the tree)
+
+Files are linted in a process pool. Results are cached under
+``<dir>/.cache/lint.pickle`` keyed by (mtime_ns, size) with a sha1 fallback,
+like the scenario library, so unchanged files are never re-linted.
+
+Usage:
+    python -m logic.scenario_lint scenarios -j 8
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+from logic.scenario_engine import compile_scenario
+
+LINT_VERSION = 2
+CACHE_FILE = "lint.pickle"
+# below this many uncached files, linting in-process beats starting a pool
+POOL_THRESHOLD = 16
+
+Issue = Tuple[str, str, str]  # (severity, location, message)
+
+
+# ---------- checks ----------
+def lint_scenario(scenario: Any, tree: CompiledTree = COMPILED_TREE) -> List[Issue]:
+    """Return every issue found in one parsed scenario."""
+    if not isinstance(scenario, dict):
+        return [("error", "", "scenario must be a JSON object")]
+    issues: List[Issue] = []
+    scene_required, scene_harmful = _lint_row(scenario, "", tree, issues)
+
+    patients = scenario.get("patients", [])
+    if not isinstance(patients, list):
+        issues.append(("error", "patients", "must be a list of patient objects"))
+        patients = []
+    for k, patient in enumerate(patients):
+        where = f"patients[{k}]."
+        if not isinstance(patient, dict):
+            issues.append(("error", f"patients[{k}]", "patient must be a JSON object"))
+            continue
+        required, harmful = _lint_row(patient, where, tree, issues)
+        # the engine checks harmful (patient, then scene) before required (scene, then patient)
+        for pid, i in required.items():
+            if pid in scene_required:
+                issues.append(("error", f"{where}required_paths[{i}]",
+                               f"already required at scene level as required_paths[{scene_required[pid]}]; "
+                               "it completes the scene step and never this patient's"))
+            elif pid in scene_harmful:
+                issues.append(("error", f"{where}required_paths[{i}]",
+                               f"harmful at scene level (harmful_paths[{scene_harmful[pid]}])"))
+    if "patients" in scenario and not scenario["patients"]:
+        issues.append(("error", "patients", "multi-patient scenario declares no patients"))
+
+    for i, step in enumerate(scenario.get("steps", [])):
+        expected = step.get("expected_path") if isinstance(step, dict) else None
+        if expected is None or tree.get_id(expected) is None:
+            issues.append(("warning", f"steps[{i}]", f"expected_path not in intervention tree: {expected}"))
+
+    # prerequisite cycles need the whole graph; only meaningful once paths resolve
+    if not any(severity == "error" for severity, _, _ in issues):
+        try:
+            compile_scenario(scenario, tree)
+        except (ValueError, KeyError, TypeError) as e:
+            issues.append(("error", "", str(e)))
+    return issues
+
+
+def _lint_row(row: Dict[str, Any], where: str, tree: CompiledTree,
+              issues: List[Issue]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Check one row's required and harmful paths; returns {path id: entry index} for each."""
+    required: Dict[int, int] = {}
+    entries = row.get("required_paths", [])
+    for i, rp in enumerate(entries):
+        loc = f"{where}required_paths[{i}]"
+        path = rp.get("path") if isinstance(rp, dict) else None
+        if not isinstance(path, list):
+            issues.append(("error", loc, "entry has no \"path\" list"))
+            continue
+        pid = tree.get_id(path)
+        if pid is None:
+            issues.append(("error", loc, f"path not in intervention tree: {path}"))
+        elif not tree.is_leaf(pid):
+            issues.append(("error", loc, f"path stops at a menu and can never be selected: {path}"))
+        elif pid in required:
+            issues.append(("warning", loc, f"duplicate of required_paths[{required[pid]}]"))
+        else:
+            required[pid] = i
+
+    harmful: Dict[int, int] = {}
+    for i, path in enumerate(row.get("harmful_paths", [])):
+        loc = f"{where}harmful_paths[{i}]"
+        pid = tree.get_id(path) if isinstance(path, list) else None
+        if pid is None:
+            issues.append(("error", loc, f"path not in intervention tree: {path}"))
+        elif pid in harmful:
+            issues.append(("warning", loc, f"duplicate of harmful_paths[{harmful[pid]}]"))
+        else:
+            harmful[pid] = i
+            if pid in required:
+                issues.append(("error", loc, f"also required (required_paths[{required[pid]}]); "
+                                             "completing the scenario means failing it"))
+
+    for i, rp in enumerate(entries):
+        for before in (rp.get("after", []) if isinstance(rp, dict) else []):
+            pid = tree.get_id(before) if isinstance(before, list) else None
+            if pid not in required:
+                issues.append(("error", f"{where}required_paths[{i}].after",
+                               f"prerequisite is not a required path: {before}"))
+    return required, harmful
+
+
+def lint_file(path: str) -> Tuple[str, List[Issue]]:
+    """Return (sha1 of the content, issues) for one scenario file."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+    try:
+        scenario = json.loads(raw)
+    except ValueError as e:
+        return digest, [("error", "", f"invalid JSON: {e}")]
+    return digest, lint_scenario(scenario)
+
+
+# ---------- directory ----------
+def lint_directory(directory: str, workers: int | None = None,
+                   cache_dir: str | None = None) -> Dict[str, List[Issue]]:
+    """
+    Lint every ``*.json`` file in ``directory``; returns {file name: issues}.
+
+    :param workers: pool size for uncached files; defaults to os.cpu_count()
+    """
+    cache_dir = cache_dir or os.path.join(directory, ".cache")
+    cache_path = os.path.join(cache_dir, CACHE_FILE)
+    key = (LINT_VERSION, COMPILED_TREE.fingerprint)
+    cached = _read_cache(cache_path, key)
+
+    entries: Dict[str, Tuple[Tuple[int, int], str, List[Issue]]] = {}
+    stale: List[Tuple[str, Tuple[int, int]]] = []
+    with os.scandir(directory) as it:
+        for de in sorted(it, key=lambda d: d.name):
+            if not de.name.endswith(".json") or not de.is_file():
+                continue
+            st = de.stat()
+            stat = (st.st_mtime_ns, st.st_size)
+            hit = cached.get(de.name)
+            if hit is not None and hit[0] == stat:
+                entries[de.name] = hit
+            else:
+                stale.append((de.name, stat))
+
+    # touched-but-unchanged files only need a hash, not a re-lint
+    todo = []
+    for name, stat in stale:
+        hit = cached.get(name)
+        if hit is not None:
+            with open(os.path.join(directory, name), "rb") as f:
+                if hashlib.sha1(f.read()).hexdigest() == hit[1]:
+                    entries[name] = (stat, hit[1], hit[2])
+                    continue
+        todo.append((name, stat))
+
+    paths = [os.path.join(directory, name) for name, _ in todo]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < POOL_THRESHOLD:
+        results = list(map(lint_file, paths))
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing; pool runs only
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lint_file, paths, chunksize=max(1, len(paths) // (4 * workers))))
+    for (name, stat), (digest, issues) in zip(todo, results):
+        entries[name] = (stat, digest, issues)
+
+    if stale or entries.keys() != cached.keys():
+        _write_cache(cache_dir, cache_path, (key, entries))
+    return {name: entries[name][2] for name in sorted(entries)}
+
+
+def _read_cache(path: str, key) -> Dict[str, Any]:
+    try:
+        with open(path, "rb") as f:
+            cached_key, entries = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+        return {}
+    return entries if cached_key == key else {}
+
+
+def _write_cache(cache_dir: str, path: str, obj):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only checkouts just lint uncached
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Lint SimuCare scenario files.")
+    parser.add_argument("directory", nargs="?", default="scenarios", help="scenario directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    args = parser.parse_args(argv)
+
+    results = lint_directory(args.directory, workers=args.workers)
+    counts = {"error": 0, "warning": 0}
+    for name, issues in results.items():
+        for severity, location, message in issues:
+            counts[severity] += 1
+            where = f"{name}:{location}" if location else name
+            print(f"{os.path.join(args.directory, where)}: {severity}: {message}")
+    print(f"{len(results)} scenario(s), {counts['error']} error(s), {counts['warning']} warning(s)",
+          file=sys.stderr)
+    return 1 if counts["error"] or (args.strict and counts["warning"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
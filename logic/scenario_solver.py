@@ -0,0 +1,326 @@
+"""
+Scenario solver and expert reference generator.
+
+For each scenario it finds the shortest valid action sequence and reports:
+
+  plan      every required path in an order that respects prerequisites,
+            never touches a harmful path, and switches patient as rarely
+            as it can; replayed through a real Session to prove it completes
+  clicks    mouse clicks the plan takes: a path at depth d costs d clicks
+            (its category button, then one modal click per level below),
+            and a patient switch costs one
+  states    how many distinct progress states a trainee can reach (sets of
+            completed required paths that respect prerequisites); exact up
+            to ``state_limit`` per prerequisite component, a lower bound past it
+  leaves    how the tree's leaves split into required, harmful and decoy
+  expert    reference timings from the keystroke-level model, to compare
+            trainees' response times against
+
+Every action starts again from the category buttons, so a path's cost does
+not depend on what came before it: any prerequisite-respecting order has the
+minimal click count, and the search that matters is over progress states.
+Prerequisite components are independent, so states are counted per component
+(memoized over completion bitmasks) and multiplied. Row results are memoized
+by prerequisite shape, which identical patient protocols share.
+
+Directories are solved in a process pool past POOL_THRESHOLD files.
+
+Usage:
+    python -m logic.scenario_solver scenarios
+    python -m logic.scenario_solver scenarios/medical_sample.json --plan expert.jsonl
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+import argparse
+import heapq
+import json
+import os
+import sys
+
+from logic.batch_grader import replay_session
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+from logic.scenario_engine import MultiPatientIndex, ScenarioIndex, compile_scenario
+from logic.session import Session
+
+# keystroke-level model (Card, Moran & Newell): mental preparation before each
+# action, and pointing plus a button press and release per click
+MENTAL_S = 1.35
+CLICK_S = 1.1 + 0.2
+
+STATE_LIMIT = 100_000
+# below this many files, solving in-process beats starting a pool
+POOL_THRESHOLD = 16
+
+Successors = Tuple[Tuple[int, ...], ...]
+
+
+# ---------- per-row search ----------
+@lru_cache(maxsize=256)
+def _solve_row(successors: Successors, state_limit: int) -> Tuple[Tuple[int, ...], int, bool]:
+    """(slot order, reachable states, exact?) for one row's prerequisite DAG."""
+    n = len(successors)
+    waiting = [0] * n
+    for nxts in successors:
+        for t in nxts:
+            waiting[t] += 1
+
+    # topological order, keeping the authored order wherever prerequisites allow
+    order = []
+    ready = [s for s in range(n) if not waiting[s]]
+    pending = list(waiting)
+    while ready:
+        slot = heapq.heappop(ready)
+        order.append(slot)
+        for t in successors[slot]:
+            pending[t] -= 1
+            if not pending[t]:
+                heapq.heappush(ready, t)
+
+    states, exact = 1, True
+    for component in _components(successors):
+        if len(component) == 1:
+            states *= 2
+        elif all(len(successors[s]) <= 1 and waiting[s] <= 1 for s in component):
+            states *= len(component) + 1  # a chain: done up to some point
+        else:
+            count, ok = _count_states(component, successors, state_limit)
+            states *= count
+            exact = exact and ok
+    return tuple(order), states, exact
+
+
+def _components(successors: Successors) -> List[List[int]]:
+    """Weakly connected components of the prerequisite DAG."""
+    parent = list(range(len(successors)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for s, nxts in enumerate(successors):
+        for t in nxts:
+            parent[find(s)] = find(t)
+    groups: Dict[int, List[int]] = {}
+    for s in range(len(successors)):
+        groups.setdefault(find(s), []).append(s)
+    return list(groups.values())
+
+
+def _count_states(component: List[int], successors: Successors, limit: int) -> Tuple[int, bool]:
+    """Completion sets of one component reachable by doing unlocked steps; stops past ``limit``."""
+    local = {s: i for i, s in enumerate(component)}
+    needs = [0] * len(component)  # bitmask of prerequisites per step
+    for s in component:
+        for t in successors[s]:
+            needs[local[t]] |= 1 << local[s]
+
+    seen = {0}
+    stack = [0]
+    while stack:
+        state = stack.pop()
+        for i, mask in enumerate(needs):
+            bit = 1 << i
+            if state & bit or mask & ~state:
+                continue
+            nxt = state | bit
+            if nxt not in seen:
+                seen.add(nxt)
+                if len(seen) > limit:
+                    return len(seen), False
+                stack.append(nxt)
+    return len(seen), True
+
+
+# ---------- scenarios ----------
+def solve_scenario(scenario: Dict[str, Any], index=None, tree: CompiledTree = COMPILED_TREE,
+                   state_limit: int = STATE_LIMIT) -> Dict[str, Any]:
+    """
+    Solve one parsed scenario; returns a JSON-ready dict. ``plan`` is a
+    batch_grader action list ({"path", "t", and "patient" when switching})
+    timed at expert pace.
+    """
+    index = index if index is not None else compile_scenario(scenario, tree)
+    multi = isinstance(index, MultiPatientIndex)
+    rows: List[ScenarioIndex] = index.rows if multi else [index]
+    problems: List[str] = []
+
+    def name(pid: int) -> str:
+        return " > ".join(tree.path_of(pid))
+
+    states, exact = 1, True
+    orders = []
+    for ix in rows:
+        order, n, ok = _solve_row(ix.successors, state_limit)
+        orders.append([ix.paths[s] for s in order])
+        states *= n
+        exact = exact and ok
+
+    # (active patient, path id); the engine checks harmful paths before required ones
+    steps: List[Tuple[int, int]] = []
+    if not multi:
+        problems += [f"required path is also harmful: {name(p)}" for p in orders[0] if p in index.harmful]
+        steps = [(0, p) for p in orders[0]]
+    else:
+        scene, active = rows[0], 0
+        for pid in orders[0]:
+            allowed = [p for p in range(len(index.names)) if pid not in rows[p + 1].harmful]
+            if pid in scene.harmful or not allowed:
+                problems.append(f"scene path is harmful for every patient: {name(pid)}")
+                continue
+            if active not in allowed:
+                active = allowed[0]
+            steps.append((active, pid))
+        # finish the patient already selected before switching away
+        for p in sorted(range(len(index.names)), key=lambda p: p != active):
+            for pid in orders[p + 1]:
+                if pid in rows[p + 1].harmful or pid in scene.harmful:
+                    problems.append(f"{index.names[p]}: required path is also harmful: {name(pid)}")
+                else:
+                    steps.append((p, pid))
+
+    # expert timeline: the scenario prompt shows at 0, and every outcome is the next prompt
+    plan: List[Dict[str, Any]] = []
+    clicks = switches = 0
+    t = 0.0
+    active = 0
+    by_category: Dict[str, List[float]] = {}
+    for patient, pid in steps:
+        action: Dict[str, Any] = {"path": pid}
+        if patient != active:
+            active = patient
+            switches += 1
+            clicks += 1
+            t += MENTAL_S + CLICK_S
+            action["patient"] = patient
+        depth = tree.depth[pid]
+        clicks += depth
+        response = MENTAL_S + depth * CLICK_S
+        t += response
+        action["t"] = round(t, 3)
+        plan.append(action)
+        by_category.setdefault(tree.labels[tree.category[pid]], []).append(response)
+
+    if not problems:
+        summary = replay_session(scenario, plan, index=index)
+        if summary["scenario_failed"] or summary["total_points"] < summary["total_possible"]:
+            if t > Session.DURATION:
+                problems.append(f"needs {t:.0f} s at expert pace; the limit is {Session.DURATION} s")
+            else:
+                problems.append(f"plan completes {summary['total_points']} of "
+                                f"{summary['total_possible']} required paths")
+
+    required = {p for ix in rows for p in ix.required}
+    harmful = {p for ix in rows for p in ix.harmful}
+    leaves = tree.leaf_ids()
+    all_responses = [r for rs in by_category.values() for r in rs]
+    return {
+        "title": scenario.get("title", ""),
+        "solvable": not problems,
+        "problems": problems,
+        "steps": len(steps),
+        "clicks": clicks,
+        "patient_switches": switches,
+        "states": states,
+        "states_exact": exact,
+        "leaves": {
+            "total": len(leaves),
+            "required": sum(1 for p in leaves if p in required),
+            "harmful": sum(1 for p in leaves if p in harmful),
+            "decoy": sum(1 for p in leaves if p not in required and p not in harmful),
+        },
+        "expert": {
+            "total_s": round(t, 3),
+            "response_mean_s": round(sum(all_responses) / len(all_responses), 3) if all_responses else 0.0,
+            "response_by_category_s": {c: round(sum(rs) / len(rs), 3) for c, rs in by_category.items()},
+        },
+        "plan": [dict(a, path=list(tree.path_of(a["path"]))) for a in plan],
+    }
+
+
+def solve_file(path: str) -> Dict[str, Any]:
+    """Solve one scenario file; unreadable or uncompilable files come back unsolvable."""
+    try:
+        with open(path, "rb") as f:
+            scenario = json.load(f)
+        if not isinstance(scenario, dict):
+            raise TypeError("scenario must be a JSON object")
+        return solve_scenario(scenario)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return {"title": "", "solvable": False, "problems": [str(e)]}
+
+
+def solve_directory(directory: str, workers: int | None = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Solve every ``*.json`` file in ``directory``; returns {file name: result}.
+
+    :param workers: pool size; defaults to os.cpu_count()
+    """
+    names = sorted(n for n in os.listdir(directory)
+                   if n.endswith(".json") and os.path.isfile(os.path.join(directory, n)))
+    paths = [os.path.join(directory, n) for n in names]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < POOL_THRESHOLD:
+        results = list(map(solve_file, paths))
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing; pool runs only
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(solve_file, paths, chunksize=max(1, len(paths) // (4 * workers))))
+    return dict(zip(names, results))
+
+
+def _format_count(n: int) -> str:
+    """Thousands separators, or scientific notation for counts too large for a float."""
+    if n < 10 ** 12:
+        return f"{n:,}"
+    digits = str(n)
+    return f"{digits[0]}.{digits[1:3]}e{len(digits) - 1}"
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Solve SimuCare scenarios and report expert references.")
+    parser.add_argument("targets", nargs="*", default=["scenarios"], help="scenario files or directories")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--json", action="store_true", help="print full results as JSON")
+    parser.add_argument("--plan", help="write each expert plan as batch_grader session JSONL")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for target in args.targets:
+        if os.path.isdir(target):
+            found = solve_directory(target, workers=args.workers)
+            results.update({os.path.join(target, n): r for n, r in found.items()})
+        else:
+            results[target] = solve_file(target)
+
+    if args.plan:
+        with open(args.plan, "w") as f:
+            for path, r in results.items():
+                if r["solvable"]:
+                    f.write(json.dumps({"session_id": f"expert:{os.path.basename(path)}",
+                                        "actions": r["plan"]}) + "\n")
+
+    if args.json:
+        print(json.dumps({p: {k: v for k, v in r.items() if k != "plan"} for p, r in results.items()},
+                         indent=2))
+    else:
+        for path, r in results.items():
+            if not r["solvable"]:
+                print(f"{path}: UNSOLVABLE")
+                for problem in r["problems"]:
+                    print(f"  {problem}")
+                continue
+            states = ("" if r["states_exact"] else ">= ") + _format_count(r["states"])
+            leaves = r["leaves"]
+            print(f"{path}: {r['steps']} steps, {r['clicks']} clicks, "
+                  f"{r['patient_switches']} patient switches, {states} reachable states")
+            print(f"  leaves: {leaves['required']} required, {leaves['harmful']} harmful, "
+                  f"{leaves['decoy']} decoy of {leaves['total']}")
+            print(f"  expert: {r['expert']['total_s']:.1f} s total, "
+                  f"{r['expert']['response_mean_s']:.2f} s mean response")
+    return 0 if all(r["solvable"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
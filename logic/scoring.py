@@ -1,35 +1,130 @@
-from typing import List, Dict, Any
-import time
+from array import array
+from typing import List, Dict, Any, Tuple
+import math
+
+from logic import metrics
+from logic.clock import Clock
+from logic.event_log import RESULTS, EventWriter
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
+
+class ResponseTimeHistogram:
+    """
+    Streaming log-bucketed histogram for response times.
+
+    Buckets grow by 10% from 10 ms, so percentiles are within ~5% of the true
+    value; add() is O(1) and percentile() scans a fixed number of buckets.
+    """
+    MIN = 0.01       # seconds; anything faster lands in bucket 0
+    GROWTH = 1.1
+    BUCKETS = 150    # 0.01 s * 1.1**149 ≈ 14 hours
+    _LOG_GROWTH = math.log(GROWTH)
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = array("I", bytes(4 * self.BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        if seconds <= self.MIN:
+            bucket = 0
+        else:
+            bucket = min(int(math.log(seconds / self.MIN) / self._LOG_GROWTH) + 1, self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.MIN * self.GROWTH ** bucket, self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
 
 class Scoring:
     """
     Scoring for the flat scenario format:
       • +1 for each required path completed
       • 0 accuracy if any harmful action chosen
-      • Tracks timing and history
+      • Response time runs from when a prompt is shown to when the next action
+        is submitted
+      • All stats are running aggregates updated in O(1) per action; per-action
+        history goes to the optional event log instead of memory
     """
-    def __init__(self, total_required: int):
+    __slots__ = ("total_required", "clock", "event_log", "tree", "completed", "harmful",
+                 "_completed_set", "_harmful_set", "actions", "result_counts",
+                 "category_counts", "response_times", "_prompt_shown_at", "_stride")
+
+    def __init__(self, total_required: int, clock: Clock | None = None,
+                 event_log: EventWriter | None = None, tree: CompiledTree = COMPILED_TREE):
         self.total_required = total_required
-        self.completed: List[List[str]] = []
-        self.harmful: List[List[str]] = []
-        self.records: List[Dict[str, Any]] = []
-        self._start_times: Dict[str, float] = {}  # key: str(path) for timing
-
-    def start_action(self, path: List[str]):
-        self._start_times[str(path)] = time.time()
-
-    def record_action(self, path: List[str], result: str):
-        elapsed = time.time() - self._start_times.get(str(path), time.time())
-        self.records.append({
-            "path": path,
-            "result": result,
-            "time_taken": elapsed
-        })
+        self.clock = clock or Clock()
+        self.event_log = event_log
+        self.tree = tree
+        self._stride = len(tree)  # set keys are patient * stride + path id
+        self.completed: List[int] = []
+        self.harmful: List[int] = []
+        self._completed_set = set()
+        self._harmful_set = set()
+
+        self.actions = 0
+        self.result_counts: Dict[str, int] = {"required": 0, "harmful": 0, "unknown": 0,
+                                                  "out_of_order": 0}
+        self.category_counts: Dict[int, int] = {}  # key: category node id
+        self.response_times = ResponseTimeHistogram()
+        self._prompt_shown_at: float | None = None
+
+    def prompt_shown(self, now: float | None = None):
+        """Mark the moment the trainee was shown a prompt; the next action is timed from here."""
+        self._prompt_shown_at = self.clock.now() if now is None else now
+
+    @metrics.timed("scoring.record_action")
+    def record_action(self, path: int, result: str, patient: int = 0, now: float | None = None,
+                      row: int | None = None):
+        """
+        :param patient: patient row for multi-patient scenarios (0 otherwise); the
+                        same path completed for two patients scores twice
+        :param now: clock time the action was taken, if it is recorded later (default now)
+        :param row: row the engine charged the outcome to, when not ``patient``
+                    (0 for scene-level paths), so a scene path counts once
+        """
+        if now is None:
+            now = self.clock.now()
+        elapsed = now - self._prompt_shown_at if self._prompt_shown_at is not None else 0.0
+        self._prompt_shown_at = None
+
+        self.actions += 1
+        self.result_counts[result] = self.result_counts.get(result, 0) + 1
+        if self.tree.contains(path):
+            category = self.tree.category[path]
+            self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        self.response_times.add(elapsed)
+        if self.event_log is not None:
+            origin = self.clock.origin
+            self.event_log.append(now - origin if origin is not None else 0.0, path, result, elapsed, patient)
+
+        key = (patient if row is None else row) * self._stride + path
         if result == "required":
-            if path not in self.completed:
+            if key not in self._completed_set:
+                self._completed_set.add(key)
                 self.completed.append(path)
         elif result == "harmful":
-            if path not in self.harmful:
+            if key not in self._harmful_set:
+                self._harmful_set.add(key)
                 self.harmful.append(path)
 
     def summary(self) -> Dict[str, Any]:
@@ -39,6 +134,7 @@ class Scoring:
         accuracy = 0.0 if scenario_failed else (
             total_points / total_possible if total_possible else 0.0
         )
+        rt = self.response_times
         return {
             "completed_paths": self.completed,
             "harmful_paths": self.harmful,
@@ -46,6 +142,67 @@ class Scoring:
             "total_possible": total_possible,  # NEW
             "accuracy": accuracy,
             "scenario_failed": scenario_failed,
-            "records": self.records.copy()
+            "actions": self.actions,
+            "result_counts": dict(self.result_counts),
+            "category_counts": {
+                self.tree.labels[c]: n for c, n in self.category_counts.items()
+            },
+            "response_time": {
+                "mean": rt.mean(),
+                "p50": rt.percentile(50),
+                "p90": rt.percentile(90),
+                "p99": rt.percentile(99),
+                "max": rt.max,
+            },
         }
 
+    # ---------- snapshots ----------
+    def snapshot(self, origin: float) -> Tuple[List[int], List[float]]:
+        """
+        Running state as (ints, floats) for logic.snapshot. Sizes depend on the
+        scenario (distinct completions, categories, histogram buckets), never on
+        the number of actions. ``origin`` is the clock origin, so the pending
+        prompt time is stored relative to the session start.
+        """
+        rt = self.response_times
+        ints = [self.actions, *(self.result_counts.get(r, 0) for r in RESULTS),
+                len(self.category_counts)]
+        for category, n in self.category_counts.items():
+            ints += (category, n)
+        ints += (rt.count, *rt.counts)
+        ints += (len(self.completed), *self.completed, *self._completed_set)
+        ints += (len(self.harmful), *self.harmful, *self._harmful_set)
+        shown = self._prompt_shown_at - origin if self._prompt_shown_at is not None else math.nan
+        return ints, [rt.total, rt.max, shown]
+
+    def max_snapshot_ints(self, max_harmful: int) -> int:
+        """Upper bound on len(ints) from snapshot(); ``max_harmful`` bounds distinct harmful keys."""
+        categories = len(self.tree.children(0)) + 1
+        return (3 + len(RESULTS) + 2 * categories + 1 + ResponseTimeHistogram.BUCKETS
+                + 2 * self.total_required + 2 * max_harmful)
+
+    def restore(self, ints, floats, origin: float, pos: int = 0) -> int:
+        """Rebuild state from snapshot() output starting at ``pos``; returns the next int position."""
+        self.actions = ints[pos]
+        pos += 1
+        self.result_counts = {r: ints[pos + i] for i, r in enumerate(RESULTS)}
+        pos += len(RESULTS)
+        n = ints[pos]
+        pairs = ints[pos + 1:pos + 1 + 2 * n]
+        self.category_counts = dict(zip(pairs[::2], pairs[1::2]))
+        pos += 1 + 2 * n
+
+        rt = self.response_times = ResponseTimeHistogram()
+        rt.count = ints[pos]
+        rt.counts[:] = array("I", ints[pos + 1:pos + 1 + rt.BUCKETS])
+        pos += 1 + rt.BUCKETS
+        rt.total, rt.max, shown = floats[0], floats[1], floats[2]
+        self._prompt_shown_at = None if math.isnan(shown) else origin + shown
+
+        for items, keys in ((self.completed, self._completed_set), (self.harmful, self._harmful_set)):
+            n = ints[pos]
+            items[:] = ints[pos + 1:pos + 1 + n]
+            keys.clear()
+            keys.update(ints[pos + 1 + n:pos + 1 + 2 * n])
+            pos += 1 + 2 * n
+        return pos
@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Tuple
+
+from logic.action_handler import ActionHandler
+from logic.clock import Clock
+from logic.event_log import EventWriter
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+from logic.scenario_engine import create_engine
+from logic.scoring import Scoring
+
+
+class Session:
+    """
+    One trainee's run through a scenario: engine, scoring and action handler
+    wired together. The dashboard and headless replays both go through
+    submit(), so they grade identically.
+
+    All parts share one clock. Pass a VirtualClock to run without wall time.
+    Scenarios that declare "patients" get a MultiPatientEngine; ``index`` is
+    whatever compile_scenario() returned for the scenario.
+    """
+    DURATION = 600  # seconds
+
+    __slots__ = ("scenario", "clock", "duration", "ended", "engine", "scoring", "action_handler")
+
+    def __init__(self, scenario: Dict[str, Any], index=None,
+                 tree: CompiledTree = COMPILED_TREE, clock: Clock | None = None,
+                 event_log: EventWriter | None = None, duration: float = DURATION):
+        self.scenario = scenario
+        self.clock = clock or Clock()
+        self.duration = duration
+        self.ended = False
+        self.engine = create_engine(scenario, index=index, tree=tree, clock=self.clock)
+        self.scoring = Scoring(total_required=self.engine.index.total_required, clock=self.clock,
+                               event_log=event_log, tree=tree)
+        self.action_handler = ActionHandler(scenario, tree)
+
+    def start(self):
+        self.engine.start()
+        self.scoring.prompt_shown()  # the scenario description is the first prompt
+
+    @property
+    def n_patients(self) -> int:
+        return self.engine.n_patients
+
+    def select_patient(self, patient: int, now: float | None = None):
+        """Switch the active patient in a multi-patient scenario."""
+        self.engine.select_patient(patient)
+        self.scoring.prompt_shown(now)
+
+    def elapsed(self) -> float:
+        return self.clock.elapsed()
+
+    def time_remaining(self) -> float:
+        return max(0.0, self.duration - self.clock.elapsed())
+
+    def end(self):
+        """Stop accepting actions, e.g. when the trainee ends the scenario."""
+        self.ended = True
+
+    def is_over(self) -> bool:
+        return self.ended or self.time_remaining() == 0.0
+
+    def submit(self, path_id: int, now: float | None = None) -> Dict[str, Any]:
+        """
+        Run one action through the engine and scoring; returns the engine outcome.
+        Actions after the session is over are not scored and return "expired".
+
+        :param now: clock time the action was taken, when it is applied later
+                    than that (the dashboard applies actions on a worker thread)
+        """
+        if now is None:
+            now = self.clock.now()
+        origin = self.clock.origin
+        if self.ended or (origin is not None and now - origin >= self.duration):
+            return {"result": "expired", "prompt": None}
+        result = self.engine.process_action(path_id)
+        row = self.engine.active_row
+        if result["result"] == "harmful":
+            self.scoring.record_action(path_id, "harmful", row, now, self.engine.harmful_row(path_id))
+        else:
+            self.scoring.record_action(path_id, result["result"], row, now)
+        # the outcome is shown right away and becomes the next prompt
+        self.scoring.prompt_shown(now)
+        return result
+
+    def is_completed(self) -> bool:
+        return self.engine.is_completed()
+
+    def scenario_failed(self) -> bool:
+        return self.engine.scenario_failed() or bool(self.scoring.harmful)
+
+    def summary(self) -> Dict[str, Any]:
+        summary = self.scoring.summary()
+        if self.n_patients > 1:
+            summary["patients"] = [
+                dict(zip(("name", "completed", "total"),
+                         (name, *self.engine.patient_progress(p))))
+                for p, name in enumerate(self.engine.index.names)
+            ]
+        return summary
+
+    # ---------- snapshots ----------
+    def snapshot(self) -> Tuple[List[int], List[float]]:
+        """Full progress as (ints, floats), sized by the scenario rather than the action count."""
+        origin = self.clock.origin if self.clock.origin is not None else self.clock.now()
+        scoring_ints, scoring_floats = self.scoring.snapshot(origin)
+        ints = [int(self.ended), self.action_handler.current_step, *self.engine.snapshot(), *scoring_ints]
+        return ints, [self.clock.elapsed(), *scoring_floats]
+
+    def max_snapshot_ints(self) -> int:
+        """Upper bound on len(ints) from snapshot()."""
+        index = self.engine.index
+        if self.n_patients > 1:
+            # scoring keys harmful paths by the row the engine charged them to
+            max_harmful = sum(len(ix.harmful) for ix in index.rows)
+        else:
+            max_harmful = len(index.harmful)
+        return 2 + self.engine.max_snapshot_ints() + self.scoring.max_snapshot_ints(max_harmful)
+
+    def restore(self, ints, floats):
+        """Resume from snapshot() output; the clock continues from the saved elapsed time."""
+        self.clock.resume(floats[0])
+        self.engine.start_time = self.clock.origin
+        self.ended = bool(ints[0])
+        self.action_handler.current_step = ints[1]
+        pos = self.engine.restore(ints, 2)
+        self.scoring.restore(ints, floats[1:], self.clock.origin, pos)
+
+    def close(self):
+        """Flush and close the event log, if any."""
+        if self.scoring.event_log is not None:
+            self.scoring.event_log.close()
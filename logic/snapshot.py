@@ -0,0 +1,198 @@
+"""
+Crash-safe session snapshots.
+
+A snapshot file sits next to the session's event log (same name, ``.snap``)
+and holds two fixed-size slots after a 128-byte header:
+
+    header: magic b"SCSN", u16 version, u32 slot size, 54-byte scenario id (utf-8, NUL padded),
+            20-byte sha1 of the tree fingerprint, 20-byte scenario digest
+    slot:   u64 sequence, f64 wall time, u32 int count, u32 float count, u32 crc32 of the payload,
+            payload: int count i64 values, then float count f64 values, zero padded
+
+Each checkpoint overwrites the older slot in place with the session's full
+progress (Session.snapshot(): a few hundred bytes whose size depends on the
+scenario, not on how many actions were taken), so a write is one small
+pwrite and never a rewrite of the file. A crash mid-write leaves a slot
+whose crc fails and the other, previous slot intact, so reads always see a
+complete state. Restoring reads the two slots and unpacks the newer valid
+one: constant time for any session length.
+
+The ints are path ids and slots of the tree and scenario the session ran
+on, so find_resumable() only offers snapshots whose header matches the
+current tree and compiled scenario (scenario_engine.scenario_digest()).
+Version 1 files (64-byte header, no fingerprints) are still read, for
+replays, but never resumed.
+
+Writes reach the OS immediately; fdatasync runs at most every
+``sync_interval`` seconds, so checkpoints cost microseconds and survive an
+app crash, while a power cut loses at most that interval.
+"""
+from array import array
+from typing import Callable, List, Tuple
+import os
+import struct
+import time
+import zlib
+
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
+MAGIC = b"SCSN"
+VERSION = 2
+HEADER = struct.Struct("<4sHI54s20s20s")
+FILE_HEADER_SIZE = 128
+HEADER_V1 = struct.Struct("<4sHI54s")
+FILE_HEADER_SIZE_V1 = 64
+SLOT_HEADER = struct.Struct("<QdIII")
+SUFFIX = ".snap"
+
+
+class SnapshotWriter:
+    def __init__(self, path: str, slot_ints: int, slot_floats: int = 8, scenario_id: str = "",
+                 sync_interval: float = 1.0, tree: CompiledTree = COMPILED_TREE,
+                 scenario_digest: str = ""):
+        """
+        :param slot_ints: most ints a snapshot can hold (Session.max_snapshot_ints())
+        :param slot_floats: most floats a snapshot can hold
+        :param scenario_digest: scenario_digest() of the session's compiled scenario
+        """
+        self.path = path
+        self.slot_size = SLOT_HEADER.size + 8 * (slot_ints + slot_floats)
+        self.sync_interval = sync_interval
+        self.seq = 0
+        self._last_sync = time.monotonic()
+
+        header = HEADER.pack(MAGIC, VERSION, self.slot_size, scenario_id.encode()[:54],
+                             bytes.fromhex(tree.fingerprint), bytes.fromhex(scenario_digest or "0" * 40))
+        header = header.ljust(FILE_HEADER_SIZE, b"\0")
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        existing = read_snapshot(path)
+        if existing is not None and os.pread(self._fd, FILE_HEADER_SIZE, 0) == header:
+            self.seq = existing[2]  # continue a resumed session's sequence
+        else:
+            os.ftruncate(self._fd, 0)
+            os.pwrite(self._fd, header + bytes(2 * self.slot_size), 0)
+
+    def write(self, ints: List[int], floats: List[float]):
+        """Checkpoint one (ints, floats) state into the older slot."""
+        payload = array("q", ints).tobytes() + array("d", floats).tobytes()
+        if SLOT_HEADER.size + len(payload) > self.slot_size:
+            raise ValueError(f"Snapshot of {len(payload)} bytes exceeds slot size {self.slot_size}")
+        self.seq += 1
+        slot = SLOT_HEADER.pack(self.seq, time.time(), len(ints), len(floats), zlib.crc32(payload))
+        os.pwrite(self._fd, slot + payload, FILE_HEADER_SIZE + (self.seq & 1) * self.slot_size)
+
+        now = time.monotonic()
+        if now - self._last_sync >= self.sync_interval:
+            os.fdatasync(self._fd)
+            self._last_sync = now
+
+    def close(self):
+        if self._fd >= 0:
+            os.fdatasync(self._fd)
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_snapshot(path: str):
+    """
+    Newest valid state in a snapshot file as
+    (scenario_id, slot_size, seq, wall_time, ints, floats), or None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    header = _parse_header(data)
+    if header is None:
+        return None
+    version, slot_size, scenario_id, _, _ = header
+    header_size = FILE_HEADER_SIZE if version == VERSION else FILE_HEADER_SIZE_V1
+
+    best = None
+    for k in range(2):
+        offset = header_size + k * slot_size
+        if len(data) < offset + slot_size:
+            continue
+        seq, wall, n_ints, n_floats, crc = SLOT_HEADER.unpack_from(data, offset)
+        start = offset + SLOT_HEADER.size
+        payload = data[start:start + 8 * (n_ints + n_floats)]
+        if seq == 0 or zlib.crc32(payload) != crc or (best is not None and seq <= best[0]):
+            continue
+        ints = array("q", payload[:8 * n_ints])
+        floats = array("d", payload[8 * n_ints:])
+        best = (seq, wall, ints, floats)
+    if best is None:
+        return None
+    return (scenario_id, slot_size, *best)
+
+
+def read_header(path: str) -> Tuple[int, str, str | None, str | None] | None:
+    """
+    (version, scenario id, tree fingerprint, scenario digest) of a snapshot
+    file, or None if it is not one; both hashes are None for version 1 files.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(FILE_HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    header = _parse_header(data)
+    if header is None:
+        return None
+    version, _, scenario_id, fingerprint, digest = header
+    return version, scenario_id, fingerprint, digest
+
+
+def _parse_header(data: bytes):
+    if len(data) >= FILE_HEADER_SIZE_V1 and data[:4] == MAGIC:
+        version = struct.unpack_from("<H", data, 4)[0]
+        if version == 1:
+            _, _, slot_size, scenario_id = HEADER_V1.unpack_from(data)
+            return 1, slot_size, scenario_id.rstrip(b"\0").decode(), None, None
+        if version == VERSION and len(data) >= FILE_HEADER_SIZE:
+            _, _, slot_size, scenario_id, fingerprint, digest = HEADER.unpack_from(data)
+            return VERSION, slot_size, scenario_id.rstrip(b"\0").decode(), fingerprint.hex(), digest.hex()
+    return None
+
+
+def find_resumable(directory: str, duration: float = float("inf"),
+                   max_age: float = 24 * 3600.0, digest_of: Callable[[str], str | None] | None = None,
+                   tree: CompiledTree = COMPILED_TREE) -> Tuple[str, tuple] | None:
+    """
+    Most recent snapshot in ``directory`` of a session that was neither ended
+    nor past ``duration`` seconds, written within ``max_age`` seconds against
+    ``tree``; returns (path, read_snapshot() result).
+
+    :param digest_of: scenario_digest() of the scenario with a given id as it
+                      is now, or None if it is gone; snapshots whose digest
+                      differs are skipped
+    """
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(SUFFIX)]
+    except FileNotFoundError:
+        return None
+    candidates = []
+    for name in names:
+        path = os.path.join(directory, name)
+        candidates.append((os.path.getmtime(path), path))
+    for mtime, path in sorted(candidates, reverse=True):
+        if time.time() - mtime > max_age:
+            break
+        snap = read_snapshot(path)
+        # Session.snapshot() puts ended first among the ints and elapsed first among the floats
+        if snap is None or snap[4][0] or snap[5][0] >= duration:
+            continue
+        _, scenario_id, fingerprint, digest = read_header(path)
+        if fingerprint != tree.fingerprint:
+            continue  # version 1, or recorded against another tree
+        if digest_of is not None and digest_of(scenario_id) != digest:
+            continue
+        return path, snap
+    return None
@@ -0,0 +1,240 @@
+"""
+Vectorized vitals simulator.
+
+Patient state lives in NumPy arrays with one row per patient and one column
+per vital (HR, RR, SBP, DBP, SpO2). Vitals at time ``t`` are computed directly
+from the patient's baseline, a linear trend and the sum of every active
+intervention effect. Nothing is integrated step by step, so a tick costs the
+same at any speed and replays are deterministic.
+
+Each intervention maps to an effect kind with an onset and decay time
+constant and a per-vital magnitude:
+
+    response(t) = (1 - exp(-t / onset)) * exp(-t / decay)
+
+Sustained effects (oxygen) use decay = inf and plateau; boluses (epinephrine)
+rise and wear off. A patient has at most one effect of each sustained kind:
+repeating an intervention that is already running does not stack it again. Active effects are stored as parallel arrays, so one
+step() updates every patient with a handful of array operations.
+
+Scenario JSON may declare baseline physiology and a per-second trend:
+
+    "vitals": {"baseline": {"hr": 114, "spo2": 92, ...}, "trend": {"spo2": -0.01}}
+
+Multi-patient scenarios declare "vitals" on each patient instead.
+"""
+from typing import Any, Dict, Iterable
+import math
+
+import numpy as np
+
+from logic.intervention_tree import COMPILED_TREE, CompiledTree
+
+VITALS = ("hr", "rr", "sbp", "dbp", "spo2")
+HR, RR, SBP, DBP, SPO2 = range(len(VITALS))
+
+DEFAULT_BASELINE = {"hr": 80.0, "rr": 16.0, "sbp": 120.0, "dbp": 80.0, "spo2": 98.0}
+LOWER = np.array([0.0, 0.0, 0.0, 0.0, 0.0])
+UPPER = np.array([250.0, 60.0, 260.0, 160.0, 100.0])
+
+# name: (onset seconds, decay seconds, {vital: magnitude})
+EFFECT_KINDS = {
+    "oxygen_low":      (30.0,  math.inf, {"spo2": 3.0}),
+    "oxygen_high":     (30.0,  math.inf, {"spo2": 6.0, "rr": -2.0}),
+    "ventilation":     (15.0,  math.inf, {"spo2": 8.0, "rr": -4.0}),
+    "bronchodilator":  (60.0,  900.0,    {"spo2": 3.0, "rr": -4.0, "hr": 10.0}),
+    "epinephrine":     (60.0,  1200.0,   {"sbp": 42.0, "dbp": 32.0, "rr": -4.0, "spo2": 4.0, "hr": 8.0}),
+    "epinephrine_ped": (60.0,  1200.0,   {"sbp": 20.0, "dbp": 15.0, "rr": -2.0, "spo2": 2.0, "hr": 6.0}),
+    "nitroglycerin":   (90.0,  600.0,    {"sbp": -25.0, "dbp": -12.0, "hr": 6.0}),
+    "naloxone":        (120.0, 2700.0,   {"rr": 8.0, "spo2": 4.0}),
+}
+
+INTERVENTION_EFFECTS = {
+    ("Primary Assessment", "Breathing", "Administer O2", "NC"): "oxygen_low",
+    ("Primary Assessment", "Breathing", "Administer O2", "NRB"): "oxygen_high",
+    ("Primary Assessment", "Breathing", "Administer O2", "BVM Ventilation"): "ventilation",
+    ("Primary Assessment", "Breathing", "Administer O2", "CPAP"): "oxygen_high",
+    ("Medications", "Oxygen", "NC"): "oxygen_low",
+    ("Medications", "Oxygen", "SVN"): "oxygen_low",
+    ("Medications", "Oxygen", "NRB"): "oxygen_high",
+    ("Medications", "Oxygen", "BVM"): "ventilation",
+    ("Medications", "Oxygen", "CPAP"): "oxygen_high",
+    ("Medications", "Albuterol", "SVN"): "bronchodilator",
+    ("Medications", "Albuterol", "MDI"): "bronchodilator",
+    ("Medications", "Epinephrine", "0.3 mg IM (Adult auto-injector)"): "epinephrine",
+    ("Medications", "Epinephrine", "0.15 mg IM (Peds auto-injector)"): "epinephrine_ped",
+    ("Medications", "Nitroglycerin", "0.4 mg pill/spray"): "nitroglycerin",
+    ("Medications", "Naloxone", "2 mg IN (1 mg/nostril)"): "naloxone",
+    ("Medications", "Naloxone", "Repeat q5 min PRN"): "naloxone",
+}
+
+_KIND_NAMES = list(EFFECT_KINDS)
+_ONSET = np.array([EFFECT_KINDS[k][0] for k in _KIND_NAMES])
+_DECAY = np.array([EFFECT_KINDS[k][1] for k in _KIND_NAMES])
+_MAGNITUDE = np.array([[EFFECT_KINDS[k][2].get(v, 0.0) for v in VITALS] for k in _KIND_NAMES])
+_COLUMNS = np.arange(len(VITALS))
+# effects older than this contribute < 0.1% and are dropped
+_HORIZON = _DECAY * 7.0
+_SUSTAINED = np.isinf(_DECAY)
+
+
+def _vector(values: Dict[str, Any] | None, defaults: Dict[str, float], n: int) -> np.ndarray:
+    """(n, len(VITALS)) array from per-vital scalars or length-n sequences."""
+    values = values or {}
+    unknown = set(values) - set(VITALS)
+    if unknown:
+        raise ValueError(f"Unknown vitals: {sorted(unknown)}")
+    out = np.empty((n, len(VITALS)))
+    for col, name in enumerate(VITALS):
+        out[:, col] = values.get(name, defaults.get(name, 0.0))
+    return out
+
+
+class VitalsSimulator:
+    def __init__(self, n_patients: int = 1, baseline: Dict[str, Any] | None = None,
+                 trend: Dict[str, Any] | None = None, tree: CompiledTree = COMPILED_TREE,
+                 capacity: int = 64):
+        self.n_patients = n_patients
+        self.baseline = _vector(baseline, DEFAULT_BASELINE, n_patients)
+        self.trend = _vector(trend, {}, n_patients)   # change per second
+        self.values = self.baseline.copy()
+
+        # path id -> effect kind index
+        self.effect_of: Dict[int, int] = {}
+        for path, kind in INTERVENTION_EFFECTS.items():
+            pid = tree.get_id(path)
+            if pid is not None:
+                self.effect_of[pid] = _KIND_NAMES.index(kind)
+
+        # active effects as parallel arrays; the first _n_effects slots are live
+        self._n_effects = 0
+        self._eff_patient = np.empty(capacity, dtype=np.int32)
+        self._eff_kind = np.empty(capacity, dtype=np.int16)
+        self._eff_start = np.empty(capacity, dtype=np.float64)
+        # sustained effects never expire, so a patient's running ones only change on reset()
+        self._running = np.zeros((n_patients, len(_KIND_NAMES)), dtype=bool)
+
+    @classmethod
+    def from_scenario(cls, scenario: Dict[str, Any], n_patients: int = 1, **kwargs) -> "VitalsSimulator":
+        """One row per declared patient, or ``n_patients`` copies of the scenario's vitals."""
+        patients = scenario.get("patients")
+        if not patients:
+            spec = scenario.get("vitals", {})
+            return cls(n_patients, baseline=spec.get("baseline"), trend=spec.get("trend"), **kwargs)
+
+        def column(part, name, default):
+            return [p.get("vitals", {}).get(part, {}).get(name, default) for p in patients]
+        baseline = {v: column("baseline", v, DEFAULT_BASELINE[v]) for v in VITALS}
+        trend = {v: column("trend", v, 0.0) for v in VITALS}
+        return cls(len(patients), baseline=baseline, trend=trend, **kwargs)
+
+    def apply(self, patient: int, path_id: int, now: float) -> bool:
+        """Start the effect of an intervention; returns False if it has none."""
+        kind = self.effect_of.get(path_id)
+        if kind is None:
+            return False
+        self._append(np.array([patient]), np.array([kind]), np.array([now]))
+        return True
+
+    def apply_many(self, patients: Iterable[int], path_ids: Iterable[int], now: float) -> int:
+        """Vectorized apply() for batch replays; returns the number of effects started."""
+        patients = np.asarray(patients, dtype=np.int32)
+        kinds = np.array([self.effect_of.get(int(p), -1) for p in path_ids], dtype=np.int16)
+        mask = kinds >= 0
+        count = int(mask.sum())
+        if count:
+            count = self._append(patients[mask], kinds[mask], np.full(count, now))
+        return count
+
+    def add_effects(self, patients: np.ndarray, kinds: np.ndarray, starts: np.ndarray):
+        """Start effects already resolved to kind indices, each at its own time (replay seeks)."""
+        self._append(patients, kinds, starts)
+
+    def reset(self):
+        """Drop every effect, back to baseline and trend only."""
+        self._n_effects = 0
+        self._running[:] = False
+        self.values = self.baseline.copy()
+
+    def _append(self, patients: np.ndarray, kinds: np.ndarray, starts: np.ndarray) -> int:
+        """Store new effects, dropping sustained ones the patient already has; returns how many were kept."""
+        sustained = np.flatnonzero(_SUSTAINED[kinds])
+        if len(sustained):
+            keep = np.ones(len(kinds), dtype=bool)
+            running = self._running
+            for i, patient, kind in zip(sustained.tolist(), patients[sustained].tolist(),
+                                        kinds[sustained].tolist()):
+                if running[patient, kind]:
+                    keep[i] = False
+                else:
+                    running[patient, kind] = True
+            if not keep.all():
+                patients, kinds, starts = patients[keep], kinds[keep], starts[keep]
+
+        n, end = self._n_effects, self._n_effects + len(patients)
+        if end > len(self._eff_patient):
+            size = max(end, 2 * len(self._eff_patient))
+            self._eff_patient = np.resize(self._eff_patient, size)
+            self._eff_kind = np.resize(self._eff_kind, size)
+            self._eff_start = np.resize(self._eff_start, size)
+        self._eff_patient[n:end] = patients
+        self._eff_kind[n:end] = kinds
+        self._eff_start[n:end] = starts
+        self._n_effects = end
+        return end - n
+
+    def step(self, now: float) -> np.ndarray:
+        """Recompute every patient's vitals at time ``now``; returns the (n, 5) array."""
+        values = self.baseline + self.trend * now
+
+        n = self._n_effects
+        if n:
+            patient = self._eff_patient[:n]
+            kind = self._eff_kind[:n]
+            t = np.maximum(now - self._eff_start[:n], 0.0)
+
+            live = t < _HORIZON[kind]
+            if not live.all():
+                self._compact(live)
+                return self.step(now)
+
+            response = -np.expm1(-t / _ONSET[kind]) * np.exp(-t / _DECAY[kind])
+            contrib = response[:, None] * _MAGNITUDE[kind]
+            # one bincount over flattened (patient, vital) cells sums every effect
+            cells = (patient[:, None] * len(VITALS) + _COLUMNS).ravel()
+            values += np.bincount(cells, weights=contrib.ravel(),
+                                  minlength=values.size).reshape(values.shape)
+
+        np.clip(values, LOWER, UPPER, out=values)
+        self.values = values
+        return values
+
+    def trace(self, times: np.ndarray) -> np.ndarray:
+        """
+        Vitals of every patient at each of ``times`` as an (m, n, 5) array, in one
+        pass over the active effects; the simulator's state is left unchanged.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        values = self.baseline + self.trend * times[:, None, None]
+        n = self._n_effects
+        if n:
+            kind = self._eff_kind[:n]
+            t = np.maximum(times[:, None] - self._eff_start[:n], 0.0)
+            response = -np.expm1(-t / _ONSET[kind]) * np.exp(-t / _DECAY[kind])
+            response *= t < _HORIZON[kind]
+            onehot = np.zeros((n, self.n_patients))
+            onehot[np.arange(n), self._eff_patient[:n]] = 1.0
+            values += np.einsum("mk,kp,kv->mpv", response, onehot, _MAGNITUDE[kind])
+        return np.clip(values, LOWER, UPPER, out=values)
+
+    def _compact(self, keep: np.ndarray):
+        count = int(keep.sum())
+        n = self._n_effects
+        self._eff_patient[:count] = self._eff_patient[:n][keep]
+        self._eff_kind[:count] = self._eff_kind[:n][keep]
+        self._eff_start[:count] = self._eff_start[:n][keep]
+        self._n_effects = count
+
+    def vitals(self, patient: int = 0) -> Dict[str, float]:
+        """Latest computed vitals for one patient."""
+        return {name: float(self.values[patient, col]) for col, name in enumerate(VITALS)}
@@ -0,0 +1,75 @@
+"""
+Background worker for session work that may block.
+
+A Worker owns one thread that runs jobs strictly in submission order, so all
+work for a session (engine, scoring, event log, snapshots, server requests)
+happens in the order the trainee acted, and only ever on that thread. The
+caller never waits: submit() enqueues and returns, and finished jobs come
+back through poll(), which a UI drains from an ``after`` callback:
+
+    worker.submit(session.submit, path_id, now, on_done=show_result)
+    ...
+    for callback, value, error in worker.poll():   # on the UI thread
+        ...
+
+new_generation() marks everything submitted so far as belonging to a
+finished session: its jobs still run (closing files, final checkpoints) but
+their results are dropped instead of being shown against the next session.
+Errors are always returned so a failed write is never silent.
+"""
+from typing import Any, Callable, List, Tuple
+import queue
+import threading
+
+Result = Tuple[Callable[[Any], None] | None, Any, BaseException | None]
+
+
+class Worker:
+    def __init__(self, name: str = "session-worker"):
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._results: queue.SimpleQueue = queue.SimpleQueue()
+        self.generation = 0
+        self.pending = 0  # submitted jobs whose results have not been polled yet
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any,
+               on_done: Callable[[Any], None] | None = None):
+        """Queue ``fn(*args)``; ``on_done(value)`` is returned by poll() once it has run."""
+        self.pending += 1
+        self._jobs.put((self.generation, fn, args, on_done))
+
+    def new_generation(self):
+        """Drop the results (but not the errors) of everything submitted so far."""
+        self.generation += 1
+
+    def poll(self) -> List[Result]:
+        """Finished jobs as (on_done, value, error), in submission order; never blocks."""
+        out = []
+        while True:
+            try:
+                generation, on_done, value, error = self._results.get_nowait()
+            except queue.Empty:
+                return out
+            self.pending -= 1
+            if generation == self.generation:
+                out.append((on_done, value, error))
+            elif error is not None:
+                out.append((None, None, error))
+
+    def close(self, timeout: float | None = None):
+        """Finish every queued job, then stop the thread."""
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            generation, fn, args, on_done = job
+            try:
+                value, error = fn(*args), None
+            except Exception as e:
+                value, error = None, e
+            self._results.put((generation, on_done, value, error))
@@ -1,30 +1,41 @@
+import collections
+import time
+
 import customtkinter as ctk
 from dashboard_palette import PALETTE
+from logic import metrics
+from logic.intervention_tree import COMPILED_TREE
 
 
 class SelectionModal(ctk.CTkToplevel):
-    def __init__(self, master, tree, title="Select Action", callback=None):
+    """
+    Reusable intervention picker. The dashboard keeps one instance and calls
+    open() per category; the window is hidden rather than destroyed between
+    uses, and each tree level's frame is built once and cached by node id.
+    """
+
+    def __init__(self, master, title="Select Action", callback=None, tree=COMPILED_TREE):
+        """
+        :param callback: called with the selected leaf's path id
+        """
         super().__init__(master)
         self.tree = tree
         self.callback = callback
-        self.selected_path = []
+        self.selected_path = None
 
-        self._configure_window(title)
-        self._show_level(self.tree)
+        self._frames = {}        # node id -> built level frame
+        self._sizes = {}         # node id -> (w, h) measured on first build
+        self._current = None
+        # (node id, milliseconds from click to redraw, frame was cached)
+        self.redraw_times = collections.deque(maxlen=256)
 
-        first_key, first_subtree = next(iter(self.tree.items()))
-        self.selected_path.append(first_key)
-        if isinstance(first_subtree, dict) and first_subtree:
-            self._show_level(first_subtree, level=2)
-        else:
-            if self.callback:
-                self.callback(self.selected_path)
-            self.destroy()
+        self._configure_window(title)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.withdraw()
 
     def _configure_window(self, title):
         self.title(title)
         self.configure(fg_color=PALETTE['bg'])
-        self.grab_set()  # modal behavior
 
         # min/max size
         self.minsize(350, 250)
@@ -39,17 +50,31 @@ class SelectionModal(ctk.CTkToplevel):
             corner_radius=0
         )
         self.container.pack(padx=20, pady=20, fill="both", expand=True)
+        self.container.grid_columnconfigure(0, weight=1)
+
+    def open(self, node):
+        """Show the picker starting at ``node`` (usually a category)."""
+        if self.tree.is_leaf(node):
+            if self.callback:
+                self.callback(node)
+            return
+        self.selected_path = node
+        self.deiconify()
+        self.grab_set()  # modal behavior
+        self._timed_show(node)
 
-    def _clear_container(self):
-        for widget in self.container.winfo_children():
-            widget.destroy()
+    def close(self):
+        self.grab_release()
+        self.withdraw()
 
-    def _show_level(self, level_dict, level=1):
-        self._clear_container()
+    @metrics.timed("modal.build_level")
+    def _build_level(self, node):
+        level = self.tree.depth[node] + 1
+        frame = ctk.CTkFrame(self.container, fg_color=PALETTE['bg'])
 
         # Prompt label
         prompt = ctk.CTkLabel(
-            self.container,
+            frame,
             text=f"Step {level}: Choose an option",
             text_color=PALETTE['fg'],
             font=ctk.CTkFont(size=18, weight="bold")
@@ -57,33 +82,68 @@ class SelectionModal(ctk.CTkToplevel):
         prompt.pack(pady=(0, 10))
 
         # Option buttons
-        for key, subtree in level_dict.items():
+        for child in self.tree.children(node):
             btn = ctk.CTkButton(
-                self.container,
-                text=key,
+                frame,
+                text=self.tree.labels[child],
                 fg_color=PALETTE['accent'],
                 hover_color=PALETTE['fg'],
                 text_color=PALETTE['bg'],
                 font=ctk.CTkFont(size=16),
-                command=lambda k=key, s=subtree: self._on_select(k, s, level)
+                command=lambda c=child: self._on_select(c)
             )
             btn.pack(fill="x", pady=6)
+        return frame
+
+    @metrics.timed("modal.show_level")
+    def _show_level(self, node):
+        if self._current is not None:
+            self._frames[self._current].grid_remove()
+
+        frame = self._frames.get(node)
+        if frame is None:
+            frame = self._frames[node] = self._build_level(node)
+            frame.grid(row=0, column=0, sticky="nsew")
+            # measure once; cached levels reuse the size without update_idletasks()
+            self.update_idletasks()
+            self._sizes[node] = (min(self.winfo_reqwidth() + 40, 600),
+                                 min(self.winfo_reqheight() + 40, 500))
+        else:
+            frame.grid()
+        self._current = node
 
         # resize & center relative to master
-        self.update_idletasks()
-        w = min(self.winfo_reqwidth() + 40, 600)
-        h = min(self.winfo_reqheight() + 40, 500)
+        w, h = self._sizes[node]
         x = self.master.winfo_x() + (self.master.winfo_width() - w) // 2
         y = self.master.winfo_y() + (self.master.winfo_height() - h) // 2
         self.geometry(f"{w}x{h}+{x}+{y}")
 
-    def _on_select(self, key, subtree, level):
-        self.selected_path.append(key)
-        if isinstance(subtree, dict) and subtree:
-            self._show_level(subtree, level + 1)
+    def _timed_show(self, node):
+        cached = node in self._frames
+        start = time.perf_counter()
+        self._show_level(node)
+        # idle callbacks run after Tk's pending redraws, so this closes the measurement
+        self.after_idle(lambda: self.redraw_times.append(
+            (node, (time.perf_counter() - start) * 1000.0, cached)))
+
+    def redraw_stats(self):
+        """Click-to-redraw latency in ms, split by cached vs freshly built levels."""
+        stats = {}
+        for label, cached in (("cached", True), ("built", False)):
+            times = sorted(ms for _, ms, c in self.redraw_times if c == cached)
+            if times:
+                stats[label] = {
+                    "count": len(times),
+                    "mean_ms": sum(times) / len(times),
+                    "max_ms": times[-1],
+                }
+        return stats
+
+    def _on_select(self, node):
+        self.selected_path = node
+        if not self.tree.is_leaf(node):
+            self._timed_show(node)
         else:
-            print("Modal callback with path:", self.selected_path)  # Debug
+            self.close()
             if self.callback:
-                self.callback(self.selected_path)
-            self.destroy()
-
+                self.callback(node)
@@ -0,0 +1,57 @@
+import customtkinter as ctk
+from dashboard_palette import PALETTE
+
+
+class ReplayBar(ctk.CTkFrame):
+    SPEEDS = {"1×": 1.0, "10×": 10.0, "100×": 100.0}
+
+    def __init__(self, master, duration, on_play, on_speed, on_seek, on_jump):
+        """
+        Playback controls for a recorded session; they only report what the
+        instructor asked for, and the dashboard decides when to redraw.
+        :param duration: seconds the slider spans
+        :param on_play: called with True to play, False to pause
+        :param on_speed: called with the playback rate, e.g. 10.0
+        :param on_seek: called with the time the slider was moved to
+        :param on_jump: called with "start" or "harmful" (next harmful action)
+        """
+        super().__init__(master, fg_color=PALETTE['bg'])
+        self.duration = duration
+        self.on_play = on_play
+        self.playing = False
+
+        self.restart_button = ctk.CTkButton(self, text="⏮", width=40, command=lambda: on_jump("start"))
+        self.restart_button.grid(row=0, column=0, padx=(0, 4))
+        self.play_button = ctk.CTkButton(self, text="▶", width=40, command=self._toggle)
+        self.play_button.grid(row=0, column=1, padx=4)
+
+        self.speed = ctk.CTkSegmentedButton(self, values=list(self.SPEEDS),
+                                            command=lambda label: on_speed(self.SPEEDS[label]))
+        self.speed.set("1×")
+        self.speed.grid(row=0, column=2, padx=4)
+
+        self.slider = ctk.CTkSlider(self, from_=0, to=max(duration, 1), command=on_seek,
+                                    button_color=PALETTE['accent'])
+        self.slider.set(0)
+        self.slider.grid(row=0, column=3, padx=4, sticky="ew")
+        self.grid_columnconfigure(3, weight=1)
+
+        self.position_label = ctk.CTkLabel(self, text="", text_color=PALETTE['fg'])
+        self.position_label.grid(row=0, column=4, padx=4)
+        self.harmful_button = ctk.CTkButton(self, text="Next harmful", width=110,
+                                            fg_color=PALETTE['highlight'],
+                                            command=lambda: on_jump("harmful"))
+        self.harmful_button.grid(row=0, column=5, padx=(4, 0))
+
+    def _toggle(self):
+        self.on_play(not self.playing)
+
+    def show(self, t, playing):
+        """Move the slider and labels to ``t``; set() does not call on_seek."""
+        if playing != self.playing:
+            self.playing = playing
+            self.play_button.configure(text="⏸" if playing else "▶")
+        self.slider.set(t)
+        m, s = divmod(int(t), 60)
+        dm, ds = divmod(int(self.duration), 60)
+        self.position_label.configure(text=f"{m:02d}:{s:02d} / {dm:02d}:{ds:02d}")
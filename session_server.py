@@ -0,0 +1,308 @@
+"""
+Asyncio session server hosting many trainee sessions in one process.
+
+Speaks a small subset of HTTP/1.1 (keep-alive, JSON bodies, Content-Length
+only) so thin clients need nothing beyond the standard library:
+
+    POST   /sessions                 {"scenario": "medical_sample"}
+    POST   /sessions/<id>/actions    {"path_id": 61} or {"path": ["Scene", ...]}
+    POST   /sessions/<id>/patient    {"patient": 2}   (multi-patient scenarios)
+    GET    /sessions/<id>            current summary
+    DELETE /sessions/<id>            end the session, returns the final summary
+
+Every session is a logic.session.Session sharing its scenario's compiled
+index, so per-session state is only the mutable progress. Sessions that are
+over, or idle for a whole Session.DURATION, are evicted by a periodic sweep;
+finished ones are kept until one sweep interval after their last request so
+the client can still read the final summary.
+
+Usage:
+    python session_server.py --port 8765 --scenarios scenarios
+"""
+from typing import Any, Dict, Tuple
+import argparse
+import asyncio
+import http.client
+import itertools
+import json
+import time
+
+from logic.intervention_tree import COMPILED_TREE
+from logic.scenario_library import ScenarioLibrary
+from logic.session import Session
+
+MAX_BODY = 64 * 1024
+SWEEP_INTERVAL = 30.0  # seconds between eviction sweeps
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SessionServer:
+    def __init__(self, library: ScenarioLibrary):
+        self.library = library
+        self.sessions: Dict[int, Session] = {}
+        self.last_seen: Dict[int, float] = {}  # session id -> monotonic time of its last request
+        self._ids = itertools.count(1)
+
+    # ---------- request handling ----------
+    def handle(self, method: str, target: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        parts = [p for p in target.split("/") if p]
+        if parts[:1] != ["sessions"]:
+            raise HTTPError(404, "not found")
+
+        if len(parts) == 1 and method == "POST":
+            return 201, self._create(body)
+
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise HTTPError(404, "not found")
+        session_id = int(parts[1])
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, f"no session {session_id}")
+        self.last_seen[session_id] = time.monotonic()
+
+        if len(parts) == 3 and parts[2] == "actions" and method == "POST":
+            return 200, self._act(session, body)
+        if len(parts) == 3 and parts[2] == "patient" and method == "POST":
+            try:
+                session.select_patient(body.get("patient"))
+            except (IndexError, TypeError):
+                raise HTTPError(400, f"bad patient {body.get('patient')!r}")
+            return 200, {"patient": body["patient"]}
+        if len(parts) == 2 and method == "GET":
+            return 200, self._status(session)
+        if len(parts) == 2 and method == "DELETE":
+            session.end()
+            self._drop(session_id)
+            return 200, self._status(session)
+        raise HTTPError(405, "method not allowed")
+
+    def _create(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        name = body.get("scenario")
+        try:
+            scenario, index = self.library.load(name)
+        except KeyError:
+            raise HTTPError(404, f"no scenario {name!r}")
+        session = Session(scenario, index=index)
+        session.start()
+        session_id = next(self._ids)
+        self.sessions[session_id] = session
+        self.last_seen[session_id] = time.monotonic()
+        return {
+            "session_id": session_id,
+            "title": scenario.get("title", ""),
+            "prompt": scenario.get("description", ""),
+            "n_patients": session.n_patients,
+            "time_remaining": session.time_remaining(),
+        }
+
+    def _act(self, session: Session, body: Dict[str, Any]) -> Dict[str, Any]:
+        if "path_id" in body:
+            path_id = body["path_id"]
+            if not isinstance(path_id, int) or not COMPILED_TREE.contains(path_id):
+                raise HTTPError(400, f"bad path_id {path_id!r}")
+        else:
+            path_id = COMPILED_TREE.get_id(body.get("path", ()))
+            if path_id is None:
+                raise HTTPError(400, f"unknown path {body.get('path')!r}")
+        outcome = session.submit(path_id)
+        return {
+            "result": outcome["result"],
+            "prompt": outcome["prompt"],
+            "completed": session.is_completed(),
+            "failed": session.scenario_failed(),
+            "time_remaining": session.time_remaining(),
+        }
+
+    # ---------- eviction ----------
+    def evict(self, now: float | None = None, grace: float = SWEEP_INTERVAL) -> int:
+        """
+        Drop sessions idle past Session.DURATION, and those that are over and
+        have had no request for ``grace`` seconds; returns how many were dropped.
+        """
+        if now is None:
+            now = time.monotonic()
+        stale = [sid for sid, session in self.sessions.items()
+                 if now - self.last_seen[sid] >= (grace if session.is_over() else Session.DURATION)]
+        for sid in stale:
+            self._drop(sid)
+        return len(stale)
+
+    def _drop(self, session_id: int):
+        del self.sessions[session_id]
+        del self.last_seen[session_id]
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.evict()
+
+    def _status(self, session: Session) -> Dict[str, Any]:
+        return {
+            "summary": session.summary(),
+            "completed": session.is_completed(),
+            "over": session.is_over(),
+            "time_remaining": session.time_remaining(),
+        }
+
+    # ---------- HTTP plumbing ----------
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                headers = {}
+                framed = False  # whole request read, so the stream is in sync for the next one
+                try:
+                    lines = head.decode("latin-1").split("\r\n")
+                    method, target, _ = lines[0].split(" ", 2)
+                    for line in lines[1:]:
+                        if ":" in line:
+                            k, v = line.split(":", 1)
+                            headers[k.strip().lower()] = v.strip()
+
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise HTTPError(400, "bad content-length")
+                    if length > MAX_BODY:
+                        raise HTTPError(413, "body too large")
+                    raw = await reader.readexactly(length) if length else b""
+                    framed = True
+                    body = json.loads(raw) if raw else {}
+                    if not isinstance(body, dict):
+                        raise HTTPError(400, "body must be a JSON object")
+                    status, payload = self.handle(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except (ValueError, TypeError, AttributeError) as e:
+                    status, payload = 400, {"error": str(e) or type(e).__name__}
+                except asyncio.IncompleteReadError:
+                    return  # client hung up mid-body
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {http.client.responses.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n"
+                    .encode() + data
+                )
+                await writer.drain()
+                if not framed or headers.get("connection", "").lower() == "close":
+                    return
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        server = await asyncio.start_server(self.serve_client, host, port, backlog=4096)
+        print(f"Serving {len(self.library.names())} scenarios on {host}:{port}", flush=True)
+        sweeper = asyncio.create_task(self._sweep())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+
+class RemoteSession:
+    """
+    Blocking client with the same surface the dashboard uses on a local
+    Session, so the Tk app can run as a thin client of a session server.
+    Construction does no I/O; start() creates the server-side session, so
+    a caller can run it, like every other request, off its UI thread.
+    """
+
+    def __init__(self, host: str, port: int, scenario_name: str):
+        self.scenario_name = scenario_name
+        self._conn = http.client.HTTPConnection(host, port, timeout=5)  # connects on first request
+        self.session_id: int | None = None
+        self.n_patients = 1
+        self._completed = False
+        self._failed = False
+        self._ended = False
+        self._sync(Session.DURATION)
+
+    def _request(self, method: str, path: str, body: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        self._conn.request(method, path, body=data, headers=headers)
+        response = self._conn.getresponse()
+        payload = json.loads(response.read() or b"{}")
+        if response.status >= 400:
+            raise RuntimeError(f"session server: {response.status} {payload.get('error')}")
+        return payload
+
+    def _sync(self, time_remaining: float):
+        # the timer display ticks locally and re-syncs on every server reply
+        self._remaining_at = time_remaining
+        self._synced_at = time.monotonic()
+
+    def start(self):
+        """Create the session on the server, which starts its clock."""
+        created = self._request("POST", "/sessions", {"scenario": self.scenario_name})
+        self.session_id = created["session_id"]
+        self.n_patients = created["n_patients"]
+        self._sync(created["time_remaining"])
+
+    def submit(self, path_id: int, now: float | None = None) -> Dict[str, Any]:
+        # ``now`` is accepted for parity with Session; the server times actions on arrival
+        reply = self._request("POST", f"/sessions/{self.session_id}/actions", {"path_id": path_id})
+        self._completed = reply["completed"]
+        self._failed = reply["failed"]
+        self._sync(reply["time_remaining"])
+        return {"result": reply["result"], "prompt": reply["prompt"]}
+
+    def select_patient(self, patient: int, now: float | None = None):
+        self._request("POST", f"/sessions/{self.session_id}/patient", {"patient": patient})
+
+    def time_remaining(self) -> float:
+        return max(0.0, self._remaining_at - (time.monotonic() - self._synced_at))
+
+    def elapsed(self) -> float:
+        return Session.DURATION - self.time_remaining()
+
+    def is_completed(self) -> bool:
+        return self._completed
+
+    def scenario_failed(self) -> bool:
+        return self._failed
+
+    def is_over(self) -> bool:
+        return self._ended or self.time_remaining() == 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return self._request("GET", f"/sessions/{self.session_id}")["summary"]
+
+    def end(self):
+        if not self._ended:
+            self._ended = True
+            if self.session_id is not None:
+                self._request("DELETE", f"/sessions/{self.session_id}")
+
+    def close(self):
+        """End the session on the server, unless already ended, and close the connection."""
+        try:
+            self.end()
+        except (OSError, RuntimeError):
+            pass  # server gone or session already evicted; nothing left to free
+        finally:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host SimuCare sessions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenarios", default="scenarios", help="scenario library directory")
+    args = parser.parse_args()
+
+    server = SessionServer(ScenarioLibrary(args.scenarios))
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from logic.intervention_tree import COMPILED_TREE
+from logic.vitals import VitalsSimulator
+
+NRB = COMPILED_TREE.path_id(("Medications", "Oxygen", "NRB"))
+EPINEPHRINE = COMPILED_TREE.path_id(("Medications", "Epinephrine", "0.3 mg IM (Adult auto-injector)"))
+BASELINE = {"spo2": 88.0, "rr": 24.0}
+
+
+def test_repeated_oxygen_matches_single_application():
+    once = VitalsSimulator(baseline=BASELINE)
+    once.apply(0, NRB, 10.0)
+    twice = VitalsSimulator(baseline=BASELINE)
+    twice.apply(0, NRB, 10.0)
+    twice.apply(0, NRB, 40.0)
+    for t in (20.0, 60.0, 600.0):
+        np.testing.assert_allclose(twice.step(t), once.step(t))
+
+
+def test_repeated_oxygen_in_one_batch_and_per_patient():
+    sim = VitalsSimulator(2, baseline=BASELINE)
+    assert sim.apply_many([0, 0, 1], [NRB, NRB, NRB], 0.0) == 2
+    single = VitalsSimulator(baseline=BASELINE)
+    single.apply(0, NRB, 0.0)
+    values = sim.step(300.0)
+    np.testing.assert_allclose(values[0], single.step(300.0)[0])
+    np.testing.assert_allclose(values[1], values[0])
+
+
+def test_boluses_still_stack():
+    once = VitalsSimulator(baseline=BASELINE)
+    once.apply(0, EPINEPHRINE, 0.0)
+    twice = VitalsSimulator(baseline=BASELINE)
+    twice.apply(0, EPINEPHRINE, 0.0)
+    twice.apply(0, EPINEPHRINE, 0.0)
+    assert twice.step(300.0)[0, 2] > once.step(300.0)[0, 2]
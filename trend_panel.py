@@ -0,0 +1,225 @@
+import collections
+import time
+
+import customtkinter as ctk
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from dashboard_palette import PALETTE
+from logic import metrics
+from logic.session import Session
+from logic.vitals import HR, RR, SBP, SPO2
+
+
+class TrendSeries:
+    """
+    Fixed-capacity (t, values) series. When it fills up, every other point
+    is dropped and only every ``stride``-th later sample is kept, so a
+    series of any length holds between capacity/2 and capacity points and
+    never allocates after construction. A sample that decimation skips is
+    still shown as the live end of the series until the next one replaces it.
+    """
+    __slots__ = ("capacity", "t", "y", "n", "head", "stride", "_skip")
+
+    def __init__(self, capacity: int = 1024, channels: int = 1):
+        self.capacity = capacity - capacity % 2
+        self.t = np.zeros(self.capacity + 1)  # one extra slot for the live end
+        self.y = np.zeros((self.capacity + 1, channels))
+        self.clear()
+
+    def clear(self):
+        self.n = 0     # kept points
+        self.head = 0  # 1 while slot n holds a skipped, most recent sample
+        self.stride = 1
+        self._skip = 0
+
+    def __len__(self) -> int:
+        return self.n + self.head
+
+    def append(self, t: float, values):
+        if self._skip:
+            self._skip -= 1
+            self.t[self.n] = t
+            self.y[self.n] = values
+            self.head = 1
+            return
+        if self.n == self.capacity:
+            half = self.capacity // 2
+            self.t[:half] = self.t[:self.capacity:2]
+            self.y[:half] = self.y[:self.capacity:2]
+            self.n = half
+            self.stride *= 2
+        self.t[self.n] = t
+        self.y[self.n] = values
+        self.n += 1
+        self.head = 0
+        self._skip = self.stride - 1
+
+
+class TrendPlot:
+    """
+    Vitals, cumulative score and per-action response time over one scenario,
+    drawn by blitting: the axes, ticks and labels are rendered once into a
+    cached background, and each frame only restores that background and
+    redraws the data lines. Axis limits are fixed for the scenario (response
+    times above RESPONSE_MAX are drawn at the top), so frames never need a
+    full redraw; one happens only on scenario load and window resize.
+
+    Works on any Agg-based canvas, so it can be benchmarked without a display.
+    """
+    VITALS = (("HR", HR, "#BF616A"), ("RR", RR, "#EBCB8B"), ("SBP", SBP, "#A3BE8C"),
+              ("SpO2", SPO2, PALETTE["accent"]))
+    RESPONSE_MAX = 30.0  # seconds
+
+    def __init__(self, figure, canvas, duration: float = Session.DURATION, capacity: int = 1024):
+        self.figure = figure
+        self.canvas = canvas
+        self.vitals = TrendSeries(capacity, len(self.VITALS))
+        self.actions = TrendSeries(capacity // 2, 2)  # (cumulative score, response time)
+        self.full_draws = 0
+        self._background = None
+        self._dirty = False
+
+        figure.set_facecolor(PALETTE["bg"])
+        self.ax_vitals, self.ax_score, self.ax_response = figure.subplots(3, 1, sharex=True)
+        for ax, label in ((self.ax_vitals, "vitals"), (self.ax_score, "score"),
+                          (self.ax_response, "response s")):
+            ax.set_facecolor(PALETTE["bg"])
+            ax.set_ylabel(label, color=PALETTE["fg"], fontsize=8)
+            ax.tick_params(colors=PALETTE["fg"], labelsize=7)
+            for spine in ax.spines.values():
+                spine.set_color(PALETTE["highlight"])
+        self.ax_vitals.set_ylim(0, 200)
+        self.ax_response.set_ylim(0, self.RESPONSE_MAX)
+        self.ax_response.set_xlim(0, duration)
+
+        self.vital_lines = [self.ax_vitals.plot([], [], color=color, lw=1, label=name, animated=True)[0]
+                            for name, _, color in self.VITALS]
+        self.ax_vitals.legend(loc="upper left", fontsize=6, ncol=len(self.VITALS), frameon=False,
+                              labelcolor=PALETTE["fg"])
+        self.score_line, = self.ax_score.plot([], [], color=PALETTE["accent"], lw=1.5,
+                                              drawstyle="steps-post", animated=True)
+        self.response_line, = self.ax_response.plot([], [], color=PALETTE["highlight"], lw=0, marker=".",
+                                                    ms=3, animated=True)
+        figure.tight_layout(pad=0.4)
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def reset(self, total_required: int, duration: float = Session.DURATION):
+        """Start a new scenario: clears the data and redraws the axes once."""
+        self.clear()
+        self.ax_score.set_ylim(0, max(1, total_required))
+        self.ax_response.set_xlim(0, duration)
+        self.canvas.draw_idle()
+
+    def clear(self):
+        """Drop the data but keep the axes, so the next frame is still a blit."""
+        self.vitals.clear()
+        self.actions.clear()
+        self._dirty = True
+
+    def add_vitals(self, t: float, values):
+        """:param values: one patient's row of VitalsSimulator.values"""
+        self.vitals.append(t, [values[col] for _, col, _ in self.VITALS])
+        self._dirty = True
+
+    def add_action(self, t: float, score: int, response: float):
+        self.actions.append(t, (score, min(response, self.RESPONSE_MAX)))
+        self._dirty = True
+
+    def _on_draw(self, event):
+        # a full draw (first show, reset, resize) leaves the static parts to cache
+        self.full_draws += 1
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        n = len(self.vitals)
+        for k, line in enumerate(self.vital_lines):
+            line.set_data(self.vitals.t[:n], self.vitals.y[:n, k])
+            self.ax_vitals.draw_artist(line)
+        n = len(self.actions)
+        self.score_line.set_data(self.actions.t[:n], self.actions.y[:n, 0])
+        self.response_line.set_data(self.actions.t[:n], self.actions.y[:n, 1])
+        self.ax_score.draw_artist(self.score_line)
+        self.ax_response.draw_artist(self.response_line)
+
+    @metrics.timed("trends.blit")
+    def blit(self) -> bool:
+        """Redraw the data lines if anything changed; returns whether a frame was drawn."""
+        if self._background is None or not self._dirty:
+            return False
+        self.canvas.restore_region(self._background)
+        self._draw_lines()
+        self.canvas.blit(self.figure.bbox)
+        self._dirty = False
+        return True
+
+
+class TrendPanel(ctk.CTkFrame):
+    FRAME_BUDGET_MS = 10.0  # per frame, i.e. at most a tenth of the main loop at 10 Hz
+
+    def __init__(self, master, sample, interval=100, width=400, height=300):
+        """
+        :param sample: called every frame; returns (elapsed seconds, vitals row) to
+                       plot, or None while the session is over
+        :param interval: ms between frames
+        """
+        super().__init__(master, fg_color=PALETTE['bg'], corner_radius=8,
+                         border_width=1, border_color=PALETTE['accent'])
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.sample = sample
+        self.interval = interval
+
+        figure = Figure(figsize=(width / 100, height / 100), dpi=100)
+        self.canvas = FigureCanvasTkAgg(figure, master=self)
+        self.canvas.get_tk_widget().configure(bg=PALETTE['bg'], highlightthickness=0)
+        self.canvas.get_tk_widget().grid(row=0, column=0, padx=8, pady=8, sticky='nsew')
+        self.plot = TrendPlot(figure, self.canvas)
+
+        # milliseconds per frame, sampling plus blit
+        self.frame_times = collections.deque(maxlen=600)
+        self._job = self.after(self.interval, self._tick)
+
+    def reset(self, total_required):
+        self.plot.reset(total_required)
+
+    def clear(self):
+        self.plot.clear()
+
+    def add_vitals(self, t, values):
+        self.plot.add_vitals(t, values)
+
+    def add_action(self, t, score, response):
+        self.plot.add_action(t, score, response)
+
+    @metrics.timed("trends.frame")
+    def _tick(self):
+        start = time.perf_counter()
+        point = self.sample()
+        if point is not None:
+            self.plot.add_vitals(*point)
+        if self.plot.blit():
+            self.frame_times.append((time.perf_counter() - start) * 1000.0)
+        self._job = self.after(self.interval, self._tick)
+
+    def frame_stats(self):
+        """Frame time in ms over the last frames drawn, against FRAME_BUDGET_MS."""
+        times = sorted(self.frame_times)
+        if not times:
+            return {}
+        return {
+            "count": len(times),
+            "mean_ms": sum(times) / len(times),
+            "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))],
+            "max_ms": times[-1],
+            "over_budget": sum(1 for t in times if t > self.FRAME_BUDGET_MS),
+            "full_draws": self.plot.full_draws,
+        }
+
+    def destroy(self):
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+        super().destroy()